@@ -1,6 +1,63 @@
-from .utils import Parser, parse, load, init, clear
-from .callbacks import CallbackOWL, CallbackSHACL
-from .context import Context
-from .filters import Filter
-from .neo4j_loader import Neo4JLoader
-from .tigergraph_loader import TigerGraphLoader
\ No newline at end of file
+from typing import TYPE_CHECKING
+import importlib
+
+# Public objects are imported on first access, so that `import graph_etl` doesn't import
+# polars, the database drivers or read the log files of the ETL
+_LAZY_OBJECTS = {
+    "Parser": ".utils",
+    "parse": ".utils",
+    "load": ".utils",
+    "run": ".utils",
+    "compact": ".utils",
+    "validate_edges": ".utils",
+    "supernodes": ".utils",
+    "init": ".utils",
+    "clear": ".utils",
+    "report": ".utils",
+    "CallbackOWL": ".callbacks",
+    "CallbackSHACL": ".callbacks",
+    "Context": ".context",
+    "Filter": ".filters",
+    "RunReport": ".run_report",
+    "MemoryProfiler": ".profiling",
+    "SurrogateIds": ".surrogates",
+    "Neo4JLoader": ".neo4j_loader",
+    "TigerGraphLoader": ".tigergraph_loader",
+    "KuzuLoader": ".kuzu_loader",
+    "DuckDBLoader": ".duckdb_loader",
+    "RecordingLoader": ".recording_loader",
+    "StubNeo4jDriver": ".recording_loader",
+}
+
+__all__ = list(_LAZY_OBJECTS.keys())
+
+if TYPE_CHECKING:
+    from .utils import Parser, parse, load, run, validate_edges, compact, supernodes, init, clear, report
+    from .callbacks import CallbackOWL, CallbackSHACL
+    from .context import Context
+    from .filters import Filter
+    from .run_report import RunReport
+    from .profiling import MemoryProfiler
+    from .surrogates import SurrogateIds
+    from .neo4j_loader import Neo4JLoader
+    from .tigergraph_loader import TigerGraphLoader
+    from .kuzu_loader import KuzuLoader
+    from .duckdb_loader import DuckDBLoader
+    from .recording_loader import RecordingLoader, StubNeo4jDriver
+
+
+def __getattr__(name: str):
+    if name in _LAZY_OBJECTS:
+        value = getattr(importlib.import_module(_LAZY_OBJECTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    
+    try:
+        return importlib.import_module(f".{name}", __name__)
+    except ModuleNotFoundError as e:
+        if e.name != f"{__name__}.{name}": raise
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+
+
+def __dir__():
+    return sorted(list(globals().keys()) + __all__)
@@ -0,0 +1,211 @@
+from __future__ import annotations
+from typing import Dict, Tuple, TYPE_CHECKING
+
+import os
+import json
+import time
+import random
+import logging
+import argparse
+import tempfile
+
+import polars as pl
+
+if TYPE_CHECKING:
+    from .loader import Loader
+
+
+def generate_graph(
+    n_nodes: int = 100_000,
+    n_edges: int = 500_000,
+    skew: float = 1.0,
+    width: int = 4,
+    seed: int = 0
+) -> Tuple[pl.DataFrame, pl.DataFrame]:
+    """
+    Generate a synthetic graph of `n_nodes` nodes with `width` string properties
+    and `n_edges` edges between them
+
+    Parameters
+    ----------
+    n_nodes : int
+        Number of nodes
+    n_edges : int
+        Number of edges
+    skew : float
+        Skew of the degree distribution, with `0` edges ends are drawn uniformly,
+        higher values concentrate edges on a few hub nodes
+    width : int
+        Number of properties of each node, besides the `id`
+    seed : int
+        Seed of the random generator
+
+    Examples
+    --------
+
+    >>> nodes, edges = generate_graph(1_000, 5_000, skew=2.0)
+    """
+    rng = random.Random(seed)
+
+    nodes = pl.DataFrame({"id": [f"NODE_{i}" for i in range(n_nodes)]}).with_columns([
+        (pl.lit(f"property_{j}_") + pl.col("id")).alias(f"property_{j}") for j in range(width)
+    ])
+
+    edges = pl.DataFrame({
+        "start": [f"NODE_{int(n_nodes * rng.random() ** (1 + skew))}" for _ in range(n_edges)],
+        "end": [f"NODE_{rng.randrange(n_nodes)}" for _ in range(n_edges)],
+    })
+
+    return nodes, edges
+
+
+def edges_locality(batch_rows: int = 10_000) -> Dict[str, float]:
+    """
+    Average number of distinct `start` and `end` nodes in each window of `batch_rows` rows of the edge files,
+    i.e. the number of nodes looked up (and locked) by each batch of a load, lower is better
+    """
+    starts, ends, n_batches = 0, 0, 0
+
+    for file_name in os.listdir("./output/edges"):
+        stats = (
+            pl.read_csv(f"./output/edges/{file_name}", separator=";", infer_schema_length=0)
+                .with_row_count()
+                .group_by(pl.col("row_nr") // batch_rows)
+                .agg([pl.col("start").n_unique(), pl.col("end").n_unique()])
+        )
+        starts += stats.get_column("start").sum()
+        ends += stats.get_column("end").sum()
+        n_batches += stats.shape[0]
+
+    return {
+        "start_nodes_per_batch": starts / n_batches if n_batches else 0.,
+        "end_nodes_per_batch": ends / n_batches if n_batches else 0.
+    }
+
+
+def run_benchmark(
+    loader: Loader = None,
+    n_nodes: int = 100_000,
+    n_edges: int = 500_000,
+    skew: float = 1.0,
+    width: int = 4,
+    n_sources: int = 1,
+    seed: int = 0,
+    sort_edges: bool = False
+) -> Dict[str, Dict]:
+    """
+    Run the whole ETL (``parse``, mapping and ``load``) on a synthetic graph
+    and report the time and throughput of each stage
+
+    Parameters
+    ----------
+    loader : Loader
+        Loader used for the load stage, a ``RecordingLoader`` by default
+    n_nodes, n_edges, skew, width, seed :
+        Parameters of the synthetic graph, see ``generate_graph``
+    n_sources : int
+        The graph is split between this number of parsing functions
+    sort_edges : bool
+        If edges are sorted by `start` then `end` before being written, see ``etl.init``
+
+    Examples
+    --------
+
+    >>> report = run_benchmark(n_nodes=10_000, n_edges=50_000)
+    >>> report["load"]["rows_per_sec"]
+    """
+    from . import utils
+    from .recording_loader import RecordingLoader
+
+    nodes, edges = generate_graph(n_nodes, n_edges, skew, width, seed)
+    loader = loader or RecordingLoader()
+
+    # The benchmark runs in a temporary directory with its own store, the `./output` 
+    # and the parsers of the caller are left untouched
+    cwd, store, handlers = os.getcwd(), utils.INFOS_SINGLETON, list(logging.root.handlers)
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        utils.INFOS_SINGLETON = utils.StoreInfo()
+        try:
+            return _run_benchmark(loader, nodes, edges, n_sources, sort_edges)
+        finally:
+            for handler in logging.root.handlers:
+                if handler not in handlers:
+                    logging.root.removeHandler(handler)
+                    handler.close()
+            utils.INFOS_SINGLETON = store
+            os.chdir(cwd)
+
+
+def _run_benchmark(loader: Loader, nodes: pl.DataFrame, edges: pl.DataFrame, n_sources: int, sort_edges: bool) -> Dict[str, Dict]:
+    from . import utils
+    from .recording_loader import RecordingLoader
+
+    utils.init(sort_edges=sort_edges)
+
+    def source_parser(i_source: int):
+        def parse_source(ctx):
+            ctx.save_nodes(nodes[i_source::n_sources], "Node")
+            ctx.save_edges(edges[i_source::n_sources], "LINKED_TO", start_id="Node:id", end_id="Node:id")
+        parse_source.__name__ = f"benchmark_source_{i_source}"
+        return parse_source
+
+    for i_source in range(n_sources):
+        utils.Parser(source=f"benchmark_{i_source}")(source_parser(i_source))
+
+    report = {}
+    n_rows = nodes.shape[0] + edges.shape[0]
+
+    for stage, run_stage in (
+        ("parse", lambda: utils.parse(use_mapper=False)),
+        ("map", lambda: utils._map_property(utils.INFOS_SINGLETON)),
+        ("load", lambda: utils.load(loader))
+    ):
+        start, start_cpu = time.perf_counter(), time.process_time()
+        run_stage()
+        seconds, cpu_seconds = time.perf_counter() - start, time.process_time() - start_cpu
+
+        report[stage] = {
+            "seconds": seconds,
+            "cpu_seconds": cpu_seconds,
+            "rows": n_rows,
+            "rows_per_sec": n_rows / seconds if seconds else 0.
+        }
+
+    if isinstance(loader, RecordingLoader):
+        report["load"]["files"] = len(loader.calls)
+        report["load"]["bytes"] = sum(call["size"] for call in loader.calls)
+        report["load"]["simulated_seconds"] = loader.simulated_time
+
+    report["load"].update(edges_locality())
+
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark of graph-etl on a synthetic graph")
+    parser.add_argument("--nodes", type=int, default=100_000)
+    parser.add_argument("--edges", type=int, default=500_000)
+    parser.add_argument("--skew", type=float, default=1.0)
+    parser.add_argument("--width", type=int, default=4)
+    parser.add_argument("--sources", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--sort-edges", action="store_true", help="Sort edges by `start` then `end` before writing them")
+    parser.add_argument("--loader", choices=["recording", "kuzu", "duckdb"], default="recording")
+    args = parser.parse_args()
+
+    loader = None
+    if args.loader != "recording":
+        from .cli import create_loader
+        loader = create_loader({"type": args.loader, "database_path": f"./benchmark.{args.loader}"})
+
+    print(json.dumps(run_benchmark(
+        loader,
+        n_nodes=args.nodes,
+        n_edges=args.edges,
+        skew=args.skew,
+        width=args.width,
+        n_sources=args.sources,
+        seed=args.seed,
+        sort_edges=args.sort_edges
+    ), indent=4))
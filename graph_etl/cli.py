@@ -0,0 +1,174 @@
+from typing import List, Dict
+
+import os
+import sys
+import logging
+import argparse
+import importlib
+import importlib.util
+
+STAGES = ["parse", "map", "validate", "compact", "supernodes", "load", "report"]
+
+LOADERS = {
+    "neo4j": "Neo4JLoader",
+    "tigergraph": "TigerGraphLoader",
+    "kuzu": "KuzuLoader",
+    "duckdb": "DuckDBLoader",
+    "recording": "RecordingLoader",
+}
+
+
+def discover_parsers(modules: List[str]) -> List[str]:
+    """
+    Import each module to register its functions decorated with ``@etl.Parser``,
+    `modules` can contain python files, directories (every python file in it is imported) or dotted module names
+
+    Returns the name of the imported modules
+    """
+    imported = []
+
+    for module in modules:
+        if os.path.isdir(module):
+            paths = sorted(
+                os.path.join(module, file) for file in os.listdir(module)
+                if file.endswith(".py") and not file.startswith("_")
+            )
+        elif module.endswith(".py"):
+            paths = [module]
+        else:
+            importlib.import_module(module)
+            imported.append(module)
+            continue
+
+        for path in paths:
+            name = os.path.splitext(os.path.basename(path))[0]
+            # Parsing modules often import each other (`from imdb import *`)
+            directory = os.path.dirname(os.path.abspath(path))
+            if directory not in sys.path:
+                sys.path.insert(0, directory)
+
+            # Modules are executed again if already imported, parsers are registered
+            # in the store of the current run under the same name
+            spec = importlib.util.spec_from_file_location(name, path)
+            sys.modules[name] = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(sys.modules[name])
+            imported.append(name)
+
+    return imported
+
+
+def create_loader(config: Dict):
+    """
+    Create a loader from its configuration, `type` is one of
+    `neo4j`, `tigergraph`, `kuzu`, `duckdb` or `recording`, other keys are given to the loader
+
+    Examples
+    --------
+
+    >>> create_loader({"type": "neo4j", "url": "bolt://127.0.0.1:7687", "nodes_batch_size": 50_000})
+    """
+    import graph_etl
+
+    config = dict(config)
+    loader_type = config.pop("type", "neo4j")
+    if loader_type not in LOADERS:
+        raise ValueError(f"Unknown loader `{loader_type}`, must be one of {list(LOADERS.keys())}")
+
+    return getattr(graph_etl, LOADERS[loader_type])(**config)
+
+
+def read_config(path: str) -> Dict:
+    if not path: return {}
+
+    import yaml
+    with open(path, "r") as f:
+        return yaml.safe_load(f) or {}
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(
+        prog="graph-etl",
+        description="Run the parsing functions of MODULES and load the graph in a database"
+    )
+    parser.add_argument("modules", nargs="*", help="Python files, directories or modules with `@Parser` functions")
+    parser.add_argument("--config", help="YAML file with the `loader`, `modules`, `stages`, `workers`... options")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, help="Stages to run, all by default")
+    parser.add_argument("--map-workers", type=int, help="Number of edge files mapped in parallel")
+    parser.add_argument("--dangling", choices=["report", "drop", "blank_nodes"], help="What the `validate` stage does with dangling edges")
+    parser.add_argument("--compact-bytes", type=int, help="Size of the files merged by the `compact` stage")
+    parser.add_argument("--supernode-threshold", type=int, help="Minimum degree of the nodes whose edges are loaded apart")
+    parser.add_argument("--load-workers", type=int, help="Number of labels or edge types loaded in parallel")
+    parser.add_argument("--resume", action="store_true", help="Resume from the checkpoints of the previous run")
+    parser.add_argument("--loader", choices=list(LOADERS.keys()), help="Loader to use, overrides the `type` of the config")
+    parser.add_argument("--snapshot-dir", help="Directory of the snapshot of the previous load, to only load the changes")
+    parser.add_argument("--report", default="./output/report.json", help="Path of the JSON report")
+    parser.add_argument("--prometheus", help="Path of the Prometheus textfile of the report")
+    args = parser.parse_args(argv)
+
+    config = read_config(args.config)
+    workers = config.get("workers", {})
+
+    modules = args.modules or config.get("modules", [])
+    stages = args.stages or config.get("stages", STAGES)
+    map_workers = args.map_workers or workers.get("map", 1)
+    load_workers = args.load_workers or workers.get("load", 1)
+    resume = args.resume or config.get("resume", False)
+    snapshot_dir = args.snapshot_dir or config.get("snapshot_dir")
+    dangling = args.dangling or config.get("dangling", "report")
+    compact_bytes = args.compact_bytes or config.get("compact_bytes", 64_000_000)
+    supernode_threshold = args.supernode_threshold or config.get("supernode_threshold", 10_000)
+
+    loader_config = dict(config.get("loader", {}))
+    if args.loader:
+        loader_config["type"] = args.loader
+
+    from . import utils
+    from .pipeline import _parse, _map_property, _validate_edges, _compact, _supernodes
+    from .run_report import RunReport
+
+    # A run that doesn't parse continues from the files of the previous run
+    if "parse" in stages and not resume:
+        utils.clear()
+
+    utils.init(
+        load_configs=resume or "parse" not in stages,
+        chunk_bytes=config.get("chunk_bytes"),
+        chunk_bytes_overrides=config.get("chunk_bytes_overrides"),
+        surrogate_ids=config.get("surrogate_ids")
+    )
+    
+    # Parsing functions share the chunk counters and the catalog of the store, they run one at a time
+    # (warned once `utils.init` has configured the log file)
+    if workers.get("parse", 1) > 1:
+        logging.warning("`workers.parse` is ignored, parsing functions run one at a time (use `map` and `load` workers)")
+    
+    if (resume or "parse" not in stages) and os.path.exists("./output/report.json"):
+        utils.INFOS_SINGLETON._report = RunReport.read("./output/report.json")
+    logging.info(f"graph-etl stages : {stages}")
+
+    discover_parsers(modules)
+
+    if "parse" in stages:
+        _parse(utils.INFOS_SINGLETON, use_mapper=False)
+
+    if "map" in stages:
+        _map_property(utils.INFOS_SINGLETON, workers=map_workers)
+
+    if "validate" in stages:
+        _validate_edges(utils.INFOS_SINGLETON, dangling=dangling)
+
+    if "compact" in stages:
+        _compact(utils.INFOS_SINGLETON, target_bytes=compact_bytes)
+
+    if "supernodes" in stages:
+        _supernodes(utils.INFOS_SINGLETON, threshold=supernode_threshold)
+
+    if "load" in stages:
+        utils.load(create_loader(loader_config), concurrency=load_workers, snapshot_dir=snapshot_dir)
+
+    if "report" in stages:
+        utils.report(args.report, prometheus_path=args.prometheus)
+
+
+if __name__ == "__main__":
+    main()
@@ -102,6 +102,8 @@ class Context:
         """
         if not self.store: return
         
+        if self.store._filters and self.store._filters.skip_save_node(self.metadatas, label): return
+        
         if hasattr(nodes, "__dataframe__"):
             nodes : pl.DataFrame = pl.from_dataframe(nodes)
         elif not isinstance(nodes, pl.DataFrame):
@@ -109,6 +111,12 @@ class Context:
         else:
             nodes : pl.DataFrame = nodes
             
+        if self.store._profiler:
+            self.store._profiler.record_frame("save_nodes", label, nodes)
+            
+        if self.store._filters:
+            nodes = self.store._filters.apply_nodes(label, nodes, primary_key or 'id')
+            
         cols_type = {k: str(v) for (k, v) in nodes.schema.items()}
         
         if self.store._callbacks:
@@ -118,13 +126,28 @@ class Context:
         if not primary_key:
             primary_key = 'id'
             
+        rows_in = nodes.shape[0]
         nodes = (
             nodes.with_columns(pl.col(pl.List(pl.Utf8)).list.join('|'))
                 .with_columns(pl.col(pl.Utf8).str.replace_all('(\r|\n|\\\\)', ''))
                 .unique(subset=[primary_key])
-                .drop_nulls(primary_key)
-                .with_row_count()
-                .with_columns(pl.col("row_nr")//200_000)
+        )
+        self.store.update_source_stats(rows_in, rows_in - nodes.shape[0])
+        
+        nodes = nodes.drop_nulls(primary_key)
+        
+        if self.store._surrogates:
+            # The key is replaced by its integer, the original key is kept as a property
+            nodes = nodes.with_columns([
+                pl.col(primary_key).alias(f"original_{primary_key}"),
+                self.store._surrogates.encode(label, primary_key, nodes.get_column(primary_key))
+            ])
+            cols_type = {**cols_type, f"original_{primary_key}": cols_type[primary_key], primary_key: "Int64"}
+            
+        chunk_rows = self.store.chunk_rows(label, nodes)
+        nodes = (
+            nodes.with_row_count()
+                .with_columns(pl.col("row_nr")//chunk_rows)
         )
         
         
@@ -151,7 +174,7 @@ class Context:
             chunk = nodes.filter(pl.col("row_nr")==i_chunk).drop("row_nr")
             chunk.write_csv(f"./output/nodes/{file_name}", separator=';')
             
-            self.store.update_nodes(label, file_name, default_infos, self.metadatas, chunk.shape[0])
+            self.store.update_nodes(label, file_name, default_infos, self.metadatas, chunk.shape[0], chunk_rows)
             self.last_node_chunk += 1
         
     def save_edges(
@@ -200,6 +223,8 @@ class Context:
         
         if not self.store: return
         
+        if self.store._filters and self.store._filters.skip_save_edge(self.metadatas, edge_type): return
+        
         if hasattr(edges, "__dataframe__"):
             edges : pl.DataFrame = pl.from_dataframe(edges)
         elif not isinstance(edges, pl.DataFrame):
@@ -207,6 +232,9 @@ class Context:
         else:
             edges : pl.DataFrame = edges
             
+        if self.store._profiler:
+            self.store._profiler.record_frame("save_edges", edge_type, edges)
+            
         start_label = start_id.split(":")[0]
         end_label = end_id.split(":")[0]
         
@@ -219,16 +247,31 @@ class Context:
                     **kwargs
                 )
                 
+        if self.store._filters:
+            edges = self.store._filters.apply_edges(edge_type, edges)
+            
         cols_type = {k: str(v) for (k, v) in edges.schema.items()}
         
+        rows_in = edges.shape[0]
         edges = (
             edges.with_columns(pl.col(pl.List(pl.Utf8)).list.join('|'))
                 .with_columns(pl.col(pl.Utf8).str.replace_all('(\r|\n|\\\\)', ''))
                 .unique(subset=['start', 'end'])
-                .drop_nulls('start')
+        )
+        self.store.update_source_stats(rows_in, rows_in - edges.shape[0])
+        
+        edges = (
+            edges.drop_nulls('start')
                 .drop_nulls('end')
-                .with_row_count()
-                .with_columns(pl.col("row_nr")//500_000)
+        )
+        
+        if self.store._sort_edges:
+            # Neighbouring rows share their `start` nodes, each batch of the load touches fewer nodes
+            edges = edges.sort(['start', 'end'])
+        chunk_rows = self.store.chunk_rows(edge_type, edges)
+        edges = (
+            edges.with_row_count()
+                .with_columns(pl.col("row_nr")//chunk_rows)
         )
 
         default_infos = {
@@ -246,5 +289,5 @@ class Context:
             chunk = edges.filter(pl.col("row_nr")==i_chunk).drop("row_nr")
             chunk.write_csv(f"./output/edges/{file_name}", separator=';')
             
-            self.store.update_edges(edge_type, file_name, default_infos, self.metadatas, chunk.shape[0])
+            self.store.update_edges(edge_type, file_name, default_infos, self.metadatas, chunk.shape[0], chunk_rows)
             self.last_edge_chunk += 1
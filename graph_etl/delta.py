@@ -0,0 +1,320 @@
+from __future__ import annotations
+from typing import List, Dict, Tuple, TYPE_CHECKING
+
+import os
+import json
+import shutil
+import logging
+
+import polars as pl
+from dotwiz import DotWiz
+
+if TYPE_CHECKING:
+    from .utils import StoreInfo
+    from .loader import Loader
+
+
+def _typed(values: pl.Series, prop_type: str) -> List:
+    """
+    Keys are compared as strings, they are sent to the database with the type they were saved with
+    """
+    if "Int" in prop_type:
+        return values.cast(pl.Int64, strict=False).to_list()
+    elif "Float" in prop_type:
+        return values.cast(pl.Float64, strict=False).to_list()
+    return values.to_list()
+
+
+def _hash_file(file_path: str, keys: List[str], metadatas: Dict) -> pl.DataFrame:
+    """
+    Read a chunk file as strings and hash each row, with the metadatas of the file,
+    independently of the order of its columns
+    """
+    df = pl.read_csv(file_path, separator=";", infer_schema_length=0)
+    columns = sorted(df.columns)
+
+    return df.with_columns(
+        pl.struct([pl.col(c) for c in columns] + [pl.lit(json.dumps(metadatas, sort_keys=True, default=str))])
+            .hash(seed=0)
+            .alias("_hash")
+    ).with_columns([pl.col(key).alias(f"_key_{key}") for key in keys])
+
+
+class Snapshot:
+
+    # Diff of the current run, kept until the load has finished so that a failed load can be retried
+    state_dir: str = "./output/delta"
+
+    def __init__(self, snapshot_dir: str = "./snapshots"):
+        """
+        Row hashes of the nodes and edges loaded by the previous run, used by ``etl.load(loader, snapshot_dir=...)``
+        to only load the nodes and edges that were inserted or updated since then and delete the ones that disappeared
+
+        Each label is stored in `{snapshot_dir}/nodes/{label}.parquet` with the key and the hash of each node,
+        each edge type in `{snapshot_dir}/edges/{edge_type}.parquet` with the `start`, the `end` and the hash of each edge.
+        The snapshot is only replaced once a load has finished.
+
+        The inserted and updated rows of each chunk file are written to a `DELTA_` file next to it, the parsed chunks
+        are left untouched. The diff is saved in `./output/delta` before anything is deleted, a load that failed
+        is retried against the same diff and the deletions are only applied once.
+
+        /!\\ Every source must be parsed again, a node or an edge missing from the new parse is deleted
+        """
+        self.snapshot_dir = snapshot_dir
+
+        self.stats: Dict[str, Dict[str, Dict[str, int]]] = {"nodes": {}, "edges": {}}
+
+        # Delta file and number of rows of each chunk file, by label and edge type
+        self._files: Dict[str, Dict[str, Dict[str, Dict]]] = {"nodes": {}, "edges": {}}
+        self._deleted: Dict[str, Dict[str, pl.DataFrame]] = {"nodes": {}, "edges": {}}
+        self._applied = False
+
+    def _previous(self, kind: str, name: str) -> pl.DataFrame:
+        path = f"{self.snapshot_dir}/{kind}/{name}.parquet"
+        if os.path.exists(path):
+            return pl.read_parquet(path)
+        return None
+
+    def _diff(
+        self, 
+        kind: str, 
+        name: str, 
+        files: Dict[str, Dict], 
+        keys: List[str], 
+        previous: pl.DataFrame, 
+        already_loaded: List[str],
+        reload: pl.DataFrame = None
+    ) -> Tuple[pl.DataFrame, int]:
+        """
+        Write the rows of each file that are not in `previous` (inserted or updated), or whose keys are in `reload`,
+        to its delta file and return the hashes of all the rows with the number of rows written.
+        The files already loaded by a previous attempt are only hashed
+        """
+        key_columns = [f"_key_{key}" for key in keys]
+
+        hashes, written = [], 0
+        for file_name, infos in files.items():
+            df = _hash_file(f"./output/{kind}/{file_name}", keys, infos["metadatas"])
+            hashes.append(df.select(key_columns + ["_hash"]))
+
+            if f"{file_name}\n" in already_loaded: continue
+
+            if previous is not None:
+                changed = df.join(previous, on=key_columns + ["_hash"], how="anti")
+                if reload is not None and reload.shape[0]:
+                    changed = pl.concat([changed, df.join(reload, on=key_columns, how="semi")]).unique(maintain_order=True)
+                df = changed
+
+            delta_name = f"DELTA_{file_name}"
+            df.drop(key_columns + ["_hash"]).write_csv(f"./output/{kind}/{delta_name}", separator=";")
+            self._files[kind].setdefault(name, {})[file_name] = {
+                "file": delta_name, 
+                "count": df.shape[0], 
+                "bytes": os.path.getsize(f"./output/{kind}/{delta_name}")
+            }
+            written += df.shape[0]
+
+        return (pl.concat(hashes) if hashes else pl.DataFrame()), written
+
+    def diff_nodes(self, label: str, infos: Dict, already_loaded: List[str] = []) -> pl.Series:
+        """
+        Write the new or updated nodes of `label` to the delta files and return the keys of the deleted nodes
+        """
+        primary_key = infos["primary_key"]
+        previous = self._previous("nodes", label)
+        current, written = self._diff("nodes", label, infos["files"], [primary_key], previous, already_loaded)
+        self._write_hashes("nodes", label, current)
+
+        key = f"_key_{primary_key}"
+        deleted = pl.Series(key, [], dtype=pl.Utf8) if previous is None else (
+            previous.join(current, on=key, how="anti").get_column(key)
+        )
+        self.stats["nodes"][label] = {"changed": written, "total": current.shape[0], "deleted": deleted.shape[0]}
+        return deleted
+
+    def diff_edges(self, edge_type: str, files: Dict[str, Dict], already_loaded: List[str] = []) -> pl.DataFrame:
+        """
+        Write the new or updated edges of `edge_type` to the delta files and return the (`start`, `end`) pairs to delete
+        with the (`start`, `end`) of their files. All the edges of a pair are deleted, those still parsed 
+        (updated or from another source) are written to the delta files to be created again
+        """
+        groups: Dict[Tuple[str, str], Dict] = {}
+        for file_name, infos in files.items():
+            groups.setdefault((infos["start"], infos["end"]), {})[file_name] = infos
+
+        hashes, deleted, changed = [], [], 0
+        previous_all = self._previous("edges", edge_type)
+
+        for (start, end), group in groups.items():
+            # Edges are compared with the previous edges of the same (`start`, `end`)
+            previous = None if previous_all is None else (
+                previous_all.filter((pl.col("_start_id") == start) & (pl.col("_end_id") == end)).drop(["_start_id", "_end_id"])
+            )
+            pairs = None
+            if previous is not None:
+                current = pl.concat([
+                    _hash_file(f"./output/edges/{file_name}", ["start", "end"], infos["metadatas"]).select(["_key_start", "_key_end", "_hash"])
+                    for file_name, infos in group.items()
+                ])
+                # The database deletes every edge between the nodes of a deleted or updated edge,
+                # the edges of these (`start`, `end`) that are still parsed are created again with the changed ones
+                pairs = (
+                    previous.join(current, on=["_key_start", "_key_end", "_hash"], how="anti")
+                        .select(["_key_start", "_key_end"])
+                        .unique(maintain_order=True)
+                )
+                deleted.append(pairs.with_columns([pl.lit(start).alias("_start_id"), pl.lit(end).alias("_end_id")]))
+
+            current, written = self._diff("edges", edge_type, group, ["start", "end"], previous, already_loaded, reload=pairs)
+            changed += written
+            hashes.append(current.with_columns([pl.lit(start).alias("_start_id"), pl.lit(end).alias("_end_id")]))
+
+        if previous_all is not None:
+            # Edges whose (`start`, `end`) isn't parsed anymore
+            parsed = pl.DataFrame(
+                [list(ends) for ends in groups.keys()], schema={"_start_id": pl.Utf8, "_end_id": pl.Utf8}, orient="row"
+            )
+            deleted.append(
+                previous_all.join(parsed, on=["_start_id", "_end_id"], how="anti")
+                    .select(["_key_start", "_key_end", "_start_id", "_end_id"])
+                    .unique(maintain_order=True)
+            )
+
+        deleted = pl.concat(deleted) if deleted else pl.DataFrame(schema={c: pl.Utf8 for c in ("_key_start", "_key_end", "_start_id", "_end_id")})
+
+        self._write_hashes("edges", edge_type, pl.concat(hashes) if hashes else pl.DataFrame())
+        self.stats["edges"][edge_type] = {
+            "changed": changed,
+            "total": sum(df.shape[0] for df in hashes),
+            "deleted": deleted.shape[0]
+        }
+        return deleted
+
+    def _write_hashes(self, kind: str, name: str, hashes: pl.DataFrame):
+        os.makedirs(f"{self.state_dir}/hashes/{kind}", exist_ok=True)
+        hashes.write_parquet(f"{self.state_dir}/hashes/{kind}/{name}.parquet")
+
+    def _write_state(self):
+        # Written last, a diff is only reused once all its files are written
+        with open(f"{self.state_dir}/state.json", "w") as f:
+            json.dump({"files": self._files, "stats": self.stats, "applied": self._applied}, f)
+
+    def _compute(self, store: StoreInfo):
+        """
+        Diff every label and edge type of the catalog against the previous snapshot and save it in `state_dir`
+        """
+        if os.path.isdir(self.state_dir):
+            shutil.rmtree(self.state_dir)
+        for kind in ("nodes", "edges"):
+            os.makedirs(f"{self.state_dir}/deleted/{kind}", exist_ok=True)
+
+        configs = store._configs
+
+        for edge_type, files in configs.edges.items():
+            deleted = self.diff_edges(edge_type, files, store._already_loaded)
+            deleted.write_parquet(f"{self.state_dir}/deleted/edges/{edge_type}.parquet")
+            self._deleted["edges"][edge_type] = deleted
+
+        for label, infos in configs.nodes.items():
+            deleted = self.diff_nodes(label, infos, store._already_loaded).to_frame("_key")
+            deleted.write_parquet(f"{self.state_dir}/deleted/nodes/{label}.parquet")
+            self._deleted["nodes"][label] = deleted
+
+        self._write_state()
+
+    def _restore(self):
+        """
+        Read the diff saved by a previous attempt of this load
+        """
+        with open(f"{self.state_dir}/state.json", "r") as f:
+            state = json.load(f)
+        self._files, self.stats, self._applied = state["files"], state["stats"], state["applied"]
+
+        for kind in ("nodes", "edges"):
+            for file_name in os.listdir(f"{self.state_dir}/deleted/{kind}"):
+                self._deleted[kind][file_name[:-len(".parquet")]] = pl.read_parquet(f"{self.state_dir}/deleted/{kind}/{file_name}")
+
+    def apply(self, store: StoreInfo, loader_obj: Loader) -> DotWiz:
+        """
+        Compute the delta of every label and edge type of the catalog against the previous snapshot, 
+        or reuse the one of a failed attempt, delete the removed nodes and edges 
+        and return the catalog to load, where each chunk file is replaced by its delta file
+        """
+        if os.path.exists(f"{self.state_dir}/state.json"):
+            logging.info("Reusing the delta of the previous attempt...")
+            self._restore()
+        else:
+            self._compute(store)
+
+        configs = store._configs
+
+        if not self._applied:
+            for edge_type, deleted in self._deleted["edges"].items():
+                for (start, end), pairs in deleted.group_by(["_start_id", "_end_id"]):
+                    properties_type = next(
+                        (infos.properties_type for infos in configs.edges.get(edge_type, {}).values() if (infos.start, infos.end) == (start, end)), {}
+                    )
+                    start_type, end_type = properties_type.get("start", "Utf8"), properties_type.get("end", "Utf8")
+
+                    logging.info(f"{edge_type:<30} deleting {pairs.shape[0]} edges...")
+                    loader_obj.delete_edges(
+                        edge_type, start, end,
+                        list(zip(_typed(pairs.get_column("_key_start"), start_type), _typed(pairs.get_column("_key_end"), end_type)))
+                    )
+
+            for label, deleted in self._deleted["nodes"].items():
+                if deleted.shape[0] == 0: continue
+
+                infos = configs.nodes[label]
+                logging.info(f"{label:<30} deleting {deleted.shape[0]} nodes...")
+                loader_obj.delete_nodes(
+                    label, infos.primary_key, _typed(deleted.get_column("_key"), infos.properties_type.get(infos.primary_key, "Utf8"))
+                )
+
+            # Updated edges are created again by the load, the deletions must not run a second time
+            self._applied = True
+            self._write_state()
+
+        # Labels and edge types of the previous snapshot that are not parsed anymore
+        for kind, names in (("nodes", configs.nodes), ("edges", configs.edges)):
+            if not os.path.isdir(f"{self.snapshot_dir}/{kind}"): continue
+            for file_name in os.listdir(f"{self.snapshot_dir}/{kind}"):
+                name = file_name[:-len(".parquet")]
+                if name in names: continue
+                logging.warning(f"{name:<30} is in the snapshot but wasn't parsed, it is kept in the database")
+
+        return self._delta_configs(configs)
+
+    def _delta_configs(self, configs: DotWiz) -> DotWiz:
+        delta = configs.to_dict()
+
+        for label, infos in delta["nodes"].items():
+            infos["files"] = {
+                files["file"]: {**infos["files"][file_name], "count": files["count"], "bytes": files["bytes"]}
+                for file_name, files in self._files["nodes"].get(label, {}).items()
+            }
+        for edge_type, edge_files in delta["edges"].items():
+            delta["edges"][edge_type] = {
+                files["file"]: {**edge_files[file_name], "count": files["count"], "bytes": files["bytes"]}
+                for file_name, files in self._files["edges"].get(edge_type, {}).items()
+            }
+
+        return DotWiz(delta)
+
+    def save(self):
+        """
+        Replace the snapshot by the hashes of the current run and remove the delta files, 
+        called once the load has finished
+        """
+        for kind in ("nodes", "edges"):
+            os.makedirs(f"{self.snapshot_dir}/{kind}", exist_ok=True)
+            if not os.path.isdir(f"{self.state_dir}/hashes/{kind}"): continue
+            for file_name in os.listdir(f"{self.state_dir}/hashes/{kind}"):
+                shutil.copyfile(f"{self.state_dir}/hashes/{kind}/{file_name}", f"{self.snapshot_dir}/{kind}/{file_name}")
+
+            for files in self._files[kind].values():
+                for infos in files.values():
+                    if os.path.exists(f"./output/{kind}/{infos['file']}"):
+                        os.remove(f"./output/{kind}/{infos['file']}")
+
+        shutil.rmtree(self.state_dir)
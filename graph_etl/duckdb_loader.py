@@ -0,0 +1,250 @@
+import logging
+
+from typing import List, Dict
+
+import polars as pl
+
+from .loader import Loader
+
+class DuckDBLoader(Loader):
+    
+    concurrent_loads = False
+
+    def __init__(
+        self,
+        database_path: str = "./output/graph.duckdb",
+        **kwargs
+    ):
+        """
+        Loader object for DuckDB, used as a staging database to validate and profile parsed nodes and edges with SQL
+
+        Each label is loaded in a table of the same name, each edge type in a table with a `start` and an `end` column,
+        the metadatas of the source are stored as columns of the rows.
+        Edges rows also store the `Concept`:`property` of their ends in `start_id` and `end_id` columns
+        and the `_edges_endpoints` table lists them for each edge type.
+
+        Parameters
+        ----------
+        database_path : str
+            Path of the DuckDB database file, use ``":memory:"`` for an in-memory database
+        **kwargs : optional
+            Everything in kwargs argument will be passed to ``duckdb.connect``
+
+        Examples
+        --------
+
+        >>> loader = DuckDBLoader("./staging.duckdb")
+        >>> etl.load(loader)
+        >>> loader.dangling_edges("HAS_CAR")
+        """
+        import duckdb
+
+        self.graph = duckdb.connect(database_path, **kwargs)
+
+        self.graph.execute("""CREATE TABLE IF NOT EXISTS _edges_endpoints (
+            edge_type VARCHAR,
+            "start" VARCHAR,
+            "end" VARCHAR,
+            UNIQUE (edge_type, "start", "end")
+        )""")
+
+    def type_mapping(prop):
+        if "Utf8" in prop or "String" in prop:
+            return pl.Utf8
+        elif "Float" in prop:
+            return pl.Float64
+        elif "Int" in prop:
+            return pl.Int64
+        elif "Datetime" in prop:
+            return pl.Datetime
+        elif "Date" in prop:
+            return pl.Date
+        elif "Boolean" in prop:
+            return pl.Boolean
+        return pl.Utf8
+
+    def _read(self, file_path: str, properties_type: Dict[str, str], metadatas: Dict) -> pl.DataFrame:
+        """
+        Read a chunk file as strings, cast each column to the type it had when it was saved
+        and add the metadatas of the file as columns
+        """
+        df = pl.read_csv(file_path, separator=";", infer_schema_length=0)
+
+        casts = []
+        for column in df.columns:
+            property = properties_type.get(column, "Utf8")
+            if property.startswith("List"):
+                casts.append(pl.col(column).str.split("|").cast(pl.List(DuckDBLoader.type_mapping(property[5:-1])), strict=False))
+            elif DuckDBLoader.type_mapping(property) in (pl.Date, pl.Datetime):
+                casts.append(pl.col(column).str.strptime(DuckDBLoader.type_mapping(property), strict=False))
+            else:
+                casts.append(pl.col(column).cast(DuckDBLoader.type_mapping(property), strict=False))
+
+        return df.with_columns(casts).with_columns(
+            [pl.lit(v).alias(k) for k, v in metadatas.items() if k not in df.columns]
+        )
+
+    def _insert(self, table: str, df: pl.DataFrame, anti_join_on: List[str] = None) -> int:
+        """
+        Insert the rows of `df` in `table` through Arrow, the table is created from the schema of `df`
+        if it doesn't exist and new columns are added to it.
+        Rows whose `anti_join_on` columns already exist in the table are not inserted.
+        """
+        self.graph.register("chunk", df.to_arrow())
+
+        self.graph.execute(f'CREATE TABLE IF NOT EXISTS "{table}" AS SELECT * FROM chunk LIMIT 0')
+
+        columns = set(self.graph.execute(f'DESCRIBE "{table}"').pl()["column_name"])
+        for column, dtype in self.graph.execute("DESCRIBE chunk").pl().select(["column_name", "column_type"]).iter_rows():
+            if column not in columns:
+                self.graph.execute(f'ALTER TABLE "{table}" ADD COLUMN "{column}" {dtype}')
+
+        if anti_join_on:
+            condition = " AND ".join(f'chunk."{k}" = t."{k}"' for k in anti_join_on)
+            query = f'INSERT INTO "{table}" BY NAME SELECT chunk.* FROM chunk ANTI JOIN "{table}" t ON {condition}'
+        else:
+            query = f'INSERT INTO "{table}" BY NAME SELECT * FROM chunk'
+
+        inserted = self.graph.execute(query).fetchone()[0]
+        self.graph.unregister("chunk")
+
+        return inserted
+
+    def load_nodes(
+        self,
+        file_path: str,
+        label: str,
+        primary_key: str,
+        metadatas: Dict,
+        properties_type: Dict[str, str],
+        constraints: List[str],
+        indexs: List[str]
+    ) -> int:
+        """
+        Loading nodes and metadata in DuckDB\n
+        /!\\ Warning, you shouldn't use this function on your own\n
+        /!\\ The ETL Tool will do it for you
+
+        Parameters
+        ----------
+        file_path : str
+            Path of the file containing all nodes data
+        label : str
+            A string with the label of the node to load, used as table name
+        primary_key : str
+            Nodes whose primary key is already in the table are not inserted
+        metadatas: Dict
+            Metadatas on nodes, stored as columns
+        properties_type: Dict[str, str]
+            A dict object that maps each property name to their data type
+        constraints: List[str]
+            A sequence of property to put an index on
+        indexs: List[str]
+            A sequence of property to put an index on
+        """
+        flat_metadatas = {**metadatas["metadatas"], 'count': metadatas["count"]}
+
+        df = self._read(f"./output/nodes/{file_path}", properties_type, flat_metadatas).drop_nulls(primary_key)
+
+        nodes_created = self._insert(label, df, anti_join_on=[primary_key])
+
+        for index in set(constraints + indexs):
+            self.graph.execute(f'CREATE INDEX IF NOT EXISTS "{index}_{label}" ON "{label}" ("{index}")')
+
+        return nodes_created
+
+    def load_edges(
+        self,
+        file_path: str,
+        edge_type: str,
+        start: str,
+        end: str,
+        metadatas: Dict,
+        properties_type: Dict[str, str]
+    ) -> int:
+        """
+        Loading edges and metadata in DuckDB\n
+        /!\\ Warning, you shouldn't use this function on your own\n
+        /!\\ The ETL Tool will do it for you
+
+        Parameters
+        ----------
+        file_path : str
+            Path of the files containing all edges data
+        edge_type : str
+            A string with the type of the edge to load, used as table name
+        start : str
+            A string of the form `Concept`:`property` to start the relationship
+        end : str
+            A string of the form `Concept`:`property` to end the relationship
+        metadatas: Dict
+            Metadatas on edges, stored as columns
+        properties_type: Dict[str, str]
+            A dict object that maps each property name to their data type
+        """
+        df = (
+            self._read(f"./output/edges/{file_path}", properties_type, metadatas.get("metadatas", {}))
+                .drop_nulls(["start", "end"])
+                .with_columns([pl.lit(start).alias("start_id"), pl.lit(end).alias("end_id")])
+        )
+
+        relationships_created = self._insert(edge_type, df)
+
+        self.graph.execute(
+            "INSERT INTO _edges_endpoints VALUES (?, ?, ?) ON CONFLICT DO NOTHING",
+            [edge_type, start, end]
+        )
+        self.graph.execute(f'CREATE INDEX IF NOT EXISTS "start_{edge_type}" ON "{edge_type}" ("start")')
+        self.graph.execute(f'CREATE INDEX IF NOT EXISTS "end_{edge_type}" ON "{edge_type}" ("end")')
+
+        return relationships_created
+
+    def query(self, query: str, parameters: List = None) -> pl.DataFrame:
+        """
+        Run a SQL query on the staging database and return the result as a polars DataFrame
+        """
+        return self.graph.execute(query, parameters).pl()
+
+    def degrees(self, edge_type: str, direction: str = "start") -> pl.DataFrame:
+        """
+        Degree of each node at the `direction` (`start` or `end`) of the edges of `edge_type`, highest first
+        """
+        if direction not in ("start", "end"):
+            raise ValueError("`direction` must be either 'start' or 'end'")
+
+        return self.query(
+            f'SELECT "{direction}" AS id, count(*) AS degree FROM "{edge_type}" GROUP BY "{direction}" ORDER BY degree DESC'
+        )
+
+    def dangling_edges(self, edge_type: str) -> pl.DataFrame:
+        """
+        Edges of `edge_type` whose start or end node isn't in the database,
+        with a `missing` column equal to `start`, `end` or `both`
+        """
+        endpoints = self.query("SELECT * FROM _edges_endpoints WHERE edge_type = ?", [edge_type])
+        tables = set(self.query("SELECT table_name FROM information_schema.tables")["table_name"])
+
+        dangling = []
+        for _, start, end in endpoints.iter_rows():
+            conditions = []
+            for prop, endpoint in (("start", start), ("end", end)):
+                label, id_ = endpoint.split(":")
+                if label in tables:
+                    conditions.append(f'e."{prop}" NOT IN (SELECT "{id_}" FROM "{label}" WHERE "{id_}" IS NOT NULL)')
+                else:
+                    conditions.append("true")
+
+            dangling.append(self.query(f"""
+                SELECT e.*,
+                    CASE WHEN ({conditions[0]}) AND ({conditions[1]}) THEN 'both'
+                        WHEN ({conditions[0]}) THEN 'start'
+                        ELSE 'end' END AS missing
+                FROM "{edge_type}" e
+                WHERE e.start_id = ? AND e.end_id = ? AND (({conditions[0]}) OR ({conditions[1]}))
+            """, [start, end]))
+
+        if not dangling:
+            logging.warning(f"No edge of type {edge_type} loaded")
+            return pl.DataFrame()
+
+        return pl.concat(dangling, how="diagonal")
@@ -1,10 +1,24 @@
 
-from typing import Any, List, Dict
+from typing import Any, List, Dict, Callable
+from functools import reduce
+
+import polars as pl
 
 class Filter:
+    # The metadatas filtered on are the attributes of `__dict__` (with `nodes` and `edges`), 
+    # the state of the filter is kept apart in slots
+    __slots__ = ("_only_nodes", "_only_edges", "_decisions", "_predicates", "_dropped_properties", "__dict__")
+    
     def __init__(self):
         self.nodes = []
         self.edges = []
+        
+        self._only_nodes: List[str] = None
+        self._only_edges: List[str] = None
+        self._decisions: Dict[tuple, bool] = {}
+        
+        self._predicates: Dict[str, Dict[str, List[pl.Expr]]] = {"nodes": {}, "edges": {}}
+        self._dropped_properties: Dict[str, Dict[str, List[str]]] = {"nodes": {}, "edges": {}}
     
     def __getitem__(self, key: str):
         return getattr(self, key)
@@ -16,43 +30,158 @@ class Filter:
         if not isinstance(key, str): 
             raise TypeError
         setattr(self, key, [val])
+        self._decisions.clear()
         return self
     
     def add_metadatas(self, key: str, vals: List[str]):
         if not isinstance(key, list): 
             raise TypeError
         setattr(self, key, vals)
+        self._decisions.clear()
         return self
         
     def add_node(self, node: str):
         if not isinstance(node, str): 
             raise TypeError
         self.nodes.append(node)
+        self._decisions.clear()
         return self
     
     def add_nodes(self, nodes: List[str]):
         if not isinstance(nodes, list): 
             raise TypeError
         self.nodes += nodes
+        self._decisions.clear()
         return self
 
     def add_edge(self, edge: str):
         if not isinstance(edge, str): 
             raise TypeError
         self.edges.append(edge)
+        self._decisions.clear()
         return self
     
     def add_edges(self, edges: List[str]):
         if not isinstance(edges, list): 
             raise TypeError
         self.edges += edges
+        self._decisions.clear()
+        return self
+
+    def only_nodes(self, nodes: List[str]):
+        """
+        Only nodes with one of these labels are saved and loaded, 
+        saving any other label returns immediately
+        """
+        if not isinstance(nodes, list): 
+            raise TypeError
+        self._only_nodes = nodes
+        self._decisions.clear()
+        return self
+    
+    def only_edges(self, edges: List[str]):
+        """
+        Only edges with one of these types are saved and loaded, 
+        saving any other edge type returns immediately
+        """
+        if not isinstance(edges, list): 
+            raise TypeError
+        self._only_edges = edges
+        self._decisions.clear()
+        return self
+
+    def filter_nodes(self, node: str, predicate: pl.Expr):
+        """
+        Only nodes of label `node` matching the polars expression `predicate` are saved,
+        e.g. ``Filter().filter_nodes("Molecule", pl.col("phase") >= 3)``
+        """
+        if not isinstance(predicate, pl.Expr): 
+            raise TypeError
+        self._predicates["nodes"].setdefault(node, []).append(predicate)
         return self
+    
+    def filter_edges(self, edge: str, predicate: pl.Expr):
+        """
+        Only edges of type `edge` matching the polars expression `predicate` are saved
+        """
+        if not isinstance(predicate, pl.Expr): 
+            raise TypeError
+        self._predicates["edges"].setdefault(edge, []).append(predicate)
+        return self
+    
+    def drop_node_properties(self, node: str, properties: List[str]):
+        """
+        These properties of nodes of label `node` are neither saved nor loaded, the primary key is always kept
+        """
+        if not isinstance(properties, list): 
+            raise TypeError
+        self._dropped_properties["nodes"].setdefault(node, []).extend(properties)
+        return self
+    
+    def drop_edge_properties(self, edge: str, properties: List[str]):
+        """
+        These properties of edges of type `edge` are neither saved nor loaded, `start` and `end` are always kept
+        """
+        if not isinstance(properties, list): 
+            raise TypeError
+        self._dropped_properties["edges"].setdefault(edge, []).extend(properties)
+        return self
+    
+    def _apply(self, kind: str, name: str, df: pl.DataFrame, keep: List[str]) -> pl.DataFrame:
+        predicates = self._predicates[kind].get(name)
+        if predicates:
+            df = df.filter(reduce(lambda a, b: a & b, predicates))
+            
+        dropped = [
+            prop for prop in self._dropped_properties[kind].get(name, []) 
+            if prop in df.columns and prop not in keep
+        ]
+        if dropped:
+            df = df.drop(dropped)
+            
+        return df
+    
+    def apply_nodes(self, node: str, df: pl.DataFrame, primary_key: str) -> pl.DataFrame:
+        """
+        Rows and properties of the nodes of label `node` that should be saved, used by ``Context.save_nodes``
+        """
+        return self._apply("nodes", node, df, [primary_key])
+    
+    def apply_edges(self, edge: str, df: pl.DataFrame) -> pl.DataFrame:
+        """
+        Rows and properties of the edges of type `edge` that should be saved, used by ``Context.save_edges``
+        """
+        return self._apply("edges", edge, df, ["start", "end"])
 
     def skip_parse(self, metadatas: Dict):
         return all(k not in self or v not in self[k] for (k, v) in metadatas.items()) and len(set(self.__dict__.keys()).intersection(metadatas.keys()))
 
     def skip_load_node(self, metadatas: Dict, node: str):
+        if self._only_nodes is not None and node not in self._only_nodes:
+            return True
         return (node not in self.nodes) and self.skip_parse(metadatas)
     
     def skip_load_edge(self, metadatas: Dict, edge: str):
-        return (edge not in self.edges) and self.skip_parse(metadatas)
\ No newline at end of file
+        if self._only_edges is not None and edge not in self._only_edges:
+            return True
+        return (edge not in self.edges) and self.skip_parse(metadatas)
+    
+    def _decision(self, kind: str, name: str, metadatas: Dict, skip: Callable[[Dict, str], bool]) -> bool:
+        key = (kind, name, tuple(sorted((k, str(v)) for (k, v) in metadatas.items())))
+        if key not in self._decisions:
+            self._decisions[key] = bool(skip(metadatas, name))
+        return self._decisions[key]
+    
+    def skip_save_node(self, metadatas: Dict, node: str):
+        """
+        Same decision as ``skip_load_node``, computed once per label and set of metadatas,
+        used by ``Context.save_nodes`` to not write nodes that won't be loaded
+        """
+        return self._decision("nodes", node, metadatas, self.skip_load_node)
+    
+    def skip_save_edge(self, metadatas: Dict, edge: str):
+        """
+        Same decision as ``skip_load_edge``, computed once per edge type and set of metadatas,
+        used by ``Context.save_edges`` to not write edges that won't be loaded
+        """
+        return self._decision("edges", edge, metadatas, self.skip_load_edge)
\ No newline at end of file
@@ -0,0 +1,285 @@
+import os
+import json
+import logging
+
+from typing import List, Dict, Tuple
+
+import polars as pl
+
+from .loader import Loader
+
+class KuzuLoader(Loader):
+    
+    concurrent_loads = False
+
+    def type_mapping(prop):
+        if "Utf8" in prop or "String" in prop:
+            return "STRING"
+        elif "Float" in prop:
+            return "DOUBLE"
+        elif "Int" in prop:
+            return "INT64"
+        elif "Datetime" in prop:
+            return "TIMESTAMP"
+        elif "Date" in prop:
+            return "DATE"
+        elif "Boolean" in prop:
+            return "BOOLEAN"
+        return "STRING"
+
+    def csv_mapping(prop):
+        if prop.startswith("List"):
+            return f"{KuzuLoader.type_mapping(prop[5:-1])}[]"
+        else:
+            return f"{KuzuLoader.type_mapping(prop)}"
+
+    def polars_mapping(kuzu_type):
+        if kuzu_type.endswith("[]"):
+            return pl.List(KuzuLoader.polars_mapping(kuzu_type[:-2]))
+        return {
+            "STRING": pl.Utf8,
+            "DOUBLE": pl.Float64,
+            "INT64": pl.Int64,
+            "TIMESTAMP": pl.Datetime,
+            "DATE": pl.Date,
+            "BOOLEAN": pl.Boolean
+        }.get(kuzu_type, pl.Utf8)
+
+    def __init__(
+        self,
+        database_path: str = "./output/graph.kuzu",
+        **kwargs
+    ):
+        """
+        Loader object for Kùzu, an embedded graph database that doesn't need any server
+
+        Parameters
+        ----------
+        database_path : str
+            Path of the Kùzu database, created if it doesn't exist
+        **kwargs : optional
+            Everything in kwargs argument will be passed to create a ``kuzu.Database``
+
+        Examples
+        --------
+
+        >>> loader = KuzuLoader("./graph.kuzu")
+        >>> etl.load(loader)
+        >>> loader.graph.execute("MATCH (n:Person) RETURN count(n)").get_as_pl()
+        """
+        import kuzu
+
+        self.database = kuzu.Database(database_path, **kwargs)
+        self.graph = kuzu.Connection(self.database)
+
+        self._staging_path = os.path.abspath("./output/kuzu")
+        os.makedirs(self._staging_path, exist_ok=True)
+
+        self._tables: Dict[str, Dict[str, str]] = {}
+        self._primary_keys: Dict[str, str] = {}
+        self._endpoints: Dict[str, List[Tuple[str, str]]] = {}
+        # Rows sent, created and rejected by ``COPY`` for each file, added to the run report
+        self.files_stats: Dict[str, Dict[str, int]] = {}
+
+        for table in self.graph.execute("CALL show_tables() RETURN name, type").get_as_pl().iter_rows():
+            name, table_type = table
+            table_info = self.graph.execute(f"CALL table_info('{name}') RETURN *").get_as_pl()
+            self._tables[name] = dict(zip(table_info["name"], table_info["type"]))
+
+            if table_type == "NODE":
+                self._primary_keys[name] = table_info.filter(pl.col("primary key"))["name"][0]
+            else:
+                self._endpoints[name] = [
+                    (connection["source table name"], connection["destination table name"])
+                    for connection in self.graph.execute(f"CALL show_connection('{name}') RETURN *").get_as_pl().iter_rows(named=True)
+                ]
+
+    def _count(self, pattern: str) -> int:
+        return self.graph.execute(f"MATCH {pattern} RETURN count(*)").get_as_pl()[0, 0]
+
+    def _add_columns(self, table: str, columns: Dict[str, str]):
+        for column, kuzu_type in columns.items():
+            if column not in self._tables[table]:
+                self.graph.execute(f"ALTER TABLE {table} ADD IF NOT EXISTS {column} {kuzu_type}")
+                self._tables[table][column] = kuzu_type
+
+    def _read(self, file_path: str, columns: Dict[str, str], metadatas: Dict) -> pl.DataFrame:
+        """
+        Read a chunk file as strings, cast each column to the type of the table
+        and add the metadatas of the file as a JSON column
+        """
+        df = pl.read_csv(file_path, separator=";", infer_schema_length=0)
+
+        casts = []
+        for column, kuzu_type in columns.items():
+            if column == "metadatas":
+                casts.append(pl.lit(json.dumps(metadatas, default=str)).alias(column))
+            elif column not in df.columns:
+                casts.append(pl.lit(None).cast(KuzuLoader.polars_mapping(kuzu_type)).alias(column))
+            elif kuzu_type.endswith("[]"):
+                casts.append(pl.col(column).str.split("|").cast(KuzuLoader.polars_mapping(kuzu_type), strict=False))
+            elif kuzu_type in ("DATE", "TIMESTAMP"):
+                casts.append(pl.col(column).str.strptime(KuzuLoader.polars_mapping(kuzu_type), strict=False))
+            else:
+                casts.append(pl.col(column).cast(KuzuLoader.polars_mapping(kuzu_type), strict=False))
+
+        return df.select(casts)
+
+    def _copy(self, table: str, df: pl.DataFrame, file_name: str, pattern: str, options: str = "") -> int:
+        """
+        ``COPY`` `df` in `table` and return the number of created rows (matching `pattern`),
+        the rows skipped by ``IGNORE_ERRORS`` (duplicated keys, missing nodes...) are counted and logged
+        """
+        # `./output` may have been cleared since the loader was created
+        os.makedirs(self._staging_path, exist_ok=True)
+        staging_file = os.path.join(self._staging_path, f"{file_name.split('.')[0]}.parquet").replace('\\', '/')
+        df.write_parquet(staging_file)
+
+        n_before = self._count(pattern)
+        self.graph.execute(f"COPY {table} FROM '{staging_file}' (IGNORE_ERRORS=true{options})")
+        os.remove(staging_file)
+        created = self._count(pattern) - n_before
+
+        rejected = df.shape[0] - created
+        if rejected:
+            logging.warning(f"{file_name:<30} {rejected} rows rejected by Kùzu out of {df.shape[0]}")
+        self.files_stats[file_name] = {"rows": df.shape[0], "created": created, "rejected": rejected}
+
+        return created
+
+    def load_nodes(
+        self,
+        file_path: str,
+        label: str,
+        primary_key: str,
+        metadatas: Dict,
+        properties_type: Dict[str, str],
+        constraints: List[str],
+        indexs: List[str]
+    ) -> int:
+        """
+        Loading nodes and metadata in Kùzu\n
+        /!\\ Warning, you shouldn't use this function on your own\n
+        /!\\ The ETL Tool will do it for you
+
+        Parameters
+        ----------
+        file_path : str
+            Path of the file containing all nodes data
+        label : str
+            A string with the label of the node to load, a node table is created for each label
+        primary_key : str
+            The property used as primary key of the node table
+        metadatas: Dict
+            Metadatas on nodes, stored as a JSON string in the `metadatas` property
+        properties_type: Dict[str, str]
+            A dict object that maps each property name to their data type
+        constraints: List[str]
+            Not used, Kùzu only supports the primary key constraint
+        indexs: List[str]
+            Not used, Kùzu only indexes the primary key
+        """
+        columns = {k: KuzuLoader.csv_mapping(property) for k, property in properties_type.items()}
+
+        if label not in self._tables:
+            columns_str = ", ".join(f"{k} {kuzu_type}" for k, kuzu_type in columns.items())
+            self.graph.execute(
+                f"CREATE NODE TABLE IF NOT EXISTS {label}({columns_str}, metadatas STRING, PRIMARY KEY({primary_key}))"
+            )
+            self._tables[label] = {**columns, "metadatas": "STRING"}
+            self._primary_keys[label] = primary_key
+        else:
+            self._add_columns(label, columns)
+
+        flat_metadatas = {**metadatas["metadatas"], 'count': metadatas["count"]}
+        df = self._read(f"./output/nodes/{file_path}", self._tables[label], flat_metadatas).drop_nulls(self._primary_keys[label])
+
+        return self._copy(label, df, file_path, f"(n:{label})")
+
+    def _resolve(self, df: pl.DataFrame, prop: str, endpoint: str) -> pl.DataFrame:
+        """
+        Replace the values of the `prop` column (`start` or `end`) by the primary key of the nodes they refer to,
+        joining with the node table when the edge refers to a property which isn't the primary key
+        """
+        label, id_ = endpoint.split(":")
+        primary_key = self._primary_keys[label]
+        pk_dtype = KuzuLoader.polars_mapping(self._tables[label][primary_key])
+
+        if id_ == primary_key:
+            return df.with_columns(pl.col(prop).cast(pk_dtype, strict=False))
+        
+        if id_ not in self._tables[label]:
+            logging.warning(f"{endpoint} is not a property of the {label} node table, edges can't be resolved")
+            return df.clear()
+
+        id_dtype = KuzuLoader.polars_mapping(self._tables[label][id_])
+        mapping = self.graph.execute(
+            f"MATCH (n:{label}) WHERE n.{id_} IS NOT NULL RETURN n.{id_} AS old_value, n.{primary_key} AS new_value"
+        ).get_as_pl()
+
+        return (
+            df.with_columns(pl.col(prop).cast(id_dtype, strict=False))
+                .join(mapping, left_on=prop, right_on="old_value", how="inner")
+                .with_columns(pl.col("new_value").alias(prop))
+                .drop("new_value")
+        )
+
+    def load_edges(
+        self,
+        file_path: str,
+        edge_type: str,
+        start: str,
+        end: str,
+        metadatas: Dict,
+        properties_type: Dict[str, str]
+    ) -> int:
+        """
+        Loading edges and metadata in Kùzu\n
+        /!\\ Warning, you shouldn't use this function on your own\n
+        /!\\ The ETL Tool will do it for you
+
+        Parameters
+        ----------
+        file_path : str
+            Path of the files containing all edges data
+        edge_type : str
+            A string with the type of the edge to load, a rel table is created for each edge type
+        start : str
+            A string of the form `Concept`:`property` to start the relationship
+        end : str
+            A string of the form `Concept`:`property` to end the relationship
+        metadatas: Dict
+            Metadatas on edges, stored as a JSON string in the `metadatas` property
+        properties_type: Dict[str, str]
+            A dict object that maps each property name to their data type
+        """
+        start_label, end_label = start.split(":")[0], end.split(":")[0]
+
+        if start_label not in self._primary_keys or end_label not in self._primary_keys:
+            logging.warning(f"{file_path:<30} skipped, nodes {start_label} or {end_label} are not loaded")
+            return 0
+
+        columns = {k: KuzuLoader.csv_mapping(property) for k, property in properties_type.items() if k not in ("start", "end")}
+
+        if edge_type not in self._tables:
+            columns_str = "".join(f", {k} {kuzu_type}" for k, kuzu_type in columns.items())
+            self.graph.execute(
+                f"CREATE REL TABLE IF NOT EXISTS {edge_type}(FROM {start_label} TO {end_label}{columns_str}, metadatas STRING)"
+            )
+            self._tables[edge_type] = {**columns, "metadatas": "STRING"}
+            self._endpoints[edge_type] = [(start_label, end_label)]
+        else:
+            self._add_columns(edge_type, columns)
+            if (start_label, end_label) not in self._endpoints[edge_type]:
+                self.graph.execute(f"ALTER TABLE {edge_type} ADD IF NOT EXISTS FROM {start_label} TO {end_label}")
+                self._endpoints[edge_type].append((start_label, end_label))
+
+        df = self._read(
+            f"./output/edges/{file_path}",
+            {"start": "STRING", "end": "STRING", **self._tables[edge_type]},
+            metadatas.get("metadatas", {})
+        )
+        df = self._resolve(df, "start", start)
+        df = self._resolve(df, "end", end).drop_nulls(["start", "end"])
+
+        return self._copy(edge_type, df, file_path, f"()-[r:{edge_type}]->()", f", from='{start_label}', to='{end_label}'")
@@ -1,9 +1,23 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict
+from typing import List, Dict, Tuple, Callable
+
+import os
+import threading
 
 
 class Loader(ABC):
     
+    # If ``etl.load`` can call the loader from several threads (``concurrency`` > 1)
+    concurrent_loads: bool = True
+    # If ``etl.run`` can load files while the sources are parsed, before the whole catalog is known
+    streaming_loads: bool = True
+    # If the loader implements ``delete_nodes`` and ``delete_edges``, needed by ``etl.load(snapshot_dir=...)``
+    delta_loads: bool = False
+    # Row offset of each partially loaded file, appended after every committed batch
+    offsets_path: str = "./output/log_loader_offsets.txt"
+    
+    _offsets_lock = threading.Lock()
+    
     @abstractmethod
     def __init__(
         self,
@@ -11,6 +25,42 @@ class Loader(ABC):
     ) -> None: 
         pass
     
+    def prepare(
+        self,
+        configs: Dict
+    ) -> None:
+        """
+        Called once by ``etl.load`` with the whole catalog (``configs.json``) before any file is loaded,
+        a backend can override it to create its schema or its loading jobs in a single round-trip
+        """
+        pass
+    
+    def _committed_offset(self, file_name: str) -> int:
+        """
+        Number of rows of `file_name` committed by a previous (interrupted) load, 0 if none
+        """
+        with Loader._offsets_lock:
+            if getattr(self, "_offsets", None) is None:
+                self._offsets: Dict[str, int] = {}
+                if os.path.exists(self.offsets_path):
+                    with open(self.offsets_path, "r") as f:
+                        for line in f.read().splitlines():
+                            if not line: continue
+                            name, offset = line.rsplit(";", 1)
+                            self._offsets[name] = int(offset)
+            
+            return self._offsets.get(file_name, 0)
+    
+    def _commit_offset(self, file_name: str, offset: int):
+        """
+        Record that the first `offset` rows of `file_name` are committed in the database
+        """
+        self._committed_offset(file_name)
+        with Loader._offsets_lock:
+            self._offsets[file_name] = offset
+            with open(self.offsets_path, "a+") as f:
+                f.write(f"{file_name};{offset}\n")
+    
     @abstractmethod
     def load_nodes(
         self,
@@ -35,4 +85,91 @@ class Loader(ABC):
         properties_type: Dict[str, str]
     ) -> int:
         pass
-
+    
+    def load_node_group(
+        self,
+        label: str,
+        primary_key: str,
+        files: Dict[str, Dict],
+        properties_type: Dict[str, str],
+        constraints: List[str],
+        indexs: List[str],
+        on_loaded: Callable[..., None] = None
+    ) -> Dict[str, int]:
+        """
+        Load every file of a label, `files` maps each file name to its metadatas, 
+        its number of rows (`count`) and its size in bytes (`size`).
+        `on_loaded` is called with the file name and the number of nodes created once a file is loaded
+        (and its loading time in seconds when several files are loaded together).
+        
+        By default each file is loaded with ``load_nodes``, a backend can override it 
+        to load all the files in a single job or transaction.
+        """
+        nodes_created = {}
+        for file_path, metadatas in files.items():
+            nodes_created[file_path] = self.load_nodes(
+                file_path=file_path,
+                label=label,
+                primary_key=primary_key,
+                metadatas=metadatas,
+                properties_type=properties_type,
+                constraints=constraints,
+                indexs=indexs
+            )
+            if on_loaded: on_loaded(file_path, nodes_created[file_path])
+        return nodes_created
+    
+    def load_edge_group(
+        self,
+        edge_type: str,
+        start: str,
+        end: str,
+        files: Dict[str, Dict],
+        on_loaded: Callable[..., None] = None
+    ) -> Dict[str, int]:
+        """
+        Load every file of an edge type between the same `start` and `end`, `files` maps each file name 
+        to its metadatas, its `properties_type`, its number of rows (`count`) and its size in bytes (`size`).
+        `on_loaded` is called with the file name and the number of edges created once a file is loaded
+        (and its loading time in seconds when several files are loaded together).
+        
+        By default each file is loaded with ``load_edges``, a backend can override it 
+        to load all the files in a single job or transaction.
+        """
+        relationships_created = {}
+        for file_path, metadatas in files.items():
+            relationships_created[file_path] = self.load_edges(
+                file_path=file_path,
+                edge_type=edge_type,
+                start=start,
+                end=end,
+                metadatas=metadatas,
+                properties_type=metadatas["properties_type"]
+            )
+            if on_loaded: on_loaded(file_path, relationships_created[file_path])
+        return relationships_created
+    
+    def delete_nodes(
+        self,
+        label: str,
+        primary_key: str,
+        keys: List
+    ) -> int:
+        """
+        Delete the nodes of `label` whose primary key is in `keys` with their edges,
+        used by ``etl.load`` in delta mode for the nodes missing from the new parse
+        """
+        raise NotImplementedError(f"{type(self).__name__} doesn't support deleting nodes")
+    
+    def delete_edges(
+        self,
+        edge_type: str,
+        start: str,
+        end: str,
+        pairs: List[Tuple]
+    ) -> int:
+        """
+        Delete the edges of `edge_type` between the nodes of each (`start` value, `end` value) of `pairs`,
+        used by ``etl.load`` in delta mode for the edges missing from the new parse or updated
+        """
+        raise NotImplementedError(f"{type(self).__name__} doesn't support deleting edges")
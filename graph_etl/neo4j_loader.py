@@ -1,16 +1,21 @@
 import os
 import csv
+import time
 import logging
 
-from typing import List, Dict, Union, Literal
+from typing import List, Dict, Tuple, Union, Literal, Callable, Set, Any
 
 import yaml
+import polars as pl
 from neo4j import GraphDatabase
+from neo4j.exceptions import TransientError, ServiceUnavailable, SessionExpired
 
 from .loader import Loader
 
 class Neo4JLoader(Loader):
 
+    delta_loads = True
+
     def type_mapping(prop):
         if "Utf8" in prop:
             return "string"
@@ -28,14 +33,34 @@ class Neo4JLoader(Loader):
 
     def csv_mapping(prop):
         if prop.startswith("List"):
-            return f"type: '{Neo4JLoader.type_mapping(prop[5:-1])}', array: true"
+            return {"type": Neo4JLoader.type_mapping(prop[5:-1]), "array": True}
         else:
-            return f"type: '{Neo4JLoader.type_mapping(prop)}', nullValues:[''] "
+            return {"type": Neo4JLoader.type_mapping(prop), "nullValues": [""]}
+    
+    def loader_options(properties_type):
+        return {
+            "sep": ";",
+            "arraySep": "|",
+            "escapeChar": "NONE",
+            "mapping": {k: Neo4JLoader.csv_mapping(property) for k, property in properties_type.items()}
+        }
     
     def __init__(
         self,
         node_finding_strategy: Union[Literal["match"], Literal["create"]] = "match",
         metadata_strategy: Union[Literal["as_property"], Literal["as_edge"]] = "as_property",
+        edge_strategy: Union[Literal["create"], Literal["merge"]] = "create",
+        relationship_keys: Dict[str, List[str]] = None,
+        prefilter_existing_edges: bool = True,
+        nodes_batch_size: int = 50_000,
+        edges_batch_size: int = 20_000,
+        supernodes_batch_size: int = 1_000,
+        target_batch_time: float = 5.0,
+        min_batch_size: int = 500,
+        max_batch_size: int = 500_000,
+        max_retries: int = 5,
+        retry_delay: float = 1.0,
+        driver: Any = None,
         **kwargs
     ):
         """
@@ -46,6 +71,37 @@ class Neo4JLoader(Loader):
         node_finding_strategy : one of ``"match"`` or ``"create"``
             - if `"match"`: create edges only if nodes of both ends are found in the graph
             - if `"create"`: create edges and create nodes if nodes are not found in the graph
+        edge_strategy : one of ``"create"`` or ``"merge"``
+            - if `"create"`: each row creates an edge, loading a file twice duplicates its edges
+            - if `"merge"`: edges are upserted on their key, the pair of nodes and the properties of `relationship_keys`,
+            loading or resuming twice doesn't duplicate them
+        relationship_keys : Dict[str, List[str]]
+            For each edge type, the properties identifying an edge between two nodes with `edge_strategy="merge"`,
+            backed by a relationship property index. By default an edge type has at most one edge between two nodes
+        prefilter_existing_edges : bool
+            With `edge_strategy="merge"`, the keys of the existing edges are exported once per edge type
+            and the rows whose key already exists are removed before sending the file to the database,
+            their properties are then not updated
+        nodes_batch_size : int
+            Initial number of rows committed per transaction when loading nodes
+        edges_batch_size : int
+            Initial number of rows committed per transaction when loading edges
+        supernodes_batch_size : int
+            Maximum number of rows committed per transaction when loading the edges of supernodes (see ``etl.supernodes``),
+            their batches all lock the same few nodes
+        target_batch_time : float
+            Time in seconds a batch should take, batch sizes of each label / edge type 
+            are adapted after each batch from the measured rows per second
+        min_batch_size : int
+            Batch sizes are never reduced below this value
+        max_batch_size : int
+            Batch sizes are never increased above this value
+        max_retries : int
+            Number of times a failing batch is retried (with half its size) before raising
+        retry_delay : float
+            Delay in seconds before the first retry, doubled after each new failure of the same batch
+        driver : optional
+            An already created ``Driver`` (or a ``StubNeo4jDriver``) used instead of creating one from the config
             
         **kwargs : optional
             Everything in kwargs argument will be passed to create a ``Driver`` from ``neo4j.GraphDatabase``
@@ -78,7 +134,7 @@ class Neo4JLoader(Loader):
         with open("./output/config.yaml", "w+") as config_file:
             yaml.dump(config, config_file)
             
-        self.graph = GraphDatabase.driver(
+        self.graph = driver or GraphDatabase.driver(
             uri=config["url"], 
             auth=(config["username"], config["password"]), 
             database=config["database"]
@@ -95,6 +151,165 @@ class Neo4JLoader(Loader):
         self.node_finding_strategy = node_finding_strategy
         if self.node_finding_strategy not in ("match", "create"):
             raise ValueError("`node_finding_strategy` must be either 'match' or 'create'")
+        
+        self.edge_strategy = edge_strategy
+        if self.edge_strategy not in ("create", "merge"):
+            raise ValueError("`edge_strategy` must be either 'create' or 'merge'")
+        
+        self.relationship_keys = relationship_keys or {}
+        self.prefilter_existing_edges = prefilter_existing_edges
+        self._edges_keys: Dict[tuple, pl.DataFrame] = {}
+        self._edges_with_schema: Set[str] = set()
+        
+        self._queries_cache: Dict[tuple, str] = {}
+        self.cache_hits: int = 0
+        
+        self.batch_size = {"nodes": nodes_batch_size, "edges": edges_batch_size, "supernodes": supernodes_batch_size}
+        self.target_batch_time = target_batch_time
+        self.min_batch_size = min_batch_size
+        self.max_batch_size = max_batch_size
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        
+        self._batch_sizes: Dict[tuple, int] = {}
+        self.files_stats: Dict[str, Dict] = {}
+        
+        self._labels_with_schema: Set[str] = set()
+    
+    def _cached_query(self, key: tuple, build_query: Callable[[], str]) -> str:
+        """
+        Return the query template stored under `key`, building it with `build_query` on a miss.
+        Every value that changes between files is sent as a parameter, so a template is shared
+        by all the files of a label (or an edge type) and Neo4j can reuse its cached plan.
+        """
+        if key in self._queries_cache:
+            self.cache_hits += 1
+        else:
+            self._queries_cache[key] = build_query()
+        return self._queries_cache[key]
+    
+    def _create_schema(self, label: str, constraints: List[str], indexs: List[str]):
+        for constraint in constraints:
+            try:
+                self.graph.execute_query(
+                    f"""CREATE CONSTRAINT {constraint}_{label} IF NOT EXISTS 
+                        FOR (n:{label}) REQUIRE n.{constraint} IS UNIQUE"""
+                )
+            except: continue
+            
+        for index in indexs:
+            self.graph.execute_query(
+                f"""CREATE RANGE INDEX {index}_{label} IF NOT EXISTS 
+                    FOR (n:{label}) ON (n.{index})"""
+            )
+        
+        self._labels_with_schema.add(label)
+    
+    def _load_in_batches(
+        self, 
+        file_name: str, 
+        key: tuple, 
+        query: str, 
+        params: Dict, 
+        created_stat: str,
+        resumable: bool = True
+    ) -> int:
+        """
+        Run `query` on successive windows of the file, each window is written next to the file 
+        and committed in a single transaction, so that ``apoc.load.csv`` only reads the rows of its window.
+        
+        If `resumable`, the row offset is recorded after each committed window 
+        and an interrupted load of the file continues from the last committed offset.
+        
+        The size of the next window is computed from the rows per second of the last one,
+        a failed window (transient error or errors reported by ``apoc.periodic.iterate``) 
+        is rolled back and retried with half its size after an exponential backoff.
+        """
+        kind = key[0]
+        batch_size = self._batch_sizes.get(key, self.batch_size[kind])
+        max_batch_size = self.batch_size["supernodes"] if kind == "supernodes" else self.max_batch_size
+        
+        offset, created, batches, retries, attempt = 0, 0, 0, 0, 0
+        total_time = 0.
+        
+        if resumable:
+            offset = self._committed_offset(file_name)
+            if offset:
+                logging.info(f"{file_name:<30} resuming from row {offset}")
+        resumed_from = offset
+        update_statistics: Dict[str, int] = {}
+        
+        file_path = params["file_path"][len("file:"):]
+        if not os.path.exists(file_path):
+            file_path = file_path[1:]
+        df = pl.read_csv(file_path, separator=";", infer_schema_length=0)
+        
+        while offset < df.shape[0]:
+            window_path = f"{file_path[:-len('.csv')]}_rows_{offset}.csv"
+            window = df.slice(offset, batch_size)
+            window.write_csv(window_path, separator=";")
+            
+            start = time.time()
+            try:
+                res = self.graph.execute_query(
+                    query, 
+                    parameters_={"params": {**params, "file_path": f"file:/{window_path.lstrip('/')}"}, "batch_size": batch_size}
+                )
+                stats = res[0][0]
+                error = stats["failedBatches"] and (stats["errorMessages"] or "failed batch")
+            except (TransientError, ServiceUnavailable, SessionExpired) as e:
+                error = str(e)
+            finally:
+                os.remove(window_path)
+            elapsed = time.time() - start
+            
+            if error:
+                attempt += 1
+                retries += 1
+                if attempt > self.max_retries:
+                    raise RuntimeError(f"{file_name} failed at row {offset} after {self.max_retries} retries : {error}")
+                
+                logging.warning(f"{file_name:<30} batch at row {offset} of size {batch_size} failed, retrying : {error}")
+                batch_size = max(self.min_batch_size, batch_size // 2)
+                time.sleep(self.retry_delay * 2 ** (attempt-1))
+                continue
+            
+            attempt = 0
+            batches += 1
+            total_time += elapsed
+            created += stats["updateStatistics"][created_stat]
+            for stat, value in stats["updateStatistics"].items():
+                update_statistics[stat] = update_statistics.get(stat, 0) + value
+            offset += window.shape[0]
+            
+            if resumable:
+                self._commit_offset(file_name, offset)
+            
+            batch_size = max(self.min_batch_size, min(
+                max_batch_size,
+                2 * batch_size,
+                int(batch_size * self.target_batch_time / max(elapsed, 1e-3))
+            ))
+        
+        self._batch_sizes[key] = batch_size
+        
+        self.files_stats[file_name] = {
+            "rows": offset - resumed_from,
+            "resumed_from": resumed_from,
+            created_stat: created,
+            "batches": batches,
+            "retries": retries,
+            "time": total_time,
+            "rows_per_sec": (offset - resumed_from) / total_time if total_time else 0.,
+            "batch_size": batch_size,
+            "update_statistics": update_statistics
+        }
+        logging.info(
+            f"| -- {batches} batches, {retries} retries, {self.files_stats[file_name]['rows_per_sec']:.0f} rows/s, "
+            f"next batch size : {batch_size} -- |"
+        )
+        
+        return created
     
             
     def load_nodes(
@@ -144,57 +359,115 @@ class Neo4JLoader(Loader):
         )
         """
         
+        file_name = file_path
         file_path = os.path.abspath(f"./output/nodes/{file_path}").replace('\\', '/')
         if file_path[0] == '/':
             file_path = file_path[1:]
         
-        prop_mapped = ",".join(f"{k}: {{ {Neo4JLoader.csv_mapping(property)} }}" for k, property in properties_type.items())
-        loader_options = f"{{sep: ';', arraySep: '|', escapeChar:'NONE', mapping : {{ {prop_mapped} }} }}"
-        
         flat_metadatas = {**metadatas["metadatas"], 'count': metadatas["count"]}
-        metadatas_str = ",".join(f"{k}: '{v}'" for k, v in flat_metadatas.items())
+        # Ends of dangling edges written by `etl.validate_edges(dangling="blank_nodes")`
+        blank_node = bool(metadatas["metadatas"].get("blank_node"))
         
-        if self.metadata_strategy == "as_property":
-            QUERY = f"""
-            CALL apoc.periodic.iterate(
-                "CALL apoc.load.csv('file:/{file_path}', {loader_options}) YIELD map as row WHERE row.{primary_key} IS NOT NULL RETURN row",
-                "MERGE (n:{label} {{id: row.{primary_key}}}) 
-                SET n += row
-                SET n += {{{metadatas_str}}}",
-                {{batchSize: 50000, iterateList: true, parallel: false}}
-            )"""
-        else:
-            QUERY = f"""
+        def build_query():
+            BLANK_NODE = "SET n :BlankNode" if blank_node else ""
+            
+            if self.metadata_strategy == "as_property":
+                return f"""
+                CALL apoc.periodic.iterate(
+                    "CALL apoc.load.csv($file_path, $loader_options) YIELD map as row RETURN row",
+                    "WITH row WHERE row.{primary_key} IS NOT NULL
+                    MERGE (n:{label} {{id: row.{primary_key}}}) 
+                    SET n += row
+                    SET n += $metadatas
+                    {BLANK_NODE}",
+                    {{batchSize: $batch_size, iterateList: true, parallel: false, params: $params}}
+                )"""
+            
+            metadatas_str = ",".join(f"{k}: $metadatas.{k}" for k in flat_metadatas.keys())
+            return f"""
             CALL apoc.periodic.iterate(
-                "CALL apoc.load.csv('file:/{file_path}', {loader_options}) YIELD map as row WHERE row.{primary_key} IS NOT NULL RETURN row",
-                "MERGE (n:{label} {{id: row.{primary_key}}}) 
+                "CALL apoc.load.csv($file_path, $loader_options) YIELD map as row RETURN row",
+                "WITH row WHERE row.{primary_key} IS NOT NULL
+                MERGE (n:{label} {{id: row.{primary_key}}}) 
                 SET n += row
+                {BLANK_NODE}
                 MERGE (m:Metadata {{{metadatas_str}}})
                 CREATE (n)-[:HAS_METADATA]->(m)",
-                {{batchSize: 50000, iterateList: true, parallel: false}}
+                {{batchSize: $batch_size, iterateList: true, parallel: false, params: $params}}
             )"""
-            
         
-        with self.graph as g:
+        QUERY = self._cached_query(
+            (
+                "nodes", label, primary_key, self.metadata_strategy, blank_node,
+                tuple(flat_metadatas.keys()) if self.metadata_strategy == "as_edge" else ()
+            ),
+            build_query
+        )
+        
+        params = {
+            "file_path": f"file:/{file_path}",
+            "loader_options": Neo4JLoader.loader_options(properties_type),
+            "metadatas": {k: str(v) for k, v in flat_metadatas.items()}
+        }
+        
+        if label not in self._labels_with_schema:
+            self._create_schema(label, constraints, indexs)
+        
+        return self._load_in_batches(file_name, ("nodes", label), QUERY, params, "nodesCreated")
+        
+    def _create_edge_schema(self, edge_type: str, keys: List[str]):
+        """
+        Index the key properties of `edge_type` used by the MERGE of the edges, 
+        they are not unique by themselves since an edge is identified by its nodes and its key
+        """
+        if keys:
+            properties = ", ".join(f"r.{key}" for key in keys)
+            self.graph.execute_query(
+                f"""CREATE RANGE INDEX {edge_type}_key IF NOT EXISTS 
+                    FOR ()-[r:{edge_type}]-() ON ({properties})"""
+            )
+        
+        self._edges_with_schema.add(edge_type)
+    
+    def _existing_edges_keys(self, edge_type: str, start: str, end: str, keys: List[str]) -> pl.DataFrame:
+        """
+        Keys of the edges of `edge_type` already in the graph between `start` and `end`, exported once
+        and then extended with each loaded file, as strings to be compared with the rows of the files
+        """
+        cache_key = (edge_type, start, end)
+        if cache_key not in self._edges_keys:
+            start_label, start_id = start.split(':')
+            end_label, end_id = end.split(':')
             
-            for constraint in constraints:
-                try:
-                    g.execute_query(
-                        f"""CREATE CONSTRAINT {constraint}_{label} IF NOT EXISTS 
-                            FOR (n:{label}) REQUIRE n.{constraint} IS UNIQUE"""
-                    )
-                except: continue
-                
-            for index in indexs:
-                g.execute_query(
-                    f"""CREATE RANGE INDEX {index}_{label} IF NOT EXISTS 
-                        FOR (n:{label}) ON (n.{index})"""
-                )
-                
-            res = g.execute_query(QUERY)
+            records, _, _ = self.graph.execute_query(
+                f"""MATCH (n:{start_label})-[r:{edge_type}]->(m:{end_label})
+                RETURN toString(n.{start_id}) AS start, toString(m.{end_id}) AS end"""
+                + "".join(f", toString(r.{key}) AS {key}" for key in keys)
+            )
+            self._edges_keys[cache_key] = pl.DataFrame(
+                [dict(record) for record in records], 
+                schema={column: pl.Utf8 for column in ["start", "end"] + keys}
+            )
+        return self._edges_keys[cache_key]
+    
+    def _prefilter_edges(self, file_name: str, edge_type: str, start: str, end: str, keys: List[str]) -> str:
+        """
+        Write the rows of `file_name` whose key isn't in the graph yet in a new file and return its name
+        """
+        existing = self._existing_edges_keys(edge_type, start, end, keys)
+        
+        df = pl.read_csv(f"./output/edges/{file_name}", separator=";", infer_schema_length=0)
+        key_columns = ["start", "end"] + keys
+        new_rows = df.unique(subset=key_columns).join(existing, on=key_columns, how="anti")
         
-        return res[0][0]['updateStatistics']['nodesCreated']
+        self._edges_keys[(edge_type, start, end)] = pl.concat([existing, new_rows.select(key_columns)])
         
+        logging.info(f"{file_name:<30} {df.shape[0] - new_rows.shape[0]} edges already in the graph")
+        
+        filtered_name = file_name[:-len(".csv")] + "_new.csv"
+        new_rows.write_csv(f"./output/edges/{filtered_name}", separator=";")
+        return filtered_name
+    
     def load_edges(
         self,
         file_path: str,
@@ -238,6 +511,12 @@ class Neo4JLoader(Loader):
         )
         """
         
+        file_name = file_path
+        keys = self.relationship_keys.get(edge_type, [])
+        
+        if self.edge_strategy == "merge" and self.prefilter_existing_edges:
+            file_path = self._prefilter_edges(file_name, edge_type, start, end, keys)
+        
         file_path = os.path.abspath(f"./output/edges/{file_path}").replace('\\', '/')
         if file_path[0] == '/':
             file_path = file_path[1:]
@@ -252,42 +531,128 @@ class Neo4JLoader(Loader):
 
         start_label, start_id = start.split(':')
         end_label, end_id = end.split(':')
+        
+        start_type = Neo4JLoader.type_mapping(properties_type['start'])
+        end_type = Neo4JLoader.type_mapping(properties_type['end'])
 
-        edges_properties = ", ".join(f"{property}: row.{property}" for property in header)
-        # edges_properties = f"{{ metadatas: '{metadatas}' {bonus_properties} }}"
+        def build_query():
+            edges_properties = ", ".join(f"{property}: row.{property}" for property in header)
+            
+            row_start = 'toInteger(row.start)' if start_type=='int' else 'toString(row.start)'
+            row_end = 'toInteger(row.end)' if end_type=='int' else f'toString(row.end)'
 
-        prop_mapped = ",".join(f"{k}: {{ {Neo4JLoader.csv_mapping(property)} }}" for k, property in properties_type.items())
-        loader_options = f"{{sep: ';', arraySep: '|', escapeChar:'NONE', mapping : {{ {prop_mapped} }} }}"
-        
-        row_start = 'toInteger(row.start)' if Neo4JLoader.type_mapping(properties_type['start'])=='int' else 'toString(row.start)'
-        row_end = 'toInteger(row.end)' if Neo4JLoader.type_mapping(properties_type['end'])=='int' else f'toString(row.end)'
+            if self.node_finding_strategy == "create":
+                NODE_FINDING_STRATEGY = f"""
+                MERGE (n:{start_label} {{{start_id}: {row_start} }})
+                    ON CREATE SET n :BlankNode
+                MERGE (m:{end_label} {{{end_id}: {row_end} }}) 
+                    ON CREATE SET m :BlankNode
+                """
+            else:
+                NODE_FINDING_STRATEGY = f"""
+                MATCH (n:{start_label} {{{start_id}: {row_start} }})
+                MATCH (m:{end_label} {{{end_id}: {row_end} }}) 
+                """
 
-        if self.node_finding_strategy == "create":
-            NODE_FINDING_STRATEGY = f"""
-            MERGE (n:{start_label} {{{start_id}: {row_start} }})
-                ON CREATE SET n :BlankNode
-            MERGE (m:{end_label} {{{end_id}: {row_end} }}) 
-                ON CREATE SET m :BlankNode
-            """
-        else:
-            NODE_FINDING_STRATEGY = f"""
-            MATCH (n:{start_label} {{{start_id}: {row_start} }})
-            MATCH (m:{end_label} {{{end_id}: {row_end} }}) 
+            if self.edge_strategy == "merge":
+                keys_properties = ", ".join(f"{key}: row.{key}" for key in keys)
+                EDGE_STRATEGY = f"""
+                MERGE (n)-[r:{edge_type} {{{keys_properties}}}]->(m)
+                SET r += {{{edges_properties}}}
+                """
+            else:
+                EDGE_STRATEGY = f"CREATE (n)-[:{edge_type} {{{edges_properties}}}]->(m)"
+
+            return f"""
+            CALL apoc.periodic.iterate(
+                "CALL apoc.load.csv($file_path, $loader_options) 
+                YIELD map as row
+                RETURN row",
+                "WITH row WHERE row.start <> '' AND row.end <> ''
+                {NODE_FINDING_STRATEGY}
+                {EDGE_STRATEGY}",
+                {{batchSize: $batch_size, params: $params}}
+            )
             """
+        
+        QUERY = self._cached_query(
+            (
+                "edges", edge_type, start, end, start_type, end_type, tuple(header), 
+                self.node_finding_strategy, self.edge_strategy, tuple(keys)
+            ),
+            build_query
+        )
+        
+        params = {
+            "file_path": f"file:/{file_path}",
+            "loader_options": Neo4JLoader.loader_options(properties_type)
+        }
+        
+        if self.edge_strategy == "merge" and edge_type not in self._edges_with_schema:
+            self._create_edge_schema(edge_type, keys)
 
-        QUERY = f"""
-        CALL apoc.periodic.iterate(
-            "CALL apoc.load.csv('file:/{file_path}', {loader_options}) 
-            YIELD map as row
-            WHERE row.start <> '' AND row.end <> ''
-            RETURN row",
-            "{NODE_FINDING_STRATEGY}
-            CREATE (n)-[:{edge_type} {{{edges_properties}}}]->(m)",
-            {{batchSize: 20000}}
+        # The prefiltered file is rewritten at each load, its rows are not the rows of the previous load
+        resumable = not (self.edge_strategy == "merge" and self.prefilter_existing_edges)
+        
+        kind = "supernodes" if metadatas.get("supernodes") else "edges"
+        
+        try:
+            return self._load_in_batches(file_name, (kind, edge_type), QUERY, params, "relationshipsCreated", resumable)
+        finally:
+            if not resumable:
+                os.remove(trailing_slash+file_path)
+    
+    def _delete_in_batches(self, query: str, rows: List, batch_size: int) -> int:
+        deleted = 0
+        for i in range(0, len(rows), batch_size):
+            res = self.graph.execute_query(query, parameters_={"rows": rows[i:i+batch_size]})
+            deleted += res[0][0]["deleted"] if res[0] else 0
+        return deleted
+    
+    def delete_nodes(self, label: str, primary_key: str, keys: List) -> int:
+        """
+        Delete the nodes of `label` (matched on their `id`, set from the primary key) whose key is in `keys`, with their edges
+        """
+        return self._delete_in_batches(
+            f"""UNWIND $rows AS key
+            MATCH (n:{label} {{id: key}})
+            DETACH DELETE n
+            RETURN count(*) AS deleted""",
+            keys, self.batch_size["nodes"]
         )
+    
+    def delete_edges(self, edge_type: str, start: str, end: str, pairs: List[Tuple]) -> int:
         """
-
-        with self.graph as g:
-            res = g.execute_query(QUERY)
+        Delete the edges of `edge_type` between each pair of (`start` value, `end` value)
+        """
+        start_label, start_id = start.split(':')
+        end_label, end_id = end.split(':')
         
-        return res[0][0]['updateStatistics']['relationshipsCreated']
+        return self._delete_in_batches(
+            f"""UNWIND $rows AS pair
+            MATCH (n:{start_label} {{{start_id}: pair[0]}})-[r:{edge_type}]->(m:{end_label} {{{end_id}: pair[1]}})
+            DELETE r
+            RETURN count(*) AS deleted""",
+            [list(pair) for pair in pairs], self.batch_size["edges"]
+        )
+    
+    def load_node_group(
+        self,
+        label: str,
+        primary_key: str,
+        files: Dict[str, Dict],
+        properties_type: Dict[str, str],
+        constraints: List[str],
+        indexs: List[str],
+        on_loaded: Callable[..., None] = None
+    ) -> Dict[str, int]:
+        """
+        Create constraints and indexes of the label once, then load each file 
+        with the same cached query and the batch size reached by the previous file
+        
+        Edge groups aren't overridden, each edge file is loaded on its own by ``load_edges``
+        """
+        if label not in self._labels_with_schema:
+            self._create_schema(label, constraints, indexs)
+        return super().load_node_group(label, primary_key, files, properties_type, constraints, indexs, on_loaded)
+
@@ -1,9 +1,14 @@
 from __future__ import annotations
-from typing import Union, List, TYPE_CHECKING, Type
+from typing import Union, List, Dict, Tuple, Set, TYPE_CHECKING, Type, Callable
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from functools import partial
+from uuid import uuid4
 
 import logging
 import os
 import time
+import queue
+import threading
 
 import json
 import polars as pl
@@ -15,11 +20,25 @@ if TYPE_CHECKING:
     from .utils import StoreInfo
     from .callbacks import Callback
     from .filters import Filter
+    from .profiling import MemoryProfiler
     
 
-def _init(store: StoreInfo, filters: Filter = None, callbacks: List[Callback] = None):
+def _init(
+    store: StoreInfo, 
+    filters: Filter = None, 
+    callbacks: List[Callback] = None, 
+    profiler: MemoryProfiler = None,
+    chunk_bytes: int = None,
+    chunk_bytes_overrides: Dict[str, int] = None,
+    sort_edges: bool = False,
+    surrogate_ids: str = None
+):
     store.set_filters(filters)
     store.set_callbacks(callbacks)
+    store.set_profiler(profiler)
+    store.set_chunk_bytes(chunk_bytes, chunk_bytes_overrides)
+    store.set_sort_edges(sort_edges)
+    store.set_surrogate_ids(surrogate_ids)
     
     os.makedirs("./output", exist_ok=True)
     os.makedirs("./output/configs", exist_ok=True)
@@ -45,151 +64,700 @@ def _parse(store: StoreInfo, use_mapper=True):
     if use_mapper:
         _map_property(store)
     
-def _map_property(store: StoreInfo):
-    for edge_properties in store._configs.edges.values():
-        for file, file_properties in edge_properties.items():
+    # With ``etl.run`` the loading threads add the node files they load to the report meanwhile
+    with _LOADED_LOCK:
+        store._report.save()
+    
+def _map_file(store: StoreInfo, edge_type: str, file: str, file_properties: Dict):
+    """
+    Map the `start` and `end` of an edge file to the `id` of their nodes
+    """
+    start_mapping = time.time()
+    
+    # Ends are replaced by their surrogate ids once mapped and once the primary key of their label is known
+    encoded = file_properties.get("surrogate_ids", [])
+    to_encode = [
+        prop for prop in ("start", "end") 
+        if prop not in encoded and store.uses_surrogate_ids(file_properties[prop])
+    ]
+    to_map = not file_properties.ignore_mapping and set((file_properties.start, file_properties.end)).intersection(set(store._ids_to_map))
+    
+    if to_map or to_encode:
+        df = pl.read_csv(f"./output/edges/{file}", separator=";", infer_schema_length=100_000)
+        for prop in ("start", "end"):
+            if to_map and file_properties[prop] in store._ids_to_map.keys():
+                mapping = store._ids_to_map[file_properties[prop]]
+                df = df.join(
+                    mapping,
+                    left_on=prop,
+                    right_on="old_value",
+                    how="outer"
+                ).with_columns(
+                    [pl.col("new_value").fill_null(pl.col(prop))]
+                ).rename({
+                    prop: "mapped_from", 
+                    "new_value": prop
+                })
+                
+            if prop in to_encode:
+                label, key = file_properties[prop].split(":")
+                df = df.with_columns(store._surrogates.encode(label, key, df.get_column(prop)))
+                
+            file_properties.properties_type[prop] = str(df.get_column(prop).dtype)
             
-            if not file_properties.ignore_mapping and set((file_properties.start, file_properties.end)).intersection(set(store._ids_to_map)):
-                df = pl.read_csv(f"./output/edges/{file}", separator=";", infer_schema_length=100_000)
-                for prop in ("start", "end"):
-                    if file_properties[prop] in store._ids_to_map.keys():
-                        mapping = store._ids_to_map[file_properties[prop]]
-                        df = df.join(
-                            mapping,
-                            left_on=prop,
-                            right_on="old_value",
-                            how="outer"
-                        ).with_columns(
-                            [pl.col("new_value").fill_null(pl.col(prop))]
-                        ).rename({
-                            prop: "mapped_from", 
-                            "new_value": prop
-                        })
-                        
-                    file_properties.properties_type[prop] = str(df.get_column(prop).dtype)
-                
-                df = df.unique(subset=['start', 'end'])
-                df.write_csv(f"./output/edges/{file}", separator=";")
-        
-
-            start_label, start_id = file_properties.start.split(":")
-            end_label, end_id = file_properties.end.split(":")
-            
-            if not (
-                file_properties.ignore_mapping and
-                start_label in store._configs.nodes and
-                end_label in store._configs.nodes and
-                start_id in store._configs.nodes[start_label].primary_key and
-                end_id in store._configs.nodes[end_label].primary_key
-            ):
-                df = pl.read_csv(f"./output/edges/{file}", separator=";", infer_schema_length=100_000)
-                    
-                for prop in ('start', 'end'):
-                    p = file_properties[prop]
-                    p_label, p_id = p.split(":")
-                    if "id" != p_id:
-                        
-                        
-                        mapping = pl.concat((
-                            pl.read_csv(f"./output/nodes/{file_}", separator=";", infer_schema_length=100_000).select(["id", p_id]) 
-                            for file_ in store._configs.nodes[p_label].files.keys()
-                        )).drop_nulls()
-                        
-                        df = (
-                            df.join(
-                                mapping,
-                                left_on=prop,
-                                right_on=p_id,
-                                how="outer"
-                            )
-                            .with_columns([pl.col("id").fill_null(pl.col(prop))])
-                            .drop(prop)
-                            .rename({"id": prop})
-                        )
-                        
-                        file_properties.properties_type[prop] = str(df.get_column(prop).dtype)
-                        file_properties[prop] = f"{p_label}:id"
-                        
-                df = df.unique(subset=['start', 'end'])
-                df.write_csv(f"./output/edges/{file}", separator=";")
+        if to_encode:
+            file_properties.surrogate_ids = encoded + to_encode
+        
+        df = df.unique(subset=['start', 'end'])
+        if store._sort_edges:
+            df = df.sort(['start', 'end'])
+        df.write_csv(f"./output/edges/{file}", separator=";")
+
+
+    start_label, start_id = file_properties.start.split(":")
+    end_label, end_id = file_properties.end.split(":")
+    
+    if not (
+        file_properties.ignore_mapping and
+        start_label in store._configs.nodes and
+        end_label in store._configs.nodes and
+        start_id in store._configs.nodes[start_label].primary_key and
+        end_id in store._configs.nodes[end_label].primary_key
+    ):
+        df = pl.read_csv(f"./output/edges/{file}", separator=";", infer_schema_length=100_000)
+            
+        for prop in ('start', 'end'):
+            p = file_properties[prop]
+            p_label, p_id = p.split(":")
+            if "id" != p_id:
+                
+                
+                mapping = pl.concat((
+                    pl.read_csv(f"./output/nodes/{file_}", separator=";", infer_schema_length=100_000).select(["id", p_id]) 
+                    for file_ in store._configs.nodes[p_label].files.keys()
+                )).drop_nulls()
+                
+                df = (
+                    df.join(
+                        mapping,
+                        left_on=prop,
+                        right_on=p_id,
+                        how="outer"
+                    )
+                    .with_columns([pl.col("id").fill_null(pl.col(prop))])
+                    .drop(prop)
+                    .rename({"id": prop})
+                )
+                
+                file_properties.properties_type[prop] = str(df.get_column(prop).dtype)
+                file_properties[prop] = f"{p_label}:id"
                 
+        df = df.unique(subset=['start', 'end'])
+        if store._sort_edges:
+            df = df.sort(['start', 'end'])
+        df.write_csv(f"./output/edges/{file}", separator=";")
+        
+    store._report.add_mapping(
+        file, f"{start_label}{edge_type}{end_label}", time.time() - start_mapping, file_properties.count
+    )
+
+def _map_property(store: StoreInfo, workers: int = 1):
+    files = [
+        (edge_type, file, file_properties)
+        for edge_type, edge_properties in store._configs.edges.items()
+        for file, file_properties in edge_properties.items()
+    ]
+    
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for future in [executor.submit(_map_file, store, *file) for file in files]:
+                future.result()
+    else:
+        for file in files:
+            _map_file(store, *file)
             
     with open(f"./output/configs/configs.json", "w") as f:
         json.dump(store._configs, f, indent=4)
+    if store._surrogates:
+        store._surrogates.save()
         
     logging.info(f"ETL took {store._stats_store['total_time']//60}m {store._stats_store['total_time']%60}s to finish")
     logging.info(f"| -- Total nodes : {store._stats_store['nodes_count']:>12} -- |")
     logging.info(f"| -- Total edges : {store._stats_store['edges_count']:>12} -- |")
     
     
-def _load(store: StoreInfo, loader_obj: Loader, clear_source : Union[List[str], bool] = None):
-    if not os.path.isdir("./output"):
-        print("ETL is not parsed, parsing...")
-        _parse(store)
+def _csv_header(kind: str, file_name: str) -> Tuple[str, ...]:
+    with open(f"./output/{kind}/{file_name}", "r") as f:
+        return tuple(f.readline().rstrip("\n").split(";"))
+
+
+def _committed_files(store: StoreInfo) -> Set[str]:
+    """
+    Files loaded, or partially loaded (with a committed offset), by a previous load, 
+    they must be left untouched since a resumed load skips their committed rows
+    """
+    from .loader import Loader
+    
+    committed = {line.rstrip("\n") for line in store._already_loaded}
+    if os.path.exists(Loader.offsets_path):
+        with open(Loader.offsets_path, "r") as f:
+            committed.update(line.rsplit(";", 1)[0] for line in f.read().splitlines() if line)
+    return committed
+
+
+def _validate_edges(store: StoreInfo, dangling: str = "report") -> Dict[str, Dict[str, int]]:
+    """
+    Anti-join the `start` and `end` of every edge file with the keys of the nodes of their label
+    and count the dangling rows (an end isn't a parsed node) of each edge type.
+    
+    With `dangling="drop"` the files are replaced by new files without the dangling rows 
+    (partially loaded files are kept as they are), with `dangling="blank_nodes"`
+    the missing ends are written once in a node file of their label (metadatas `blank_node`),
+    loaded before the edges so that the database only has to match them
+    """
+    if dangling not in ("report", "drop", "blank_nodes"):
+        raise ValueError("`dangling` must be either 'report', 'drop' or 'blank_nodes'")
     
     start = time.time()
+    keys: Dict[Tuple[str, str], pl.Series] = {}
+    missing: Dict[Tuple[str, str], List[pl.Series]] = {}
+    missing_types: Dict[Tuple[str, str], str] = {}
+    committed = _committed_files(store)
+    replaced = []
+    
+    def node_keys(label: str, prop: str) -> pl.Series:
+        if (label, prop) not in keys:
+            files = store._configs.nodes[label].files.keys() if label in store._configs.nodes else []
+            keys[(label, prop)] = pl.concat([
+                pl.scan_csv(f"./output/nodes/{file_name}", separator=";", infer_schema_length=0).select(prop)
+                for file_name in files if prop in _csv_header("nodes", file_name)
+            ] or [pl.LazyFrame(schema={prop: pl.Utf8})]).unique().collect().get_column(prop)
+        return keys[(label, prop)]
     
-    nodes_items = tqdm(store._configs.nodes.items(), desc='Loading nodes ...')
-     
-    for node, infos in nodes_items:
+    stats = {}
+    for edge_type, files in store._configs.edges.items():
+        stats_ = {"rows": 0, "dangling": 0, "dangling_start": 0, "dangling_end": 0}
         
-        for file_path, metadatas in infos.files.items():
+        for file_name in list(files.keys()):
+            if f"{file_name}\n" in store._already_loaded: continue
             
-            if store._filters and store._filters.skip_load_node(metadatas, node): continue
+            infos = files[file_name]
+            df = pl.read_csv(f"./output/edges/{file_name}", separator=";", infer_schema_length=0)
             
-            if f"{file_path}\n" in store._already_loaded: continue
+            is_dangling = {}
+            for prop in ("start", "end"):
+                label, key = infos[prop].split(":")
+                is_dangling[prop] = ~pl.col(prop).is_in(node_keys(label, key))
+                
+            dangling_rows = df.filter(is_dangling["start"] | is_dangling["end"])
             
-            logging.info(f"{file_path:<30} loading...")
+            stats_["rows"] += df.shape[0]
+            stats_["dangling"] += dangling_rows.shape[0]
+            for prop in ("start", "end"):
+                stats_[f"dangling_{prop}"] += dangling_rows.filter(is_dangling[prop]).shape[0]
+                
+            if dangling_rows.shape[0] == 0: continue
             
-            nodesCreated = loader_obj.load_nodes(
-                file_path=file_path,
-                label=node,
-                primary_key=infos.primary_key,
-                metadatas=metadatas.to_dict(),
-                properties_type=infos.properties_type,
-                constraints=infos.constraints,
-                indexs=infos.indexs
+            if dangling == "drop":
+                if file_name in committed:
+                    logging.warning(f"{file_name:<30} is partially loaded, its dangling edges are kept")
+                    continue
+                
+                # The original file is replaced by a new file, removed once the catalog doesn't reference it
+                df = df.filter(~(is_dangling["start"] | is_dangling["end"]))
+                if df.shape[0]:
+                    valid_file = f"{file_name[:-len('.csv')]}_valid.csv"
+                    df.write_csv(f"./output/edges/{valid_file}", separator=";")
+                    files[valid_file] = {
+                        **infos.to_dict(), 
+                        'count': df.shape[0], 
+                        'bytes': os.path.getsize(f"./output/edges/{valid_file}")
+                    }
+                
+                del files[file_name]
+                replaced.append(file_name)
+                
+            elif dangling == "blank_nodes":
+                for prop in ("start", "end"):
+                    label, key = infos[prop].split(":")
+                    missing.setdefault((label, key), []).append(dangling_rows.filter(is_dangling[prop]).get_column(prop))
+                    missing_types.setdefault((label, key), infos.properties_type.get(prop, "Utf8"))
+        
+        stats[edge_type] = stats_
+        store._report.add_validation(edge_type, stats_)
+        if stats_["dangling"]:
+            logging.warning(f"{edge_type:<30} {stats_['dangling']} dangling edges out of {stats_['rows']}")
+    
+    uuid = "FILE_"+str(uuid4())
+    for (label, key), series in missing.items():
+        if label in store._configs.nodes and store._configs.nodes[label].primary_key != key:
+            logging.warning(f"{label}:{key} isn't the primary key of {label}, its dangling edges can't be resolved by blank nodes")
+            continue
+        
+        blank_nodes = pl.concat(series).unique().to_frame(key)
+        if blank_nodes.shape[0] == 0: continue
+        
+        if label not in store._configs.nodes:
+            store._configs.nodes[label] = {
+                'primary_key': key,
+                'constraints': [key],
+                'indexs': [],
+                'properties_type': {key: missing_types[(label, key)]},
+                'files': {}
+            }
+        
+        file_name = f"{uuid}_{label}_blank.csv"
+        blank_nodes.write_csv(f"./output/nodes/{file_name}", separator=";")
+        store._configs.nodes[label].files[file_name] = {
+            'metadatas': {'blank_node': True},
+            'count': blank_nodes.shape[0],
+            'bytes': os.path.getsize(f"./output/nodes/{file_name}"),
+            'chunk_rows': None
+        }
+        logging.info(f"{label:<30} {blank_nodes.shape[0]} blank nodes")
+    
+    with open(f"./output/configs/configs.json", "w") as f:
+        json.dump(store._configs, f, indent=4)
+    for file_name in replaced:
+        os.remove(f"./output/edges/{file_name}")
+    logging.info(f"Edges validated in {time.time() - start:.1f}s")
+    
+    return stats
+    
+    
+def _compact_group(
+    kind: str, 
+    name: str, 
+    files: List[str], 
+    keys: List[str], 
+    target_bytes: int, 
+    sort: bool = False
+) -> Dict[str, Tuple[List[str], int]]:
+    """
+    Merge `files` (same label or edge type, same metadatas and columns) into files of about `target_bytes`,
+    rows duplicated on `keys` are dropped and, if `sort`, rows are sorted by `keys`. 
+    Returns, for each written file, the files merged in it and its number of rows
+    """
+    batches, batch, size = [], [], 0
+    for file_name in files:
+        batch.append(file_name)
+        size += os.path.getsize(f"./output/{kind}/{file_name}")
+        if size >= target_bytes:
+            batches.append(batch)
+            batch, size = [], 0
+    if batch:
+        batches.append(batch)
+    
+    uuid = "FILE_"+str(uuid4())
+    written = {}
+    
+    for i, batch in enumerate(batches):
+        if len(batch) == 1:
+            if sort:
+                file_path = f"./output/{kind}/{batch[0]}"
+                pl.read_csv(file_path, separator=";", infer_schema_length=0).sort(keys).write_csv(file_path, separator=";")
+            continue
+        
+        df = pl.concat([
+            pl.read_csv(f"./output/{kind}/{file_name}", separator=";", infer_schema_length=0) for file_name in batch
+        ]).unique(subset=keys, keep="first", maintain_order=True)
+        if sort:
+            df = df.sort(keys)
+        
+        file_name = f"{uuid}_{name}_{i}.csv"
+        df.write_csv(f"./output/{kind}/{file_name}", separator=";")
+        
+        for old_file in batch:
+            os.remove(f"./output/{kind}/{old_file}")
+        
+        written[file_name] = (batch, df.shape[0])
+        
+    return written
+
+
+def _compact(store: StoreInfo, target_bytes: int = 64_000_000, sort_edges: bool = None) -> Dict[str, Dict[str, int]]:
+    """
+    Merge the small files of each label and edge type into files of about `target_bytes`,
+    only files with the same metadatas and the same columns (and for edges, the same ends) are merged,
+    files already loaded or partially loaded are left untouched.
+    
+    If `sort_edges`, edge files are also sorted by `start` then `end` so that each batch of a load
+    touches neighbouring nodes (index pages and node records) instead of random ones
+    """
+    if sort_edges is None:
+        sort_edges = store._sort_edges
+    
+    start = time.time()
+    stats = {}
+    committed = _committed_files(store)
+    
+    for label, infos in store._configs.nodes.items():
+        groups: Dict[Tuple, List[str]] = {}
+        for file_name, file_infos in infos.files.items():
+            if file_name in committed: continue
+            key = (json.dumps(file_infos.metadatas, sort_keys=True, default=str), _csv_header("nodes", file_name))
+            groups.setdefault(key, []).append(file_name)
+        
+        files_in, files_out, duplicates = len(infos.files), len(infos.files), 0
+        for group in groups.values():
+            if len(group) < 2: continue
+            
+            metadatas = infos.files[group[0]].metadatas
+            for file_name, (merged, count) in _compact_group("nodes", label, group, [infos.primary_key], target_bytes).items():
+                duplicates += sum(infos.files[old_file].count for old_file in merged) - count
+                for old_file in merged:
+                    del infos.files[old_file]
+                    
+                infos.files[file_name] = {
+                    'metadatas': metadatas, 'count': count, 'bytes': os.path.getsize(f"./output/nodes/{file_name}"), 'chunk_rows': None
+                }
+                files_out -= len(merged) - 1
+        
+        stats[label] = {"files_in": files_in, "files_out": files_out, "duplicates": duplicates}
+            
+    for edge_type, files in store._configs.edges.items():
+        groups: Dict[Tuple, List[str]] = {}
+        for file_name, file_infos in files.items():
+            if file_name in committed: continue
+            key = (
+                file_infos.start, file_infos.end, file_infos.ignore_mapping, file_infos.get("supernodes", False),
+                json.dumps(file_infos.properties_type, sort_keys=True),
+                json.dumps(file_infos.metadatas, sort_keys=True, default=str), 
+                _csv_header("edges", file_name)
             )
+            groups.setdefault(key, []).append(file_name)
+        
+        files_in, files_out, duplicates = len(files), len(files), 0
+        for group in groups.values():
+            if len(group) < 2 and not sort_edges: continue
             
-            logging.info(f"{file_path:<30} loaded    ")
-            logging.info(f"| -- Total nodes in file : {metadatas.count:>12} -- |")
-            logging.info(f"| -- Total nodes created : {nodesCreated:>12} -- |")
+            first = files[group[0]]
+            name = f"{first.start.split(':')[0]}{edge_type}{first.end.split(':')[0]}"
+            for file_name, (merged, count) in _compact_group("edges", name, group, ["start", "end"], target_bytes, sort_edges).items():
+                duplicates += sum(files[old_file].count for old_file in merged) - count
+                infos = {k: v for k, v in files[merged[0]].items() if k not in ("count", "bytes", "chunk_rows")}
+                for old_file in merged:
+                    del files[old_file]
+                    
+                files[file_name] = {
+                    **infos, 'count': count, 'bytes': os.path.getsize(f"./output/edges/{file_name}"), 'chunk_rows': None
+                }
+                files_out -= len(merged) - 1
+                
+        stats[edge_type] = {"files_in": files_in, "files_out": files_out, "duplicates": duplicates}
+    
+    with open(f"./output/configs/configs.json", "w") as f:
+        json.dump(store._configs, f, indent=4)
+    
+    for name, stats_ in stats.items():
+        if stats_["files_in"] != stats_["files_out"]:
+            logging.info(f"{name:<30} compacted : {stats_}")
+    logging.info(f"Compaction took {time.time() - start:.1f}s")
+    
+    return stats
+    
+    
+def _degree_stats(degrees: pl.Series, threshold: int) -> Dict:
+    """
+    Distribution of the degrees of the nodes at one end of an edge type, 
+    the histogram counts the nodes with a degree in [2^k, 2^(k+1)[ for each `k`
+    """
+    if degrees.shape[0] == 0:
+        return {"nodes": 0}
+    
+    histogram = (
+        degrees.log(2).floor().cast(pl.Int64)
+            .value_counts(sort=True)
+            .sort(degrees.name)
+    )
+    return {
+        "nodes": degrees.shape[0],
+        "mean": degrees.mean(),
+        "max": degrees.max(),
+        "p50": degrees.quantile(0.5),
+        "p99": degrees.quantile(0.99),
+        "supernodes": (degrees > threshold).sum(),
+        "histogram": {str(2**int(k)): n for k, n in histogram.iter_rows()}
+    }
 
-            with open(store._loader_path, "a") as f:
-                f.write(f"{file_path}\n")
+
+def _supernodes(store: StoreInfo, threshold: int = 10_000) -> Dict[str, Dict]:
+    """
+    Count the degree of each `start` and `end` node of every edge type and move the edges of the nodes
+    with more than `threshold` edges (supernodes) to dedicated files flagged `supernodes` in the catalog,
+    loaded one at a time with smaller batches after the other edges of their group.
+    Each split file is replaced by new files, files already or partially loaded are left untouched.
+    
+    The degree distribution of each edge type is recorded in `degrees` in the catalog
+    """
+    start = time.time()
+    degrees = store._configs.get("degrees", {})
+    committed = _committed_files(store)
+    replaced = []
+    
+    for edge_type, files in store._configs.edges.items():
+        groups: Dict[Tuple[str, str], List[str]] = {}
+        for file_name, file_infos in files.items():
+            if file_name in committed or file_infos.get("supernodes"): continue
+            groups.setdefault((file_infos.start, file_infos.end), []).append(file_name)
+        
+        if not groups: continue
+        
+        counts = {"start": [], "end": []}
+        for group in groups.values():
+            ends = pl.concat([
+                pl.scan_csv(f"./output/edges/{file_name}", separator=";", infer_schema_length=0).select(["start", "end"])
+                for file_name in group
+            ])
+            hubs = {}
+            for prop in ("start", "end"):
+                degree = ends.group_by(prop).agg(pl.count().alias("degree")).collect()
+                counts[prop].append(degree.get_column("degree"))
+                hubs[prop] = degree.filter(pl.col("degree") > threshold).get_column(prop)
+                
+            if hubs["start"].shape[0] == 0 and hubs["end"].shape[0] == 0: continue
+            
+            for file_name in group:
+                df = pl.read_csv(f"./output/edges/{file_name}", separator=";", infer_schema_length=0)
+                is_supernode = pl.col("start").is_in(hubs["start"]) | pl.col("end").is_in(hubs["end"])
+                
+                supernodes = df.filter(is_supernode)
+                if supernodes.shape[0] == 0: continue
+                
+                # The original file is replaced by two new files, removed once the catalog doesn't reference it
+                supernodes_file = f"{file_name[:-len('.csv')]}_supernodes.csv"
+                supernodes.write_csv(f"./output/edges/{supernodes_file}", separator=";")
+                files[supernodes_file] = {
+                    **files[file_name].to_dict(), 
+                    'count': supernodes.shape[0], 
+                    'bytes': os.path.getsize(f"./output/edges/{supernodes_file}"),
+                    'supernodes': True
+                }
+                
+                df = df.filter(~is_supernode)
+                if df.shape[0]:
+                    others_file = f"{file_name[:-len('.csv')]}_others.csv"
+                    df.write_csv(f"./output/edges/{others_file}", separator=";")
+                    files[others_file] = {
+                        **files[file_name].to_dict(), 
+                        'count': df.shape[0], 
+                        'bytes': os.path.getsize(f"./output/edges/{others_file}")
+                    }
+                
+                del files[file_name]
+                replaced.append(file_name)
+                
+        degrees[edge_type] = {
+            prop: _degree_stats(pl.concat(series), threshold) for prop, series in counts.items()
+        }
+        if degrees[edge_type]["start"].get("supernodes") or degrees[edge_type]["end"].get("supernodes"):
+            logging.info(f"{edge_type:<30} supernodes : {degrees[edge_type]['start']['supernodes']} starts, {degrees[edge_type]['end']['supernodes']} ends")
+        
+    store._configs.degrees = degrees
+    
+    with open(f"./output/configs/configs.json", "w") as f:
+        json.dump(store._configs, f, indent=4)
+    for file_name in replaced:
+        os.remove(f"./output/edges/{file_name}")
+    logging.info(f"Degrees computed in {time.time() - start:.1f}s")
+    
+    return store._configs.degrees.to_dict()
+    
+    
+_LOADED_LOCK = threading.Lock()
+
+def _on_loaded(store: StoreInfo, loader_obj: Loader, kind: str, name: str, files: Dict, progress: tqdm = None):
+    """
+    Callback given to the loaders, called once a file is loaded to log it, add it to the report 
+    and checkpoint it in the loader log file
+    
+    The loading time of a file is the one given by the loader (files loaded together by a single job),
+    or else the time since the previous file
+    """
+    last_loaded = [time.time()]
+    
+    def log_loaded(file_path: str, created: int, seconds: float = None):
+        if seconds is None:
+            seconds = time.time() - last_loaded[0]
+        last_loaded[0] = time.time()
+        
+        with _LOADED_LOCK:
+            logging.info(f"{file_path:<30} loaded    ")
+            logging.info(f"| -- Total {kind} in file : {files[file_path]['count']:>12} -- |")
+            logging.info(f"| -- Total {kind} created : {created:>12} -- |")
             
+            store._report.add_loading(file_path, {
+                "kind": kind,
+                "name": name,
+                "rows": files[file_path]['count'],
+                "created": created,
+                "bytes": files[file_path]['size'],
+                "seconds": seconds,
+                "rows_per_sec": files[file_path]['count'] / seconds if seconds else 0.,
+                "database": getattr(loader_obj, "files_stats", {}).get(file_path, {})
+            })
             
-    edges_items = tqdm(store._configs.edges.items(), desc='Loading edges ...')
+            with open(store._loader_path, "a") as f:
+                f.write(f"{file_path}\n")
+            store._already_loaded.append(f"{file_path}\n")
+                
+            if progress is not None:
+                progress.update(files[file_path]['count'])
+    return log_loaded
     
-    for edge, infos in edges_items:
+    
+def _load(
+    store: StoreInfo, 
+    loader_obj: Loader, 
+    clear_source : Union[List[str], bool] = None, 
+    concurrency: int = 1, 
+    snapshot_dir: str = None
+):
+    if snapshot_dir and not loader_obj.delta_loads:
+        raise ValueError(f"{type(loader_obj).__name__} can't delete nodes and edges, it doesn't support `snapshot_dir`")
+    
+    if not os.path.isdir("./output"):
+        print("ETL is not parsed, parsing...")
+        _parse(store)
+    
+    start = time.time()
+    
+    if concurrency > 1 and not loader_obj.concurrent_loads:
+        logging.warning(f"{type(loader_obj).__name__} doesn't support concurrent loads, loading one group at a time")
+        concurrency = 1
+    
+    configs = store._configs
+    
+    snapshot = None
+    if snapshot_dir:
+        from .delta import Snapshot
+        
+        # The files of the catalog are replaced by the inserted and updated rows of the delta
+        snapshot = Snapshot(snapshot_dir)
+        configs = snapshot.apply(store, loader_obj)
+        for kind, stats in snapshot.stats.items():
+            for name, stats_ in stats.items():
+                logging.info(f"{name:<30} delta : {stats_}")
+    
+    loader_obj.prepare(configs.to_dict())
+    
+    def load_nodes(node: str, infos: Dict, files: Dict):
+        logging.info(f"{node:<30} loading {len(files)} files...")
+        
+        loader_obj.load_node_group(
+            label=node,
+            primary_key=infos.primary_key,
+            files=files,
+            properties_type=infos.properties_type,
+            constraints=infos.constraints,
+            indexs=infos.indexs,
+            on_loaded=_on_loaded(store, loader_obj, "nodes", node, files, progress)
+        )
+        
+    def load_edges(edge: str, start_id: str, end_id: str, files: Dict):
+        logging.info(f"{edge:<30} loading {len(files)} files...")
         
+        loader_obj.load_edge_group(
+            edge_type=edge,
+            start=start_id,
+            end=end_id,
+            files=files,
+            on_loaded=_on_loaded(store, loader_obj, "edges", edge, files, progress)
+        )
+    
+    # Each task is a node label or a group of edge files with the same ends,
+    # an edge group depends on the labels of its ends that are loaded in this run
+    tasks: Dict[Tuple[str, ...], Tuple[Callable[[], None], List[Tuple[str, ...]], int]] = {}
+    
+    for node, infos in configs.nodes.items():
+        
+        files = {
+            file_path: {**metadatas.to_dict(), 'size': os.path.getsize(f"./output/nodes/{file_path}")}
+            for file_path, metadatas in infos.files.items()
+            if not (store._filters and store._filters.skip_load_node(metadatas.metadatas, node))
+            and f"{file_path}\n" not in store._already_loaded
+        }
+        if not files: continue
+        
+        tasks[("nodes", node)] = (
+            partial(load_nodes, node, infos, files),
+            [],
+            sum(metadatas['count'] for metadatas in files.values())
+        )
+    
+    supernodes_groups: List[Tuple[Tuple[str, str, str], Dict, List]] = []
+    for edge, infos in configs.edges.items():
+        
+        groups: Dict[Tuple[str, str], Dict] = {}
         for file_path, metadatas in infos.items():
             
-            if store._filters and store._filters.skip_load_edge(metadatas, edge): continue
+            if store._filters and store._filters.skip_load_edge(metadatas.metadatas, edge): continue
             
             if f"{file_path}\n" in store._already_loaded: continue
             
-            logging.info(f"{file_path:<30} loading...")
+            groups.setdefault((metadatas.start, metadatas.end), {})[file_path] = {
+                **metadatas.to_dict(), 'size': os.path.getsize(f"./output/edges/{file_path}")
+            }
+        
+        for (start_id, end_id), files in groups.items():
             
-            relationshipsCreated = loader_obj.load_edges(
-                file_path=file_path,
-                edge_type=edge,
-                start=metadatas.start,
-                end=metadatas.end,
-                metadatas=metadatas.to_dict(),
-                properties_type=metadatas.properties_type
-            )
+            dependencies = [
+                ("nodes", label) for label in {start_id.split(":")[0], end_id.split(":")[0]}
+                if ("nodes", label) in tasks
+            ]
             
-            logging.info(f"{file_path:<30} loaded    ")
-            logging.info(f"| -- Total edges in file : {metadatas.count:>12} -- |")
-            logging.info(f"| -- Total edges created : {relationshipsCreated:>12} -- |")
+            supernodes_files = {file_path: metadatas for file_path, metadatas in files.items() if metadatas.get("supernodes")}
+            files = {file_path: metadatas for file_path, metadatas in files.items() if not metadatas.get("supernodes")}
             
-            with open(store._loader_path, "a") as f:
-                f.write(f"{file_path}\n")
+            if files:
+                tasks[("edges", edge, start_id, end_id)] = (
+                    partial(load_edges, edge, start_id, end_id, files),
+                    dependencies,
+                    sum(metadatas['count'] for metadatas in files.values())
+                )
+            if supernodes_files:
+                supernodes_groups.append(((edge, start_id, end_id), supernodes_files, dependencies))
+    
+    # Edges of supernodes are loaded after the other edges of their group, one group at a time,
+    # so that their batches don't wait on the locks of the same nodes
+    previous = None
+    for (edge, start_id, end_id), files, dependencies in supernodes_groups:
+        key = ("supernodes", edge, start_id, end_id)
+        tasks[key] = (
+            partial(load_edges, edge, start_id, end_id, files),
+            dependencies + [
+                dependency for dependency in (("edges", edge, start_id, end_id), previous) if dependency in tasks
+            ],
+            sum(metadatas['count'] for metadatas in files.values())
+        )
+        previous = key
+    
+    progress = tqdm(total=sum(rows for (_, _, rows) in tasks.values()), desc='Loading ...', unit='rows', unit_scale=True)
+    
+    done, running = set(), {}
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        while len(done) < len(tasks):
+            for key, (task, dependencies, _) in tasks.items():
+                if len(running) >= concurrency: break
+                if key in done or key in running.values(): continue
+                if all(dependency in done for dependency in dependencies):
+                    running[executor.submit(task)] = key
+                    
+            finished, _ = wait(running.keys(), return_when=FIRST_COMPLETED)
+            for future in finished:
+                done.add(running.pop(future))
+                future.result()
+    
+    progress.close()
+    
+    if snapshot:
+        snapshot.save()
                 
     end = time.time()
     logging.info(f"ETL Loading in database took {(end-start)//60}m {(end-start)%60}s to finish")   
     
+    store._report.save()
+    
     logging.info("End of ETL, cleaning log file...")
     if os.path.exists(store._mapper_path):
         os.remove(store._mapper_path)
@@ -197,3 +765,79 @@ def _load(store: StoreInfo, loader_obj: Loader, clear_source : Union[List[str],
         os.remove(store._parser_path)
     if os.path.exists(store._loader_path):
         os.remove(store._loader_path)
+    if os.path.exists(loader_obj.offsets_path):
+        os.remove(loader_obj.offsets_path)
+    loader_obj._offsets = None
+
+    
+def _stream_nodes(store: StoreInfo, loader_obj: Loader, loading_queue: queue.Queue, errors: List[Exception]):
+    """
+    Load each node file put in `loading_queue` by ``StoreInfo.update_nodes`` until a ``None`` is received
+    """
+    while True:
+        item = loading_queue.get()
+        if item is None: break
+        
+        # After an error the queue is still emptied so that the parsing doesn't block
+        if errors: continue
+        
+        label, file_path = item
+        infos = store._configs.nodes[label]
+        metadatas = infos.files[file_path]
+        
+        if store._filters and store._filters.skip_load_node(metadatas.metadatas, label): continue
+        if f"{file_path}\n" in store._already_loaded: continue
+        
+        files = {file_path: {**metadatas.to_dict(), 'size': os.path.getsize(f"./output/nodes/{file_path}")}}
+        
+        try:
+            loader_obj.load_node_group(
+                label=label,
+                primary_key=infos.primary_key,
+                files=files,
+                properties_type=infos.properties_type,
+                constraints=infos.constraints,
+                indexs=infos.indexs,
+                on_loaded=_on_loaded(store, loader_obj, "nodes", label, files)
+            )
+        except Exception as e:
+            logging.error(f"{file_path:<30} failed to load : {e}")
+            errors.append(e)
+    
+    
+def _run(store: StoreInfo, loader_obj: Loader, concurrency: int = 1, queue_size: int = 16):
+    if not os.path.isdir("./output"):
+        _init(store)
+        
+    if not loader_obj.streaming_loads:
+        logging.warning(f"{type(loader_obj).__name__} needs the whole catalog before loading, parsing then loading")
+        _parse(store)
+        _load(store, loader_obj, concurrency=concurrency)
+        return
+    
+    n_workers = concurrency if loader_obj.concurrent_loads else 1
+    
+    loading_queue, errors = queue.Queue(maxsize=queue_size), []
+    workers = [
+        threading.Thread(target=_stream_nodes, args=(store, loader_obj, loading_queue, errors), daemon=True)
+        for _ in range(n_workers)
+    ]
+    for worker in workers:
+        worker.start()
+    
+    store._loading_queue = loading_queue
+    try:
+        _parse(store)
+    finally:
+        store._loading_queue = None
+        for _ in workers:
+            loading_queue.put(None)
+        for worker in workers:
+            worker.join()
+    
+    if errors:
+        raise errors[0]
+    
+    # The node files left (from sources parsed by a previous run) and every edge file,
+    # whose mappings are final once all the sources are parsed
+    _load(store, loader_obj, concurrency=concurrency)
@@ -0,0 +1,135 @@
+from typing import Dict
+
+import os
+import sys
+import logging
+import tracemalloc
+
+import polars as pl
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows
+    resource = None
+
+
+class MemoryProfiler:
+    def __init__(
+        self,
+        memory_budget: float = None,
+        top_allocations: int = 5,
+        trace_allocations: bool = True
+    ):
+        """
+        Opt-in memory profiler of the parsing functions, given to ``etl.init(profiler=...)``
+
+        For each parsing function, the RSS of the process and its growth during the function, the peak of the memory
+        traced by ``tracemalloc`` (reset for each function), its top allocations and the size of each dataframe 
+        given to ``save_nodes`` / ``save_edges`` are recorded in ``stats`` and in the run report.
+        Polars allocates its dataframes outside of the Python allocator, they are only visible in the RSS and the frames sizes.
+
+        Parameters
+        ----------
+        memory_budget : float
+            If given, a ``MemoryError`` is raised as soon as the RSS of the process exceeds this budget (in MB),
+            it is checked after each ``save_nodes`` / ``save_edges`` call and at the end of each parsing function
+        top_allocations : int
+            Number of the biggest allocations (by line of code) kept for each parsing function
+        trace_allocations : bool
+            If ``tracemalloc`` should be used, it slows down pure Python code
+
+        Examples
+        --------
+
+        >>> profiler = etl.MemoryProfiler(memory_budget=16_000)
+        >>> etl.init(profiler=profiler)
+        >>> etl.parse()
+        >>> profiler.stats["FUNCTION_parse_chembl"]["frames"]
+        """
+        self.memory_budget = memory_budget
+        self.top_allocations = top_allocations
+        self.trace_allocations = trace_allocations
+
+        self.stats: Dict[str, Dict] = {}
+        self._current: str = None
+        self._started_tracing = False
+        self._start_rss: float = None
+
+    def rss() -> float:
+        """
+        Resident set size of the process in MB, its peak when the current size isn't available (macOS), 
+        None when neither is (Windows)
+        """
+        if os.path.exists("/proc/self/statm"):
+            with open("/proc/self/statm", "r") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024**2
+        
+        if resource is None: return None
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+        return peak / 1024**2 if sys.platform == "darwin" else peak / 1024
+
+    def check_budget(self, where: str):
+        if self.memory_budget is None: return
+
+        rss = MemoryProfiler.rss()
+        if rss is not None and rss > self.memory_budget:
+            raise MemoryError(
+                f"{where} | RSS of {rss:.0f}MB exceeds the memory budget of {self.memory_budget:.0f}MB"
+            )
+
+    def start(self, func_uuid: str):
+        self._current = func_uuid
+        self.stats[func_uuid] = {"frames": []}
+        self._start_rss = MemoryProfiler.rss()
+
+        if self.trace_allocations:
+            self._started_tracing = not tracemalloc.is_tracing()
+            if self._started_tracing:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+
+    def record_frame(self, call: str, name: str, df: pl.DataFrame):
+        """
+        Record the size of a dataframe given to ``save_nodes`` / ``save_edges`` by the current parsing function
+        """
+        if self._current is None: return
+
+        self.stats[self._current]["frames"].append({
+            "call": call,
+            "name": name,
+            "rows": df.shape[0],
+            "mb": df.estimated_size("mb")
+        })
+
+        self.check_budget(f"{self._current} | {call}({name})")
+
+    def stop(self, check_budget: bool = True) -> Dict:
+        """
+        Stop profiling the current parsing function and return its statistics,
+        the memory budget is only checked with `check_budget` (not when the function failed)
+        """
+        func_uuid, self._current = self._current, None
+        stats = self.stats[func_uuid]
+
+        stats["rss_mb"] = MemoryProfiler.rss()
+        stats["rss_delta_mb"] = stats["rss_mb"] - self._start_rss if stats["rss_mb"] is not None else None
+        stats["largest_frame_mb"] = max((frame["mb"] for frame in stats["frames"]), default=0.)
+
+        if self.trace_allocations and tracemalloc.is_tracing():
+            stats["traced_peak_mb"] = tracemalloc.get_traced_memory()[1] / 1024**2
+            stats["top_allocations"] = [
+                str(stat) for stat in tracemalloc.take_snapshot().statistics("lineno")[:self.top_allocations]
+            ]
+            if self._started_tracing:
+                tracemalloc.stop()
+
+        logging.info(
+            f"| -- RSS delta : {stats['rss_delta_mb'] or 0.:>10.0f}MB, largest frame : {stats['largest_frame_mb']:>10.1f}MB -- |"
+        )
+
+        if check_budget:
+            self.check_budget(func_uuid)
+
+        return stats
@@ -0,0 +1,161 @@
+import os
+from typing import List, Dict, Tuple
+
+import polars as pl
+
+from .loader import Loader
+
+class RecordingLoader(Loader):
+
+    delta_loads = True
+
+    def __init__(
+        self,
+        rows_per_sec: float = 50_000,
+        file_overhead: float = 0.05,
+        **kwargs
+    ):
+        """
+        Loader object that doesn't load anything but records each call, used to test and benchmark the ETL without a database
+
+        Each call is appended to ``calls`` with the file, its size in bytes, its number of rows
+        and a simulated time computed from `rows_per_sec` and `file_overhead`.
+
+        Parameters
+        ----------
+        rows_per_sec : float
+            Simulated loading throughput of the database
+        file_overhead : float
+            Simulated time in seconds spent for each file (transaction, query compilation, round-trip...)
+
+        Examples
+        --------
+
+        >>> loader = RecordingLoader()
+        >>> etl.load(loader)
+        >>> loader.simulated_time
+        """
+        self.rows_per_sec = rows_per_sec
+        self.file_overhead = file_overhead
+
+        self.calls: List[Dict] = []
+        self.simulated_time: float = 0.
+
+    def _record(self, kind: str, file_path: str, **infos) -> int:
+        file_path_ = f"./output/{kind}/{file_path}"
+        count = pl.scan_csv(file_path_, separator=";", infer_schema_length=0).select(pl.count()).collect()[0, 0]
+        simulated_time = self.file_overhead + count / self.rows_per_sec
+
+        self.calls.append({
+            "kind": kind,
+            "file_path": file_path,
+            "size": os.path.getsize(file_path_),
+            "count": count,
+            "simulated_time": simulated_time,
+            **infos
+        })
+        self.simulated_time += simulated_time
+
+        return count
+
+    def load_nodes(
+        self,
+        file_path: str,
+        label: str,
+        primary_key: str,
+        metadatas: Dict,
+        properties_type: Dict[str, str],
+        constraints: List[str],
+        indexs: List[str]
+    ) -> int:
+        return self._record(
+            "nodes", file_path,
+            label=label,
+            primary_key=primary_key,
+            metadatas=metadatas,
+            properties_type=properties_type,
+            constraints=constraints,
+            indexs=indexs
+        )
+
+    def load_edges(
+        self,
+        file_path: str,
+        edge_type: str,
+        start: str,
+        end: str,
+        metadatas: Dict,
+        properties_type: Dict[str, str]
+    ) -> int:
+        return self._record(
+            "edges", file_path,
+            edge_type=edge_type,
+            start=start,
+            end=end,
+            metadatas=metadatas,
+            properties_type=properties_type
+        )
+
+    
+    def delete_nodes(self, label: str, primary_key: str, keys: List) -> int:
+        self.calls.append({"kind": "delete_nodes", "label": label, "primary_key": primary_key, "keys": keys, "count": len(keys)})
+        return len(keys)
+    
+    def delete_edges(self, edge_type: str, start: str, end: str, pairs: List[Tuple]) -> int:
+        self.calls.append({"kind": "delete_edges", "edge_type": edge_type, "start": start, "end": end, "pairs": pairs, "count": len(pairs)})
+        return len(pairs)
+
+
+class StubNeo4jDriver:
+
+    def __init__(self, rows_per_sec: float = 50_000):
+        """
+        Stand-in for a ``neo4j.Driver`` that records every query instead of sending it,
+        to be passed to ``Neo4JLoader(driver=StubNeo4jDriver())``
+
+        Loading queries are answered like ``apoc.periodic.iterate`` would,
+        using the number of rows of the loaded window of the file and a simulated `timeTaken`.
+
+        Parameters
+        ----------
+        rows_per_sec : float
+            Simulated loading throughput of the database
+        """
+        self.rows_per_sec = rows_per_sec
+        self.queries: List[Tuple[str, Dict]] = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def verify_connectivity(self):
+        pass
+
+    def close(self):
+        pass
+
+    def _count(self, file_path: str) -> int:
+        # Windows of a retried batch are written again with the same name, the files are counted at each query
+        path = file_path[len("file:"):]
+        if not os.path.exists(path):
+            path = path[1:]
+        return pl.scan_csv(path, separator=";", infer_schema_length=0).select(pl.count()).collect()[0, 0]
+
+    def execute_query(self, query: str, parameters_: Dict = None, **kwargs):
+        self.queries.append((query, parameters_))
+
+        if not parameters_ or "params" not in parameters_:
+            return ([], None, None)
+
+        total = self._count(parameters_["params"]["file_path"])
+
+        return ([{
+            "batches": 1,
+            "total": total,
+            "timeTaken": total / self.rows_per_sec,
+            "failedBatches": 0,
+            "errorMessages": {},
+            "updateStatistics": {"nodesCreated": total, "relationshipsCreated": total}
+        }], None, None)
@@ -0,0 +1,142 @@
+from typing import Dict, Union
+
+import json
+
+
+class RunReport:
+    """
+    Machine-readable statistics of an ETL run, filled by ``etl.parse`` and ``etl.load``
+
+    - `parsers`: for each parsing function, wall and CPU time, rows received, rows written,
+    duplicates dropped by ``unique`` and bytes written
+    - `mapping`: for each edge file, time spent mapping its `start` and `end`
+    - `loading`: for each loaded file, rows, elements created, time, rows per second
+    and the statistics returned by the database when the loader provides them
+    - `validation`: for each edge type checked by ``etl.validate_edges``, its rows and its dangling rows
+
+    Examples
+    --------
+
+    >>> report = etl.report("./reports/run.json", prometheus_path="./reports/etl.prom")
+    >>> RunReport.compare(RunReport.read("./reports/previous_run.json"), report)
+    """
+
+    def __init__(self, report: Dict = None):
+        report = report or {}
+        self.parsers: Dict[str, Dict] = report.get("parsers", {})
+        self.mapping: Dict[str, Dict] = report.get("mapping", {})
+        self.loading: Dict[str, Dict] = report.get("loading", {})
+        self.validation: Dict[str, Dict] = report.get("validation", {})
+
+    def add_parser(self, func_uuid: str, stats: Dict):
+        self.parsers[func_uuid] = stats
+
+    def add_mapping(self, file_path: str, edge_type: str, seconds: float, rows: int):
+        if file_path not in self.mapping:
+            self.mapping[file_path] = {"edge_type": edge_type, "seconds": 0., "rows": rows}
+        self.mapping[file_path]["seconds"] += seconds
+        self.mapping[file_path]["rows"] = rows
+
+    def add_loading(self, file_path: str, stats: Dict):
+        self.loading[file_path] = stats
+
+    def add_validation(self, edge_type: str, stats: Dict):
+        self.validation[edge_type] = stats
+
+    def to_dict(self) -> Dict:
+        return {
+            "parsers": self.parsers,
+            "mapping": self.mapping,
+            "loading": self.loading,
+            "validation": self.validation
+        }
+
+    def summary(self) -> Dict[str, Dict[str, Dict]]:
+        """
+        Statistics aggregated by parsing function, by edge type for the mapping and by label / edge type for the loading,
+        so that two runs (with different file names) can be compared
+        """
+        summary = {"parsers": {}, "mapping": {}, "loading": {}}
+
+        for func_uuid, stats in self.parsers.items():
+            summary["parsers"][func_uuid] = {k: v for k, v in stats.items() if isinstance(v, (int, float))}
+
+        for stage, key in (("mapping", "edge_type"), ("loading", "name")):
+            for stats in getattr(self, stage).values():
+                aggregated = summary[stage].setdefault(stats[key], {"seconds": 0., "rows": 0})
+                aggregated["seconds"] += stats["seconds"]
+                aggregated["rows"] += stats["rows"]
+
+        for stage in ("mapping", "loading"):
+            for aggregated in summary[stage].values():
+                aggregated["rows_per_sec"] = aggregated["rows"] / aggregated["seconds"] if aggregated["seconds"] else 0.
+
+        return summary
+
+    def to_prometheus(self) -> str:
+        lines = []
+
+        def add_metric(name: str, labels: Dict[str, str], value: float):
+            labels_str = ",".join(f'{k}="{v}"' for k, v in labels.items())
+            lines.append(f"graph_etl_{name}{{{labels_str}}} {value}")
+
+        for func_uuid, stats in self.parsers.items():
+            for k, v in stats.items():
+                if isinstance(v, (int, float)):
+                    add_metric(f"parser_{k}", {"parser": func_uuid}, v)
+
+        for file_path, stats in self.mapping.items():
+            add_metric("mapping_seconds", {"file": file_path, "edge_type": stats["edge_type"]}, stats["seconds"])
+
+        for file_path, stats in self.loading.items():
+            for k in ("rows", "created", "seconds", "rows_per_sec"):
+                add_metric(f"load_{k}", {"file": file_path, "kind": stats["kind"], "name": stats["name"]}, stats[k])
+
+        return "\n".join(lines) + "\n"
+
+    def save(self, path: str = "./output/report.json", prometheus_path: str = None):
+        """
+        Write the report in a JSON file at `path` and, if `prometheus_path` is given,
+        in a Prometheus textfile (for the node exporter textfile collector)
+        """
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=4, default=str)
+
+        if prometheus_path:
+            with open(prometheus_path, "w") as f:
+                f.write(self.to_prometheus())
+
+    def read(path: str) -> "RunReport":
+        with open(path, "r") as f:
+            return RunReport(json.load(f))
+
+    def compare(before: Union["RunReport", Dict], after: Union["RunReport", Dict]) -> Dict[str, Dict]:
+        """
+        Compare the summaries of two runs, each value becomes a dict with
+        the value `before`, the value `after` and their `ratio` (after / before)
+
+        Examples
+        --------
+
+        >>> diff = RunReport.compare(RunReport.read("monday.json"), RunReport.read("tuesday.json"))
+        >>> diff["parsers"]["FUNCTION_parse_chembl"]["wall_time"]
+        {'before': 120.4, 'after': 341.2, 'ratio': 2.83}
+        """
+        before = (before if isinstance(before, RunReport) else RunReport(before)).summary()
+        after = (after if isinstance(after, RunReport) else RunReport(after)).summary()
+
+        comparison = {}
+        for stage in ("parsers", "mapping", "loading"):
+            comparison[stage] = {}
+            for name in set(before[stage].keys()).union(after[stage].keys()):
+                stats_before, stats_after = before[stage].get(name, {}), after[stage].get(name, {})
+                comparison[stage][name] = {
+                    k: {
+                        "before": stats_before.get(k),
+                        "after": stats_after.get(k),
+                        "ratio": stats_after[k] / stats_before[k] if stats_before.get(k) and k in stats_after else None
+                    }
+                    for k in set(stats_before.keys()).union(stats_after.keys())
+                }
+
+        return comparison
@@ -0,0 +1,83 @@
+from typing import Dict, Set, Tuple
+
+import os
+import threading
+
+import polars as pl
+
+
+class SurrogateIds:
+
+    def __init__(self, directory: str = "./surrogate_ids"):
+        """
+        Persistent dictionaries that give a dense ``Int64`` to each key of a `(label, property)`,
+        the dictionary of `Label` and `id` is stored in `{directory}/Label.id.parquet`
+        and the same key gets the same integer in every run using this directory
+
+        Parameters
+        ----------
+        directory : str
+            Directory of the dictionaries, kept between runs (outside of `./output`)
+
+        Examples
+        --------
+
+        >>> ids = SurrogateIds("./surrogate_ids")
+        >>> ids.encode("Molecule", "id", pl.Series(["CHEMBL190461", "CHEMBL248702"]))
+        """
+        self.directory = directory
+
+        self._dictionaries: Dict[Tuple[str, str], pl.DataFrame] = {}
+        self._modified: Set[Tuple[str, str]] = set()
+        # Edge files can be encoded by several mapping threads
+        self._lock = threading.Lock()
+
+    def _path(self, label: str, prop: str) -> str:
+        return f"{self.directory}/{label}.{prop}.parquet"
+
+    def _dictionary(self, label: str, prop: str) -> pl.DataFrame:
+        if (label, prop) not in self._dictionaries:
+            path = self._path(label, prop)
+            if os.path.exists(path):
+                self._dictionaries[(label, prop)] = pl.read_parquet(path)
+            else:
+                self._dictionaries[(label, prop)] = pl.DataFrame(schema={"key": pl.Utf8, "sid": pl.Int64})
+        return self._dictionaries[(label, prop)]
+
+    def encode(self, label: str, prop: str, values: pl.Series) -> pl.Series:
+        """
+        Integer of each value (compared as strings), values seen for the first time get the next integers
+        """
+        keys = values.cast(pl.Utf8).to_frame("key")
+
+        with self._lock:
+            dictionary = self._dictionary(label, prop)
+            new_keys = keys.drop_nulls().unique(maintain_order=True).join(dictionary, on="key", how="anti")
+            if new_keys.shape[0]:
+                dictionary = pl.concat([
+                    dictionary,
+                    new_keys.with_row_count("sid", offset=dictionary.shape[0]).select(["key", pl.col("sid").cast(pl.Int64)])
+                ])
+                self._dictionaries[(label, prop)] = dictionary
+                self._modified.add((label, prop))
+
+        return keys.join(dictionary, on="key", how="left").get_column("sid").alias(values.name)
+
+    def decode(self, label: str, prop: str, sids: pl.Series) -> pl.Series:
+        """
+        Original key of each integer
+        """
+        return (
+            sids.cast(pl.Int64).to_frame("sid")
+                .join(self._dictionary(label, prop), on="sid", how="left")
+                .get_column("key").alias(sids.name)
+        )
+
+    def save(self):
+        """
+        Write the dictionaries that received new keys
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        for label, prop in self._modified:
+            self._dictionaries[(label, prop)].write_parquet(self._path(label, prop))
+        self._modified = set()
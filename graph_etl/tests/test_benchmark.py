@@ -0,0 +1,72 @@
+import pytest
+
+import graph_etl as etl
+from graph_etl.benchmark import generate_graph, run_benchmark
+
+
+def test_generate_graph():
+    
+    nodes, edges = generate_graph(n_nodes=1_000, n_edges=5_000, skew=3.0, width=2)
+    
+    assert nodes.shape == (1_000, 3)
+    assert edges.shape == (5_000, 2)
+    assert edges.get_column("start").value_counts().get_column("counts").max() > 100
+    
+
+def test_run_benchmark():
+    
+    loader = etl.RecordingLoader()
+    report = run_benchmark(loader, n_nodes=2_000, n_edges=10_000, n_sources=2)
+    
+    assert set(report.keys()) == {"parse", "map", "load"}
+    assert report["load"]["files"] == 4
+    assert sum(call["count"] for call in loader.calls if call["kind"] == "nodes") == 2_000
+    assert all(call["size"] > 0 for call in loader.calls)
+    
+
+def test_run_benchmark_keeps_output():
+    
+    etl.clear()
+    etl.init()
+    
+    with open("./output/marker", "w") as f:
+        f.write("kept")
+    
+    store = etl.utils.INFOS_SINGLETON
+    run_benchmark(n_nodes=1_000, n_edges=2_000)
+    
+    assert open("./output/marker").read() == "kept"
+    assert etl.utils.INFOS_SINGLETON is store
+    
+    etl.clear()
+    
+
+def test_sort_edges():
+    
+    report = run_benchmark(n_nodes=5_000, n_edges=50_000)
+    sorted_report = run_benchmark(n_nodes=5_000, n_edges=50_000, sort_edges=True)
+    
+    assert sorted_report["load"]["start_nodes_per_batch"] < report["load"]["start_nodes_per_batch"] / 2
+    
+
+def test_neo4j_stub_driver():
+    
+    etl.init()
+    
+    driver = etl.StubNeo4jDriver()
+    neo_connection = etl.Neo4JLoader(driver=driver, nodes_batch_size=1_000)
+    
+    nodes, edges = generate_graph(n_nodes=2_500, n_edges=100)
+    
+    with etl.Parser(source="test") as ctx:
+        ctx.save_nodes(nodes, "Node")
+        
+    etl.load(neo_connection)
+    
+    file_stats = list(neo_connection.files_stats.values())[0]
+    
+    assert file_stats["nodesCreated"] == 2_500
+    assert file_stats["batches"] == 2
+    assert len([query for (query, params) in driver.queries if params]) == 2
+    
+    etl.clear()
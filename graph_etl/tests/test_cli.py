@@ -0,0 +1,100 @@
+import os
+import json
+
+import polars as pl
+
+import graph_etl as etl
+from graph_etl.cli import main
+
+
+PARSERS = """
+import graph_etl as etl
+
+@etl.Parser(source="cli")
+def parse_cli_people(ctx):
+    ctx.save_nodes([{"id": i, "name": f"Person {i}"} for i in range(100)], "Person")
+    ctx.save_edges([{"start": f"Person {i}", "end": i+1} for i in range(99)], "KNOWS", start_id="Person:name", end_id="Person:id")
+"""
+
+PARSERS_MAPPING = """
+import graph_etl as etl
+
+@etl.Parser(source="cli")
+def parse_cli_mapped(ctx):
+    ctx.save_nodes([{"id": i} for i in range(10)], "Person")
+    ctx.save_nodes([{"id": i} for i in range(10)], "Company")
+    ctx.save_edges([{"start": i, "end": f"C{i+1}"} for i in range(9)], "WORKS_AT", start_id="Person:id", end_id="Company:id")
+    ctx.map_ids([{"old_value": f"C{i}", "new_value": i} for i in range(10)], "Company:id")
+"""
+
+CONFIG = """
+loader:
+  type: recording
+  rows_per_sec: 1000
+stages: [parse, map, load]
+workers:
+  map: 2
+"""
+
+
+def test_cli(tmp_path, monkeypatch):
+
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("parsers")
+    with open("parsers/people.py", "w") as f:
+        f.write(PARSERS)
+    with open("etl.yaml", "w") as f:
+        f.write(CONFIG)
+
+    main(["parsers", "--config", "etl.yaml", "--load-workers", "2"])
+
+    assert os.path.exists("./output/report.json")
+    assert not os.path.exists("./output/log_parser.txt")
+
+    with open("./output/configs/configs.json") as f:
+        configs = json.load(f)
+
+    assert list(configs["edges"]["KNOWS"].values())[0]["start"] == "Person:id"
+
+    main(["--stages", "report", "--report", "./run.json"])
+
+    with open("./run.json") as f:
+        report = json.load(f)
+
+    assert len(report["loading"]) == 2
+
+    main(["parsers", "--config", "etl.yaml", "--stages", "parse", "map", "report", "--report", "./run.json"])
+
+    with open("./run.json") as f:
+        report = json.load(f)
+
+    assert report["parsers"]["FUNCTION_parse_cli_people"]["nodes_out"] == 100
+    assert list(report["mapping"].values())[0]["rows"] == 99
+
+    monkeypatch.undo()
+    etl.clear()
+
+
+def test_cli_map_without_parse(tmp_path, monkeypatch):
+
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("parsers")
+    with open("parsers/people.py", "w") as f:
+        f.write(PARSERS_MAPPING)
+
+    main(["parsers", "--stages", "parse"])
+    etl.utils.INFOS_SINGLETON._ids_to_map = {}
+
+    # The mappings of `parse` are read back by a separate `map` run
+    main(["--stages", "map"])
+
+    with open("./output/configs/configs.json") as f:
+        configs = json.load(f)
+
+    file = list(configs["edges"]["WORKS_AT"].keys())[0]
+    edges = pl.read_csv(f"./output/edges/{file}", separator=";").drop_nulls("start")
+
+    assert sorted(edges.get_column("end").to_list()) == list(range(1, 10))
+
+    monkeypatch.undo()
+    etl.clear()
@@ -0,0 +1,47 @@
+import pytest
+
+import graph_etl as etl
+
+duckdb = pytest.importorskip("duckdb")
+
+
+def test_load_duckdb():
+    
+    etl.init()
+    
+    with etl.Parser(source="test", version=2) as ctx:
+        
+        person = [
+            {"id": "5", "name": "Andrew", "age": 25},
+            {"id": "8", "name": "Chloe", "age": 31},
+        ]
+        has_car = [
+            {"start": "5", "end": "E584-FRD"},
+            {"start": "8", "end": "E584-FRD"},
+            {"start": "9", "end": "P219-NDP"}, # Person 9 and car P219-NDP don't exist
+        ]
+        
+        ctx.save_nodes(person, "Person")
+        ctx.save_nodes([{"id": "E584-FRD", "brand": "BMW"}], "Car")
+        ctx.save_edges(has_car, "HAS_CAR", start_id="Person:id", end_id="Car:id", ignore_mapping=True)
+        
+    with etl.Parser(source="test2") as ctx:
+        ctx.save_nodes([{"id": "8", "name": "Chloe"}, {"id": "3", "name": "Tom"}], "Person")
+    
+    loader = etl.DuckDBLoader(":memory:")
+    etl.load(loader)
+    
+    persons = loader.query('SELECT id, name, source, version FROM "Person" ORDER BY id')
+    degrees = loader.degrees("HAS_CAR", direction="end")
+    dangling = loader.dangling_edges("HAS_CAR")
+    
+    assert persons["id"].to_list() == ["3", "5", "8"]
+    assert persons["source"].to_list() == ["test2", "test", "test"]
+    assert persons["version"].to_list() == [None, 2, 2]
+    
+    assert degrees.row(0) == ("E584-FRD", 2)
+    
+    assert dangling.shape[0] == 1
+    assert dangling["missing"][0] == "both"
+    
+    etl.clear()
@@ -0,0 +1,106 @@
+import os
+import json
+
+import polars as pl
+
+import graph_etl as etl
+
+
+def test_filter_push_down():
+    
+    etl.clear()
+    
+    filters = etl.Filter().only_nodes(["Person"]).only_edges(["KNOWS"])
+    etl.init(filters=filters)
+    
+    @etl.Parser(source="test")
+    def test_parsing(ctx: etl.Context):
+        for i in range(3):
+            ctx.save_nodes([{"id": 1, "name": "Tom"}], "Person")
+            ctx.save_nodes([{"id": 1, "brand": "BMW"}], "Car")
+        ctx.save_edges([{"start": 1, "end": 1}], "KNOWS", start_id="Person:id", end_id="Person:id")
+        ctx.save_edges([{"start": 1, "end": 1}], "OWNS", start_id="Person:id", end_id="Car:id")
+        
+    etl.parse()
+    
+    with open("./output/configs/configs.json", "r") as f:
+        configs = json.load(f)
+        
+    assert list(configs["nodes"].keys()) == ["Person"]
+    assert list(configs["edges"].keys()) == ["KNOWS"]
+    assert len(os.listdir("./output/nodes")) == 3
+    assert len(os.listdir("./output/edges")) == 1
+    
+    loader = etl.RecordingLoader()
+    etl.load(loader)
+    
+    assert len(loader.calls) == 4
+    
+    etl.clear()
+    
+    
+def test_filter_metadatas():
+    
+    filters = etl.Filter().only_nodes(["Person"]).filter_nodes("Person", pl.col("id") > 0).add_metadata("source", "test")
+    
+    assert "source" in filters
+    assert all(key not in filters for key in ("_only_nodes", "_decisions", "_predicates", "_dropped_properties"))
+    
+    assert not filters.skip_parse({"source": "test", "_decisions": "test"})
+    assert filters.skip_parse({"source": "other", "_only_nodes": "Person"})
+    
+    
+def test_filter_predicates():
+    
+    etl.clear()
+    
+    filters = (
+        etl.Filter()
+            .filter_nodes("Molecule", pl.col("phase") >= 3)
+            .drop_node_properties("Molecule", ["description", "id"])
+            .filter_edges("TARGETS", pl.col("score") > 0.5)
+            .drop_edge_properties("TARGETS", ["score", "start"])
+    )
+    etl.init(filters=filters)
+    
+    @etl.Parser(source="test")
+    def test_parsing(ctx: etl.Context):
+        ctx.save_nodes([{"id": i, "phase": i % 5, "description": "..."} for i in range(100)], "Molecule")
+        ctx.save_edges([{"start": i, "end": 0, "score": i / 100} for i in range(100)], "TARGETS", start_id="Molecule:id", end_id="Target:id")
+        
+    etl.parse()
+    
+    with open("./output/configs/configs.json", "r") as f:
+        configs = json.load(f)
+        
+    molecules = configs["nodes"]["Molecule"]
+    targets = list(configs["edges"]["TARGETS"].values())[0]
+    
+    assert set(molecules["properties_type"].keys()) == {"id", "phase"}
+    assert list(molecules["files"].values())[0]["count"] == 40
+    assert set(targets["properties_type"].keys()) == {"start", "end"}
+    assert targets["count"] == 49
+    
+    etl.clear()
+
+    
+    
+def test_filter_load():
+    
+    etl.clear()
+    etl.init()
+    
+    for source in ("a", "b"):
+        with etl.Parser(source=source, dataset=source) as ctx:
+            ctx.save_nodes([{"id": source}], "Person")
+            ctx.save_nodes([{"id": source}], "Car")
+    
+    # The catalog was parsed without filters, the files of the other dataset are skipped by the load
+    etl.init(filters=etl.Filter().add_metadata("dataset", "a").add_node("Car"), load_configs=True)
+    
+    loader = etl.RecordingLoader()
+    etl.load(loader)
+    
+    assert sorted(call["label"] for call in loader.calls) == ["Car", "Car", "Person"]
+    
+    etl.clear()
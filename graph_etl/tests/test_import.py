@@ -0,0 +1,38 @@
+import sys
+import json
+import subprocess
+
+
+def test_import_is_lazy():
+    
+    script = """
+import sys, json
+import graph_etl
+print(json.dumps([m for m in ("polars", "neo4j", "pyTigerGraph", "yaml", "dotwiz", "tqdm", "graph_etl.utils") if m in sys.modules]))
+"""
+    modules = json.loads(subprocess.check_output([sys.executable, "-c", script]))
+    
+    assert modules == []
+    
+    
+def test_import_time():
+    
+    # `-X importtime` measures the import of graph_etl alone, the interpreter startup isn't counted
+    res = subprocess.run([sys.executable, "-X", "importtime", "-c", "import graph_etl"], capture_output=True, text=True, check=True)
+    cumulative_us = next(
+        int(line.split("|")[1]) for line in res.stderr.splitlines() 
+        if line.startswith("import time:") and line.split("|")[-1].strip() == "graph_etl"
+    )
+    
+    # The lazy package takes well under a millisecond, importing polars or a driver alone takes tens of milliseconds
+    assert cumulative_us < 50_000
+    
+    
+def test_lazy_objects():
+    
+    import graph_etl as etl
+    
+    assert etl.Neo4JLoader.__name__ == "Neo4JLoader"
+    assert callable(etl.report)
+    assert etl.utils.INFOS_SINGLETON is not None
+    assert "Parser" in dir(etl)
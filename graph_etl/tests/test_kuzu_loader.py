@@ -0,0 +1,82 @@
+import pytest
+import logging
+import time
+
+import graph_etl as etl
+
+kuzu = pytest.importorskip("kuzu")
+
+
+def test_load_kuzu():
+
+    etl.init()
+
+    @etl.Parser(source="test", version=2)
+    def test_parsing(ctx: etl.Context):
+
+        person = [
+            {"id": i, "name": f"Person {i}", "tags": ["a", "b"]} for i in range(10_000)
+        ]
+        car = [
+            {"id": f"CAR-{i}", "brand": "BMW" if i % 2 else "Mercedes-Benz"} for i in range(1_000)
+        ]
+        drive = [
+            {"start": f"CAR-{i}", "end": f"Person {(i*7) % 10_000}", "since": "2021-05-01"} for i in range(1_000)
+        ]
+        owns = [
+            {"start": i, "end": f"CAR-{i % 1_000}"} for i in range(10_000)
+        ]
+
+        ctx.save_nodes(person, "Person")
+        ctx.save_nodes(car, "Car")
+        ctx.save_edges(owns, "OWNS", start_id="Person:id", end_id="Car:id")
+        ctx.save_edges(drive, "DRIVEN_BY", start_id="Car:id", end_id="Person:name", ignore_mapping=True)
+
+    start = time.time()
+    etl.parse(use_mapper=False)
+    parsed = time.time()
+
+    loader = etl.KuzuLoader()
+    etl.load(loader)
+    loaded = time.time()
+
+    logging.info(f"Kuzu benchmark : parse {parsed-start:.2f}s, load {loaded-parsed:.2f}s")
+
+    n_person = loader.graph.execute("MATCH (p:Person) RETURN count(p)").get_as_pl()[0, 0]
+    n_owns = loader.graph.execute("MATCH (:Person)-[r:OWNS]->(:Car) RETURN count(r)").get_as_pl()[0, 0]
+    metadatas = loader.graph.execute("MATCH (c:Car {id: 'CAR-1'}) RETURN c.brand, c.metadatas").get_as_pl()
+    driver = loader.graph.execute(
+        "MATCH (c:Car {id: 'CAR-1'})-[:DRIVEN_BY]->(p:Person) RETURN p.id, p.tags"
+    ).get_as_pl()
+
+    assert n_person == 10_000
+    assert n_owns == 10_000
+    assert metadatas[0, 0] == "BMW"
+    assert '"source": "test"' in metadatas[0, 1]
+    assert driver[0, 0] == 7
+    assert driver[0, 1].to_list() == ["a", "b"]
+
+    del loader
+    etl.clear()
+
+
+def test_kuzu_rejected_rows():
+
+    etl.clear()
+    etl.init()
+
+    with etl.Parser(source="test") as ctx:
+        ctx.save_nodes([{"id": i} for i in range(10)], "Person")
+
+    with etl.Parser(source="test2") as ctx:
+        ctx.save_nodes([{"id": i} for i in range(5, 15)], "Person")
+
+    loader = etl.KuzuLoader()
+    etl.load(loader)
+
+    # The nodes already copied from the first file are skipped by `IGNORE_ERRORS` and counted
+    assert sorted((stats["created"], stats["rejected"]) for stats in loader.files_stats.values()) == [(5, 5), (10, 0)]
+    assert loader.graph.execute("MATCH (p:Person) RETURN count(p)").get_as_pl()[0, 0] == 15
+
+    del loader
+    etl.clear()
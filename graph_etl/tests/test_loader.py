@@ -1,7 +1,10 @@
 import pytest
 
 import graph_etl as etl
+import os
 import json
+import time
+import threading
 
 def test_load_neo4j():
     
@@ -39,4 +42,723 @@ def test_load_neo4j():
     assert res_metadata[0][0]['metadata1'] == "2834"
     assert res_metadata[0][0]['metadata2'] == "metadata8"
 
-    etl.clear()
\ No newline at end of file
+    etl.clear()
+
+class FakeDriver:
+    def __init__(self, *args, **kwargs):
+        self.queries = []
+        
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *args):
+        pass
+        
+    def verify_connectivity(self):
+        pass
+    
+    def execute_query(self, query, parameters_=None, **kwargs):
+        self.queries.append((query, parameters_))
+        return ([{
+            "total": 1,
+            "failedBatches": 0,
+            "errorMessages": {},
+            "updateStatistics": {"nodesCreated": 1, "relationshipsCreated": 1}
+        }], None, None)
+
+
+def test_neo4j_queries_cache(monkeypatch):
+    
+    etl.init()
+    
+    monkeypatch.setattr("graph_etl.neo4j_loader.GraphDatabase.driver", FakeDriver)
+    neo_connection = etl.Neo4JLoader()
+    
+    with etl.Parser(source="test") as ctx:
+        ctx.save_nodes([{"id": "5", "name": "Andrew"}], "Person")
+        
+    with etl.Parser(source="test2") as ctx:
+        ctx.save_nodes([{"id": "8", "name": "Chloe"}], "Person")
+        
+    etl.load(neo_connection)
+    
+    loading_queries = [(query, params) for (query, params) in neo_connection.graph.queries if params]
+    
+    assert len(loading_queries) == 2
+    assert loading_queries[0][0] == loading_queries[1][0]
+    assert loading_queries[0][1]["params"]["file_path"] != loading_queries[1][1]["params"]["file_path"]
+    assert loading_queries[1][1]["params"]["metadatas"]["source"] == "test2"
+    assert neo_connection.cache_hits == 1
+    
+    etl.clear()
+
+
+class FailingDriver(FakeDriver):
+    def execute_query(self, query, parameters_=None, **kwargs):
+        if parameters_ and not any(params for (_, params) in self.queries):
+            self.queries.append((query, parameters_))
+            return ([{
+                "total": 0, 
+                "failedBatches": 1, 
+                "errorMessages": {"MemoryPoolOutOfMemoryError": 1}, 
+                "updateStatistics": {"nodesCreated": 0}
+            }], None, None)
+        return super().execute_query(query, parameters_=parameters_, **kwargs)
+
+
+def test_neo4j_retry_failed_batch(monkeypatch):
+    
+    etl.init()
+    
+    monkeypatch.setattr("graph_etl.neo4j_loader.GraphDatabase.driver", FailingDriver)
+    neo_connection = etl.Neo4JLoader(nodes_batch_size=1_000, retry_delay=0)
+    
+    with etl.Parser(source="test") as ctx:
+        ctx.save_nodes([{"id": "5", "name": "Andrew"}], "Person", constraints=[])
+        
+    etl.load(neo_connection)
+    
+    loading_params = [params for (query, params) in neo_connection.graph.queries if params]
+    file_stats = list(neo_connection.files_stats.values())[0]
+    
+    assert [params["batch_size"] for params in loading_params] == [1_000, 500]
+    assert file_stats["retries"] == 1
+    assert file_stats["batches"] == 1
+    assert file_stats["nodesCreated"] == 1
+    
+    etl.clear()
+
+
+class FakeTigerGraphConnection:
+    def __init__(self, *args, **kwargs):
+        self.queries = []
+        
+    def getVertexTypes(self):
+        return []
+    
+    def getEdgeTypes(self):
+        return []
+    
+    def getVertices(self, vertex_type):
+        return []
+    
+    def upsertVertices(self, vertex_type, vertices):
+        self.queries.append((vertex_type, vertices))
+        
+    def gsql(self, query):
+        self.queries.append(query)
+        return "\n".join(
+            f"| {file_var.split('=')[1]} | 2 | 2 | 0 |" 
+            for file_var in query.replace(",", " ").split() if ".csv" in file_var
+        )
+
+
+def test_tigergraph_single_schema_change(monkeypatch):
+    
+    etl.init()
+    
+    monkeypatch.setattr("graph_etl.tigergraph_loader.pyTigerGraph.TigerGraphConnection", FakeTigerGraphConnection)
+    tiger_connection = etl.TigerGraphLoader()
+    
+    with etl.Parser(source="test") as ctx:
+        ctx.save_nodes([{"id": "5", "name": "Andrew"}], "Person")
+        ctx.save_nodes([{"id": "E584-FRD", "brand": "BMW"}], "Car")
+        
+    with etl.Parser(source="test2") as ctx:
+        ctx.save_nodes([{"id": "8", "name": "Chloe"}], "Person")
+        ctx.save_edges([{"start": "8", "end": "E584-FRD"}], "HAS_CAR", start_id="Person:id", end_id="Car:id")
+        
+    etl.load(tiger_connection)
+    
+    queries = tiger_connection.graph.queries
+    schema_queries = [query for query in queries if "SCHEMA_CHANGE" in query]
+    loading_queries = [query for query in queries if "RUN LOADING JOB" in query]
+    
+    assert len(schema_queries) == 1
+    assert "ADD VERTEX Person" in schema_queries[0]
+    assert "ADD UNDIRECTED EDGE HAS_CAR" in schema_queries[0]
+    assert schema_queries[0].count("CREATE LOADING JOB") == 3
+    
+    assert len(loading_queries) == 3
+    
+    person_query = next(query for query in loading_queries if "load_node_Person" in query)
+    assert person_query.count(".csv") == 2
+    
+    etl.clear()
+
+
+class SlowTigerGraphConnection(FakeTigerGraphConnection):
+    def gsql(self, query):
+        if "RUN LOADING JOB" in query:
+            time.sleep(0.2)
+        return super().gsql(query)
+
+
+def test_tigergraph_group_seconds(monkeypatch):
+    
+    etl.init()
+    
+    monkeypatch.setattr("graph_etl.tigergraph_loader.pyTigerGraph.TigerGraphConnection", SlowTigerGraphConnection)
+    tiger_connection = etl.TigerGraphLoader()
+    
+    with etl.Parser(source="test") as ctx:
+        ctx.save_nodes([{"id": "5", "name": "Andrew"}], "Person")
+        
+    with etl.Parser(source="test2") as ctx:
+        ctx.save_nodes([{"id": str(i), "name": "Chloe"} for i in range(3)], "Person")
+        
+    etl.load(tiger_connection)
+    
+    # The time of the single job of Person is split between its files by rows
+    loading = etl.utils.INFOS_SINGLETON._report.loading
+    seconds = {stats["rows"]: stats["seconds"] for stats in loading.values()}
+    
+    assert seconds[3] == pytest.approx(3 * seconds[1])
+    assert seconds[1] + seconds[3] >= 0.2
+    
+    etl.clear()
+
+
+def test_tigergraph_metadata_as_id(monkeypatch):
+    
+    etl.init()
+    
+    monkeypatch.setattr("graph_etl.tigergraph_loader.pyTigerGraph.TigerGraphConnection", FakeTigerGraphConnection)
+    tiger_connection = etl.TigerGraphLoader(metadata_strategy="as_id")
+    
+    with etl.Parser(source="test") as ctx:
+        ctx.save_nodes([{"id": "5", "name": "Andrew"}], "Person")
+        ctx.save_nodes([{"id": "E584-FRD", "brand": "BMW"}], "Car")
+        
+    with etl.Parser(source="test2") as ctx:
+        ctx.save_nodes([{"id": "8", "name": "Chloe"}], "Person")
+        
+    etl.load(tiger_connection)
+    
+    queries = tiger_connection.graph.queries
+    schema_query = next(query for query in queries if "SCHEMA_CHANGE" in query)
+    metadata_upserts = [query for query in queries if isinstance(query, tuple)]
+    
+    assert "ADD VERTEX Metadata" in schema_query
+    assert "metadata_id INT" in schema_query
+    assert "'count'" not in schema_query
+    
+    assert len(metadata_upserts) == 1
+    assert all(set(attributes["metadatas"].keys()) == {"keylist", "valuelist"} for _, attributes in metadata_upserts[0][1])
+    assert sorted(
+        dict(zip(attributes["metadatas"]["keylist"], attributes["metadatas"]["valuelist"]))["source"] 
+        for _, attributes in metadata_upserts[0][1]
+    ) == ["test", "test2"]
+    
+    etl.clear()
+    
+    
+class ExistingMetadataTigerGraphConnection(FakeTigerGraphConnection):
+    def getVertices(self, vertex_type):
+        return [
+            {"v_id": "0", "attributes": {"metadatas": {"source": "old"}}}, 
+            {"v_id": "2", "attributes": {"metadatas": {"source": "test"}}}
+        ]
+    
+    
+def test_tigergraph_existing_metadata_ids(monkeypatch):
+    
+    etl.init()
+    
+    monkeypatch.setattr("graph_etl.tigergraph_loader.pyTigerGraph.TigerGraphConnection", ExistingMetadataTigerGraphConnection)
+    tiger_connection = etl.TigerGraphLoader(metadata_strategy="as_id")
+    
+    with etl.Parser(source="test") as ctx:
+        ctx.save_nodes([{"id": "5", "name": "Andrew"}], "Person")
+        
+    with etl.Parser(source="test2") as ctx:
+        ctx.save_nodes([{"id": "8", "name": "Chloe"}], "Person")
+        
+    etl.load(tiger_connection)
+    
+    metadata_upserts = [query for query in tiger_connection.graph.queries if isinstance(query, tuple)]
+    
+    # `test` keeps its id, `test2` gets a new one instead of the id of `test`
+    assert [
+        (metadata_id, dict(zip(attributes["metadatas"]["keylist"], attributes["metadatas"]["valuelist"]))["source"]) 
+        for metadata_id, attributes in metadata_upserts[0][1]
+    ] == [(3, "test2")]
+    
+    etl.clear()
+    
+    
+def test_resume_from_committed_offset(monkeypatch):
+    
+    etl.init()
+    
+    monkeypatch.setattr("graph_etl.neo4j_loader.GraphDatabase.driver", FakeDriver)
+    neo_connection = etl.Neo4JLoader(nodes_batch_size=1_000)
+    
+    with etl.Parser(source="test") as ctx:
+        ctx.save_nodes([{"id": str(i), "name": f"Person {i}"} for i in range(10)], "Person")
+        
+    file_name = list(etl.utils.INFOS_SINGLETON._configs.nodes.Person.files.keys())[0]
+    with open(neo_connection.offsets_path, "w+") as f:
+        f.write(f"{file_name};4\n")
+        
+    etl.load(neo_connection)
+    
+    loading_params = [params for (query, params) in neo_connection.graph.queries if params]
+    
+    assert loading_params[0]["params"]["file_path"].endswith("_rows_4.csv")
+    assert "skip" not in loading_params[0]["params"]["loader_options"]
+    assert not any("_rows_" in file for file in os.listdir("./output/nodes"))
+    assert neo_connection.files_stats[file_name]["resumed_from"] == 4
+    assert not os.path.exists(neo_connection.offsets_path)
+    
+    etl.clear()
+    etl.init()
+    
+    monkeypatch.setattr("graph_etl.tigergraph_loader.pyTigerGraph.TigerGraphConnection", FakeTigerGraphConnection)
+    tiger_connection = etl.TigerGraphLoader(batch_rows=4)
+    
+    with etl.Parser(source="test") as ctx:
+        ctx.save_nodes([{"id": str(i), "name": f"Person {i}"} for i in range(10)], "Person")
+        
+    file_name = list(etl.utils.INFOS_SINGLETON._configs.nodes.Person.files.keys())[0]
+    with open(tiger_connection.offsets_path, "w+") as f:
+        f.write(f"{file_name};2\n")
+        
+    etl.load(tiger_connection)
+    
+    loading_queries = [query for query in tiger_connection.graph.queries if "RUN LOADING JOB" in query]
+    
+    assert len(loading_queries) == 2
+    assert "_rows_2.csv" in loading_queries[0] and "_rows_6.csv" in loading_queries[1]
+    assert not any("_rows_" in file for file in os.listdir("./output/nodes"))
+    
+    etl.clear()
+    
+    
+class BlockingRecordingLoader(etl.RecordingLoader):
+    """
+    `Slow` is only loaded once `OWNS` is, which the scheduler can only do if it loads edges
+    as soon as their labels are loaded, while tracking the number of loads in flight
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.owns_loaded = threading.Event()
+        self.lock = threading.Lock()
+        self.in_flight, self.max_in_flight = 0, 0
+        
+    def _enter(self):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            
+    def _exit(self):
+        with self.lock:
+            self.in_flight -= 1
+    
+    def load_nodes(self, file_path, label, **kwargs):
+        self._enter()
+        try:
+            if label == "Slow":
+                assert self.owns_loaded.wait(timeout=10)
+            return super().load_nodes(file_path, label, **kwargs)
+        finally:
+            self._exit()
+        
+    def load_edges(self, file_path, edge_type, **kwargs):
+        self._enter()
+        try:
+            return super().load_edges(file_path, edge_type, **kwargs)
+        finally:
+            if edge_type == "OWNS":
+                self.owns_loaded.set()
+            self._exit()
+    
+    
+def test_load_scheduler():
+    
+    etl.clear()
+    etl.init()
+    
+    with etl.Parser(source="test") as ctx:
+        ctx.save_nodes([{"id": i} for i in range(10)], "Slow")
+        ctx.save_nodes([{"id": i} for i in range(10)], "Person")
+        ctx.save_nodes([{"id": i} for i in range(10)], "Car")
+        ctx.save_edges([{"start": i, "end": i} for i in range(10)], "OWNS", start_id="Person:id", end_id="Car:id")
+        ctx.save_edges([{"start": i, "end": i} for i in range(10)], "IS", start_id="Slow:id", end_id="Person:id")
+        
+    loader = BlockingRecordingLoader()
+    etl.load(loader, concurrency=2)
+    
+    order = [call.get("label") or call.get("edge_type") for call in loader.calls]
+    
+    assert len(order) == 5
+    assert order.index("OWNS") > max(order.index("Person"), order.index("Car"))
+    assert order.index("OWNS") < order.index("Slow")
+    assert order.index("IS") > order.index("Slow")
+    
+    # `Slow` was in flight while `OWNS` was loaded, and never more than `concurrency` loads at once
+    assert loader.max_in_flight == 2
+    
+    etl.clear()
+    
+    
+def test_compact():
+    
+    etl.clear()
+    etl.init()
+    
+    with etl.Parser(source="test") as ctx:
+        for i in range(20):
+            ctx.save_nodes([{"id": i}, {"id": i+1}], "Person")
+            ctx.save_edges([{"start": i, "end": i+1}], "KNOWS", start_id="Person:id", end_id="Person:id")
+            
+    with etl.Parser(source="test2") as ctx:
+        ctx.save_nodes([{"id": 0}], "Person")
+        
+    stats = etl.compact()
+    configs = etl.utils.INFOS_SINGLETON._configs
+    
+    assert stats["Person"] == {"files_in": 21, "files_out": 2, "duplicates": 19}
+    assert stats["KNOWS"]["files_out"] == 1
+    assert sum(infos.count for infos in configs.nodes.Person.files.values()) == 22
+    assert len(os.listdir("./output/nodes")) == 2
+    
+    loader = etl.RecordingLoader()
+    etl.load(loader)
+    
+    assert sum(call["count"] for call in loader.calls if call.get("label") == "Person") == 22
+    assert sum(call["count"] for call in loader.calls if call.get("edge_type") == "KNOWS") == 20
+    
+    etl.clear()
+    
+    
+def test_compact_committed_files():
+    
+    etl.clear()
+    etl.init()
+    
+    with etl.Parser(source="test") as ctx:
+        for i in range(5):
+            ctx.save_edges([{"start": i, "end": 10+i}, {"start": i, "end": 20+i}], "KNOWS", start_id="Person:id", end_id="Person:id")
+    
+    # A load was interrupted after committing the first row of a file
+    partially_loaded = sorted(etl.utils.INFOS_SINGLETON._configs.edges.KNOWS.keys())[0]
+    with open(etl.RecordingLoader.offsets_path, "w") as f:
+        f.write(f"{partially_loaded};1\n")
+        
+    stats = etl.compact()
+    
+    assert stats["KNOWS"] == {"files_in": 5, "files_out": 2, "duplicates": 0}
+    assert partially_loaded in etl.utils.INFOS_SINGLETON._configs.edges.KNOWS
+    assert etl.utils.INFOS_SINGLETON._configs.edges.KNOWS[partially_loaded].count == 2
+    
+    etl.clear()
+    
+    
+def test_supernodes():
+    
+    etl.clear()
+    etl.init()
+    
+    with etl.Parser(source="test") as ctx:
+        ctx.save_nodes([{"id": i} for i in range(100)], "Taxon")
+        ctx.save_edges([{"start": i, "end": 0} for i in range(1, 100)], "SUBCLASS_OF", start_id="Taxon:id", end_id="Taxon:id")
+        ctx.save_edges([{"start": i, "end": i+1} for i in range(1, 99)], "SUBCLASS_OF", start_id="Taxon:id", end_id="Taxon:id")
+        ctx.save_edges([{"start": i, "end": i+1} for i in range(1, 99)], "NEXT", start_id="Taxon:id", end_id="Taxon:id")
+        
+    degrees = etl.supernodes(threshold=10)
+    files = etl.utils.INFOS_SINGLETON._configs.edges.SUBCLASS_OF
+    
+    assert degrees["SUBCLASS_OF"]["end"]["max"] == 99
+    assert degrees["SUBCLASS_OF"]["end"]["supernodes"] == 1
+    assert degrees["NEXT"]["end"]["supernodes"] == 0
+    assert [infos.count for infos in files.values() if infos.get("supernodes")] == [99]
+    assert len(files) == 2
+    assert sum(infos.count for infos in files.values()) == 197
+    
+    loader = etl.RecordingLoader()
+    etl.load(loader, concurrency=4)
+    
+    edge_files = [call["file_path"] for call in loader.calls if call.get("edge_type") == "SUBCLASS_OF"]
+    
+    assert [file.endswith("_supernodes.csv") for file in edge_files] == [False, True]
+    
+    etl.clear()
+    
+    
+def test_supernodes_committed_files():
+    
+    etl.clear()
+    etl.init()
+    
+    with etl.Parser(source="test") as ctx:
+        for _ in range(2):
+            ctx.save_edges([{"start": i, "end": 0} for i in range(1, 20)] + [{"start": 1, "end": 2}], "SUBCLASS_OF", start_id="Taxon:id", end_id="Taxon:id")
+    
+    committed, split = sorted(etl.utils.INFOS_SINGLETON._configs.edges.SUBCLASS_OF.keys())
+    with open(etl.RecordingLoader.offsets_path, "w") as f:
+        f.write(f"{committed};5\n")
+        
+    etl.supernodes(threshold=10)
+    files = etl.utils.INFOS_SINGLETON._configs.edges.SUBCLASS_OF
+    
+    assert files[committed].count == 20
+    assert split not in files and not os.path.exists(f"./output/edges/{split}")
+    assert {file_name: infos.count for file_name, infos in files.items() if file_name != committed} == {
+        split.replace(".csv", "_supernodes.csv"): 19, split.replace(".csv", "_others.csv"): 1
+    }
+    
+    etl.clear()
+    
+    
+def test_validate_edges(monkeypatch):
+    
+    def parse():
+        etl.clear()
+        etl.init()
+        with etl.Parser(source="test") as ctx:
+            ctx.save_nodes([{"id": i} for i in range(10)], "Person")
+            ctx.save_edges([{"start": i, "end": i+2} for i in range(10)], "KNOWS", start_id="Person:id", end_id="Person:id")
+            ctx.save_edges([{"start": i, "end": f"CAR_{i%2}"} for i in range(10)], "OWNS", start_id="Person:id", end_id="Car:id")
+    
+    parse()
+    stats = etl.validate_edges()
+    
+    assert stats["KNOWS"] == {"rows": 10, "dangling": 2, "dangling_start": 0, "dangling_end": 2}
+    assert stats["OWNS"]["dangling"] == 10
+    assert etl.utils.INFOS_SINGLETON._report.validation["KNOWS"]["dangling"] == 2
+    
+    parse()
+    etl.validate_edges(dangling="drop")
+    configs = etl.utils.INFOS_SINGLETON._configs
+    
+    assert [infos.count for infos in configs.edges.KNOWS.values()] == [8]
+    assert all(file_name.endswith("_valid.csv") for file_name in configs.edges.KNOWS)
+    assert len(configs.edges.OWNS) == 0
+    assert len(os.listdir("./output/edges")) == 1
+    
+    parse()
+    partially_loaded = next(iter(etl.utils.INFOS_SINGLETON._configs.edges.KNOWS))
+    with open(etl.RecordingLoader.offsets_path, "w") as f:
+        f.write(f"{partially_loaded};3\n")
+    etl.validate_edges(dangling="drop")
+    
+    assert etl.utils.INFOS_SINGLETON._configs.edges.KNOWS[partially_loaded].count == 10
+    
+    parse()
+    etl.validate_edges(dangling="blank_nodes")
+    
+    monkeypatch.setattr("graph_etl.neo4j_loader.GraphDatabase.driver", FakeDriver)
+    neo_connection = etl.Neo4JLoader()
+    etl.load(neo_connection)
+    
+    blank_files = {
+        label: [infos.count for infos in configs.files.values() if infos.metadatas.get("blank_node")]
+        for label, configs in etl.utils.INFOS_SINGLETON._configs.nodes.items()
+    }
+    blank_queries = [query for (query, params) in neo_connection.graph.queries if params and ":BlankNode" in query]
+    
+    assert blank_files == {"Person": [2], "Car": [2]}
+    assert len(blank_queries) == 2
+    
+    etl.clear()
+    
+    
+def test_pipelined_run():
+    
+    etl.clear()
+    etl.init()
+    
+    loader = etl.RecordingLoader()
+    loaded_during_parsing = []
+    
+    @etl.Parser(source="person")
+    def parse_person(ctx: etl.Context):
+        ctx.save_nodes([{"id": i} for i in range(10)], "Person")
+        
+    @etl.Parser(source="car")
+    def parse_car(ctx: etl.Context):
+        for _ in range(100):
+            if loader.calls: break
+            time.sleep(0.01)
+        loaded_during_parsing.append([call["label"] for call in loader.calls])
+        
+        ctx.save_nodes([{"id": i} for i in range(10)], "Car")
+        ctx.save_edges([{"start": i, "end": i} for i in range(10)], "OWNS", start_id="Person:id", end_id="Car:id")
+        
+    etl.run(loader)
+    
+    assert loaded_during_parsing == [["Person"]]
+    assert [call.get("label") or call.get("edge_type") for call in loader.calls] == ["Person", "Car", "OWNS"]
+    
+    etl.clear()
+    etl.init()
+    
+    driver = etl.StubNeo4jDriver()
+    
+    @etl.Parser(source="person")
+    def parse_person(ctx: etl.Context):
+        ctx.save_nodes([{"id": i} for i in range(10)], "Person")
+        
+    @etl.Parser(source="person2")
+    def parse_other_person(ctx: etl.Context):
+        ctx.save_nodes([{"id": i} for i in range(10, 20)], "Person")
+    
+    etl.run(etl.Neo4JLoader(driver=driver))
+    
+    # The schema of a label is created once, not for each streamed file
+    assert len([query for (query, _) in driver.queries if "CREATE CONSTRAINT" in query and "(n:Person)" in query]) == 1
+    
+    etl.clear()
+    
+    
+def test_delta_load(tmp_path):
+    
+    def parse_and_load(people, knows):
+        etl.clear()
+        etl.init()
+        
+        with etl.Parser(source="test") as ctx:
+            ctx.save_nodes(people, "Person")
+            ctx.save_edges(knows, "KNOWS", start_id="Person:id", end_id="Person:id")
+            
+        loader = etl.RecordingLoader()
+        etl.load(loader, snapshot_dir=str(tmp_path))
+        return loader.calls
+    
+    people = [{"id": i, "name": f"Person {i}"} for i in range(10)]
+    knows = [{"start": i, "end": i+1, "since": 2000} for i in range(9)]
+    
+    calls = parse_and_load(people, knows)
+    
+    assert [call["count"] for call in calls] == [10, 9]
+    
+    people = people[:9] + [{"id": 10, "name": "Person 10"}]
+    people[3]["name"] = "Updated"
+    knows = knows[:8] + [{"start": 2, "end": 5, "since": 2000}]
+    knows[0]["since"] = 2024
+    
+    calls = parse_and_load(people, knows)
+    counts = {call["kind"]: call["count"] for call in calls}
+    deleted_edges = next(call for call in calls if call["kind"] == "delete_edges")
+    deleted_nodes = next(call for call in calls if call["kind"] == "delete_nodes")
+    
+    assert counts == {"nodes": 2, "edges": 2, "delete_nodes": 1, "delete_edges": 2}
+    assert deleted_nodes["keys"] == [9]
+    assert sorted(deleted_edges["pairs"]) == [(0, 1), (8, 9)]
+    
+    calls = parse_and_load(people, knows)
+    
+    assert [call["count"] for call in calls] == [0, 0]
+    
+    etl.clear()
+    
+    
+def test_delta_load_shared_pair(tmp_path):
+    
+    def parse_and_load(since_b):
+        etl.clear()
+        etl.init()
+        
+        with etl.Parser(source="A") as ctx:
+            ctx.save_nodes([{"id": i} for i in range(2)], "Person")
+            ctx.save_edges([{"start": 0, "end": 1, "since": 2000}], "KNOWS", start_id="Person:id", end_id="Person:id")
+        with etl.Parser(source="B") as ctx:
+            ctx.save_edges([{"start": 0, "end": 1, "since": since_b}], "KNOWS", start_id="Person:id", end_id="Person:id")
+            
+        loader = etl.RecordingLoader()
+        etl.load(loader, snapshot_dir=str(tmp_path))
+        return loader.calls
+    
+    parse_and_load(2000)
+    calls = parse_and_load(2024)
+    
+    # Deleting (0, 1) deletes the edge of `A` too, it is created again with the updated edge of `B`
+    assert [call["pairs"] for call in calls if call["kind"] == "delete_edges"] == [[(0, 1)]]
+    assert sum(call["count"] for call in calls if call["kind"] == "edges") == 2
+    
+    etl.clear()
+    
+    
+class FailingEdgesLoader(etl.RecordingLoader):
+    def load_edges(self, *args, **kwargs):
+        raise RuntimeError("Connection lost")
+    
+    
+def test_delta_load_retry(tmp_path):
+    
+    def parse(people, knows):
+        etl.clear()
+        etl.init()
+        
+        with etl.Parser(source="test") as ctx:
+            ctx.save_nodes(people, "Person")
+            ctx.save_edges(knows, "KNOWS", start_id="Person:id", end_id="Person:id")
+    
+    people = [{"id": i, "name": f"Person {i}"} for i in range(10)]
+    knows = [{"start": i, "end": i+1, "since": 2000} for i in range(9)]
+    
+    parse(people, knows)
+    etl.load(etl.RecordingLoader(), snapshot_dir=str(tmp_path))
+    
+    knows = knows[:8]
+    knows[0] = {**knows[0], "since": 2024}
+    
+    parse(people[:9], knows)
+    with pytest.raises(RuntimeError):
+        etl.load(FailingEdgesLoader(), snapshot_dir=str(tmp_path))
+    
+    loader = etl.RecordingLoader()
+    etl.load(loader, snapshot_dir=str(tmp_path))
+    
+    # The deletions were applied by the failed attempt and the nodes were loaded before it failed
+    assert [call["kind"] for call in loader.calls] == ["edges"]
+    assert [call["count"] for call in loader.calls] == [1]
+    
+    parse(people[:9], knows)
+    loader = etl.RecordingLoader()
+    etl.load(loader, snapshot_dir=str(tmp_path))
+    
+    assert [call["count"] for call in loader.calls] == [0, 0]
+    
+    with pytest.raises(ValueError):
+        etl.load(etl.DuckDBLoader(database_path=str(tmp_path / "graph.duckdb")), snapshot_dir=str(tmp_path))
+    
+    etl.clear()
+    
+    
+class ExistingEdgesDriver(etl.StubNeo4jDriver):
+    def execute_query(self, query, parameters_=None, **kwargs):
+        if query.startswith("MATCH (n:Person)-[r:KNOWS]->(m:Person)"):
+            self.queries.append((query, parameters_))
+            return ([{"start": "0", "end": "1", "since": "2000"}, {"start": "1", "end": "2", "since": "2000"}], None, None)
+        return super().execute_query(query, parameters_=parameters_, **kwargs)
+    
+    
+def test_neo4j_edges_upsert():
+    
+    etl.clear()
+    etl.init()
+    
+    with etl.Parser(source="test") as ctx:
+        ctx.save_nodes([{"id": i} for i in range(6)], "Person")
+        ctx.save_edges([{"start": i, "end": i+1, "since": 2000} for i in range(5)], "KNOWS", start_id="Person:id", end_id="Person:id")
+        
+    with etl.Parser(source="test2") as ctx:
+        ctx.save_edges([{"start": i, "end": i+1, "since": 2000} for i in range(3, 6)], "KNOWS", start_id="Person:id", end_id="Person:id")
+    
+    driver = ExistingEdgesDriver()
+    neo_connection = etl.Neo4JLoader(driver=driver, edge_strategy="merge", relationship_keys={"KNOWS": ["since"]})
+    etl.load(neo_connection)
+    
+    edges_queries = [(query, params) for (query, params) in driver.queries if params and "KNOWS" in query]
+    edges_stats = [stats for (file_name, stats) in neo_connection.files_stats.items() if "KNOWS" in file_name]
+    
+    assert all("MERGE (n)-[r:KNOWS {since: row.since}]->(m)" in query for (query, _) in edges_queries)
+    assert not any("IS RELATIONSHIP KEY" in query for (query, _) in driver.queries)
+    assert any("CREATE RANGE INDEX KNOWS_key" in query for (query, _) in driver.queries)
+    assert not [file_name for file_name in os.listdir("./output/edges") if file_name.endswith("_new.csv")]
+    assert len([query for (query, _) in driver.queries if query.startswith("MATCH (n:Person)-[r:KNOWS]")]) == 1
+    assert [stats["rows"] for stats in edges_stats] == [3, 1]
+    
+    etl.clear()
@@ -1,6 +1,7 @@
 import pytest
 
 import graph_etl as etl
+import polars as pl
 import json
 
 def test_decorator():
@@ -80,6 +81,83 @@ def test_with_keyword():
     
     etl.clear()
         
+def test_chunk_bytes():
+    
+    etl.clear()
+    etl.init(chunk_bytes=2_000, chunk_bytes_overrides={"Text": 20_000})
+    
+    with etl.Parser(source="test") as ctx:
+        ctx.save_nodes([{"id": i} for i in range(1_000)], "Person")
+        ctx.save_nodes([{"id": i, "text": "a"*100} for i in range(1_000)], "Text")
+        ctx.save_edges([{"start": i, "end": i+1} for i in range(1_000)], "KNOWS", start_id="Person:id", end_id="Person:id")
+        
+    with open("./output/configs/configs.json", "r") as f:
+        configs = json.load(f)
+        
+    person_files = list(configs["nodes"]["Person"]["files"].values())
+    text_files = list(configs["nodes"]["Text"]["files"].values())
+    edge_files = list(configs["edges"]["KNOWS"].values())
+    
+    # 8 bytes per Int64 row, about 100 bytes per text row
+    assert person_files[0]["chunk_rows"] == 250 and len(person_files) == 4
+    assert 150 < text_files[0]["chunk_rows"] < 200
+    assert edge_files[0]["chunk_rows"] == 125 and len(edge_files) == 8
+    assert all(infos["bytes"] > 0 for infos in person_files + text_files + edge_files)
+    
+    etl.clear()
+    
+    
+def test_surrogate_ids(tmp_path):
+    
+    def parse():
+        etl.clear()
+        etl.init(surrogate_ids=str(tmp_path))
+        
+        with etl.Parser(source="test") as ctx:
+            ctx.save_nodes([{"id": f"CHEMBL{i}", "name": f"Molecule {i}"} for i in range(5)], "Molecule")
+            ctx.save_nodes([{"id": f"P{i}"} for i in range(5)], "Target")
+            ctx.save_edges([{"start": f"CHEMBL{i}", "end": f"OLD{i}"} for i in range(5)], "TARGETS", start_id="Molecule:id", end_id="Target:id")
+            ctx.map_ids([{"old_value": f"OLD{i}", "new_value": f"P{(i+1)%5}"} for i in range(5)], "Target:id")
+        
+        configs = etl.utils.INFOS_SINGLETON._configs
+        nodes = pl.read_csv(f"./output/nodes/{list(configs.nodes.Molecule.files.keys())[0]}", separator=";")
+        edges = pl.read_csv(f"./output/edges/{list(configs.edges.TARGETS.keys())[0]}", separator=";")
+        return configs, nodes, edges
+    
+    configs, nodes, edges = parse()
+    
+    assert configs.nodes.Molecule.properties_type.id == "Int64"
+    assert configs.nodes.Molecule.properties_type.original_id == "Utf8"
+    assert sorted(nodes.get_column("id").to_list()) == [0, 1, 2, 3, 4]
+    assert edges.select(["start", "end"]).dtypes == [pl.Int64, pl.Int64]
+    
+    # `OLD{i}` is mapped to `P{i+1}` before being encoded, it doesn't get an integer of `Target`
+    ids = dict(zip(nodes.get_column("original_id"), nodes.get_column("id")))
+    targets = etl.utils.INFOS_SINGLETON._surrogates.encode("Target", "id", pl.Series([f"P{(i+1)%5}" for i in range(5)]))
+    assert sorted(edges.select(["start", "end"]).rows()) == sorted(zip([ids[f"CHEMBL{i}"] for i in range(5)], targets))
+    assert sorted(pl.read_parquet(f"{tmp_path}/Target.id.parquet").get_column("key")) == [f"P{i}" for i in range(5)]
+    
+    # The dictionary is kept between runs
+    _, nodes_2, _ = parse()
+    assert dict(zip(nodes_2.get_column("original_id"), nodes_2.get_column("id"))) == ids
+    
+    etl.clear()
+    etl.init(surrogate_ids=str(tmp_path))
+    
+    # Edges saved before the nodes of their ends are encoded once the primary key of the label is known
+    with etl.Parser(source="edges") as ctx:
+        ctx.save_edges([{"start": f"CHEMBL{i}", "end": f"G{i}"} for i in range(5)], "TARGETS", start_id="Molecule:id", end_id="Gene:id")
+        
+    with etl.Parser(source="nodes") as ctx:
+        ctx.save_nodes([{"id": f"CHEMBL{i}"} for i in range(5)], "Molecule")
+    
+    edges_infos = next(iter(etl.utils.INFOS_SINGLETON._configs.edges.TARGETS.values()))
+    assert edges_infos.surrogate_ids == ["start"]
+    assert edges_infos.properties_type.start == "Int64" and edges_infos.properties_type.end == "Utf8"
+    
+    etl.clear()
+    
+    
 def test_decorator_mapping():
     
     etl.init()
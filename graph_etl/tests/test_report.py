@@ -0,0 +1,104 @@
+import pytest
+import json
+import tracemalloc
+
+import graph_etl as etl
+
+
+def test_run_report():
+    
+    etl.clear()
+    etl.init()
+    
+    @etl.Parser(source="test")
+    def test_parsing(ctx: etl.Context):
+        
+        person = [
+            {"id": i % 800, "name": f"Person {i % 800}"} for i in range(1_000)
+        ]
+        knows = [
+            {"start": i, "end": (i+1) % 800} for i in range(800)
+        ]
+        
+        ctx.save_nodes(person, "Person")
+        ctx.save_edges(knows, "KNOWS", start_id="Person:id", end_id="Person:id")
+        
+    etl.parse()
+    
+    driver = etl.StubNeo4jDriver()
+    etl.load(etl.Neo4JLoader(driver=driver))
+    
+    report = etl.report("./output/run.json", prometheus_path="./output/etl.prom")
+    
+    with open("./output/run.json") as f:
+        saved = json.load(f)
+        
+    parser_stats = saved["parsers"]["FUNCTION_test_parsing"]
+    
+    assert parser_stats["rows_in"] == 1_800
+    assert parser_stats["duplicates_dropped"] == 200
+    assert parser_stats["nodes_out"] == 800
+    assert parser_stats["edges_out"] == 800
+    assert parser_stats["bytes_written"] > 0
+    assert parser_stats["cpu_time"] is not None
+    
+    assert len(saved["mapping"]) == 1
+    assert {stats["kind"] for stats in saved["loading"].values()} == {"nodes", "edges"}
+    assert all(stats["database"]["update_statistics"] for stats in saved["loading"].values())
+    
+    with open("./output/etl.prom") as f:
+        prometheus = f.read()
+    
+    assert 'graph_etl_parser_rows_in{parser="FUNCTION_test_parsing"} 1800' in prometheus
+    assert "graph_etl_load_rows_per_sec" in prometheus
+    
+    comparison = etl.RunReport.compare(saved, report)
+    
+    assert comparison["parsers"]["FUNCTION_test_parsing"]["rows_in"]["ratio"] == 1.
+    assert comparison["loading"]["Person"]["rows"]["after"] == 800
+    
+    etl.clear()
+    
+    
+def test_memory_profiler():
+    
+    etl.clear()
+    
+    profiler = etl.MemoryProfiler()
+    etl.init(profiler=profiler)
+    
+    with etl.Parser(source="test") as ctx:
+        ctx.save_nodes([{"id": i, "name": f"Person {i}"} for i in range(10_000)], "Person")
+        ctx.save_edges([{"start": i, "end": i+1} for i in range(5_000)], "KNOWS", start_id="Person:id", end_id="Person:id")
+        
+    stats = list(profiler.stats.values())[0]
+    
+    assert [(frame["call"], frame["rows"]) for frame in stats["frames"]] == [("save_nodes", 10_000), ("save_edges", 5_000)]
+    assert stats["largest_frame_mb"] > 0
+    assert stats["traced_peak_mb"] > 0
+    assert len(stats["top_allocations"]) == 5
+    assert list(etl.utils.INFOS_SINGLETON._report.parsers.values())[0]["rss_delta_mb"] == stats["rss_delta_mb"]
+    
+    etl.clear()
+    
+    etl.init(profiler=etl.MemoryProfiler(memory_budget=1))
+    
+    with pytest.raises(MemoryError):
+        with etl.Parser(source="test") as ctx:
+            ctx.save_nodes([{"id": 1}], "Person")
+            
+    etl.clear()
+    
+    # The exception of the parsing function isn't masked by the exceeded budget
+    etl.init(profiler=etl.MemoryProfiler(memory_budget=1))
+    
+    @etl.Parser(source="test")
+    def parse_failing(ctx: etl.Context):
+        raise ValueError("Malformed source")
+    
+    with pytest.raises(ValueError):
+        etl.parse()
+    
+    assert not tracemalloc.is_tracing()
+    
+    etl.clear()
@@ -1,15 +1,19 @@
 import os
-import csv
+import json
+import time
 import logging
 
-from typing import List, Dict
+from typing import List, Dict, Tuple, Set, Union, Literal, Callable
 
 import yaml
+import polars as pl
 import pyTigerGraph
 
 from .loader import Loader
 
 class TigerGraphLoader(Loader):
+    
+    streaming_loads = False
 
     def type_mapping(prop):
         if "Utf8" in prop:
@@ -32,6 +36,9 @@ class TigerGraphLoader(Loader):
     
     def __init__(
         self,
+        concurrency: int = 4,
+        metadata_strategy: Union[Literal["as_property"], Literal["as_id"], Literal["as_edge"]] = "as_property",
+        batch_rows: int = None,
         **kwargs
     ):
         """
@@ -39,6 +46,17 @@ class TigerGraphLoader(Loader):
 
         Parameters
         ----------
+        concurrency : int
+            Number of files of a loading job read in parallel by TigerGraph
+        metadata_strategy : one of ``"as_property"``, ``"as_id"`` or ``"as_edge"``
+            - if `"as_property"`: metadatas are stored in a `metadatas` map attribute of every vertex and edge
+            - if `"as_id"`: each distinct set of metadatas is stored once in a `Metadata` vertex,
+            vertices and edges only store its integer id in a `metadata_id` attribute
+            - if `"as_edge"`: same as `"as_id"` but vertices are also linked to their `Metadata` vertex
+            by a `HAS_METADATA` edge
+        batch_rows : int
+            If given, files with more rows are loaded in windows of `batch_rows` rows (one ``RUN LOADING JOB`` each)
+            and the row offset is recorded after each window, an interrupted load continues from the last loaded window
         **kwargs : optional
             Everything in kwargs argument will be passed to create a ``pyTigerGraph.TigerGraphConnection``
             
@@ -82,6 +100,306 @@ class TigerGraphLoader(Loader):
             raise ConnectionError("No TigerGraph instance found, check config at : ./output/config.yaml")
         
         self.graph.gsql("CREATE GRAPH Default()")
+        self.graph.graphname = "Default"
+        
+        self.concurrency = concurrency
+        self.batch_rows = batch_rows
+        self._jobs_files: Dict[str, Tuple[str, str]] = {}
+        
+        self.metadata_strategy = metadata_strategy
+        if self.metadata_strategy not in ("as_property", "as_id", "as_edge"):
+            raise ValueError("`metadata_strategy` must be either 'as_property', 'as_id' or 'as_edge'")
+        
+        self._metadatas_ids: Dict[str, int] = {}
+        self._pending_metadatas: List[Tuple[int, Dict]] = []
+        
+        if self.metadata_strategy != "as_property":
+            try:
+                for vertex in self.graph.getVertices("Metadata"):
+                    key = json.dumps(vertex["attributes"]["metadatas"], sort_keys=True)
+                    self._metadatas_ids[key] = int(vertex["v_id"])
+            except: pass
+    
+    def _existing_types(self) -> Tuple[Set[str], Set[str]]:
+        try:
+            return set(self.graph.getVertexTypes()), set(self.graph.getEdgeTypes())
+        except:
+            return set(), set()
+    
+    def _metadata_attribute(self) -> str:
+        return "metadatas MAP" if self.metadata_strategy == "as_property" else "metadata_id INT"
+    
+    def _metadata_schema(self, vertex_types: Set[str], edge_types: Set[str]) -> List[str]:
+        schema = []
+        if self.metadata_strategy != "as_property" and "Metadata" not in vertex_types:
+            schema.append("""
+            ADD VERTEX Metadata (
+                PRIMARY_ID id INT,
+                metadatas MAP<STRING, STRING>
+            );""")
+            vertex_types.add("Metadata")
+        if self.metadata_strategy == "as_edge" and "HAS_METADATA" not in edge_types:
+            schema.append("""
+            ADD DIRECTED EDGE HAS_METADATA (
+                FROM *, 
+                TO Metadata
+            );""")
+            edge_types.add("HAS_METADATA")
+        return schema
+    
+    def _metadata_value(self, metadatas: Dict) -> str:
+        """
+        Constant loaded in the metadata attribute of every row of a file : the whole metadatas 
+        with `"as_property"`, otherwise the id of the `Metadata` vertex of the source metadatas
+        """
+        if self.metadata_strategy == "as_property":
+            return f"{metadatas}"
+        
+        source_metadatas = {k: str(v) for k, v in metadatas["metadatas"].items()}
+        key = json.dumps(source_metadatas, sort_keys=True)
+        
+        if key not in self._metadatas_ids:
+            # Ids of the `Metadata` vertices already in the graph are not always contiguous
+            self._metadatas_ids[key] = max(self._metadatas_ids.values(), default=-1) + 1
+            self._pending_metadatas.append((self._metadatas_ids[key], source_metadatas))
+            
+        return f"{self._metadatas_ids[key]}"
+    
+    def _vertex_schema(self, label: str, primary_key: str, properties_type: Dict[str, str]) -> str:
+        prop_mapped = ",\n\t\t".join(
+            f"{'PRIMARY_ID ' if k == primary_key else ''}{k} { TigerGraphLoader.csv_mapping(property) }" 
+            for k, property in TigerGraphLoader._ordered(properties_type, primary_key)
+        )
+        
+        return f"""
+            ADD VERTEX {label} (
+                {prop_mapped},
+                {self._metadata_attribute()}
+            );"""
+        
+    def _edge_schema(self, edge_type: str, endpoints: List[Tuple[str, str]], properties_type: Dict[str, str]) -> str:
+        attributes = [" | ".join(f"FROM {start_label}, TO {end_label}" for start_label, end_label in endpoints)]
+        attributes += [
+            f"{k} { TigerGraphLoader.csv_mapping(property) }" for k, property in properties_type.items() if k not in ("start", "end")
+        ]
+        attributes += [self._metadata_attribute()]
+        prop_mapped = ",\n\t\t".join(attributes)
+        
+        return f"""
+            ADD UNDIRECTED EDGE {edge_type} (
+                {prop_mapped}
+            );"""
+        
+    def _ordered(properties_type: Dict[str, str], primary_key: str) -> List[Tuple[str, str]]:
+        return sorted(properties_type.items(), key=lambda item: item[0] != primary_key)
+    
+    def _node_job(
+        self, 
+        job_name: str, 
+        label: str, 
+        primary_key: str, 
+        properties_type: Dict[str, str], 
+        files: Dict[str, Dict]
+    ) -> str:
+        values = ', '.join(f'$"{k}"' for k, _ in TigerGraphLoader._ordered(properties_type, primary_key))
+        
+        statements = []
+        for i, (file_name, metadatas) in enumerate(files.items()):
+            statements.append(f"DEFINE FILENAME f{i};")
+            statements.append(f'LOAD f{i} TO VERTEX {label} VALUES ({values}, "{self._metadata_value(metadatas)}") USING header="true", separator=";";')
+            if self.metadata_strategy == "as_edge":
+                statements.append(
+                    f'LOAD f{i} TO EDGE HAS_METADATA VALUES ($"{primary_key}" {label}, "{self._metadata_value(metadatas)}") USING header="true", separator=";";'
+                )
+            self._jobs_files[file_name] = (job_name, f"f{i}")
+        
+        return TigerGraphLoader._loading_job(job_name, statements)
+    
+    def _edge_job(
+        self, 
+        job_name: str, 
+        edge_type: str, 
+        endpoints: List[Tuple[str, str]], 
+        properties_type: Dict[str, str], 
+        files: Dict[str, Dict]
+    ) -> str:
+        statements = []
+        for i, (file_name, metadatas) in enumerate(files.items()):
+            if len(endpoints) > 1:
+                start_label, end_label = metadatas["start"].split(":")[0], metadatas["end"].split(":")[0]
+                values = [f'$"start" {start_label}', f'$"end" {end_label}']
+            else:
+                values = ['$"start"', '$"end"']
+            values += [
+                f'$"{k}"' if k in metadatas["properties_type"] else "_" 
+                for k in properties_type.keys() if k not in ("start", "end")
+            ]
+            
+            statements.append(f"DEFINE FILENAME f{i};")
+            statements.append(
+                f'LOAD f{i} TO EDGE {edge_type} VALUES ({", ".join(values)}, "{self._metadata_value(metadatas)}") USING header="true", separator=";";'
+            )
+            self._jobs_files[file_name] = (job_name, f"f{i}")
+        
+        return TigerGraphLoader._loading_job(job_name, statements)
+    
+    def _loading_job(job_name: str, statements: List[str]) -> str:
+        statements_str = "\n\t\t\t".join(statements)
+        return f"""
+        DROP JOB {job_name}
+        CREATE LOADING JOB {job_name} FOR GRAPH Default {{
+            {statements_str}
+        }}"""
+    
+    def _submit(self, schema: List[str], jobs: List[str]):
+        """
+        Compile every schema change and every loading job in a single GSQL request
+        """
+        QUERY = "USE GRAPH Default"
+        
+        if schema:
+            schema_str = "".join(schema)
+            QUERY += f"""
+        CREATE SCHEMA_CHANGE JOB add_schema FOR GRAPH Default {{{schema_str}
+        }}
+        RUN SCHEMA_CHANGE JOB add_schema
+        DROP JOB add_schema"""
+        
+        QUERY += "".join(jobs)
+        
+        res = self.graph.gsql(QUERY)
+        
+        if self._pending_metadatas:
+            # REST++ expects a MAP attribute as its list of keys and its list of values
+            self.graph.upsertVertices("Metadata", [
+                (metadata_id, {"metadatas": {"keylist": list(metadatas.keys()), "valuelist": list(metadatas.values())}})
+                for metadata_id, metadatas in self._pending_metadatas
+            ])
+            self._pending_metadatas = []
+        
+        return res
+    
+    def _run_jobs(self, files: Dict[str, str], rows: Dict[str, int] = None, seconds: Dict[str, float] = None) -> Dict[str, int]:
+        """
+        Run the loading jobs of `files` (a dict of file name to the path of the file in TigerGraph),
+        all the files of the same job are loaded by a single ``RUN LOADING JOB`` 
+        
+        The time of each job is added to `seconds`, split between its files by their number of `rows`
+        """
+        jobs: Dict[str, Dict[str, str]] = {}
+        for file_name, file_path in files.items():
+            job_name, file_var = self._jobs_files[file_name]
+            jobs.setdefault(job_name, {})[file_name] = f'{file_var}="{file_path}"'
+        
+        rows = rows or {}
+        seconds = {} if seconds is None else seconds
+        
+        n_loaded = {}
+        for job_name, using in jobs.items():
+            start = time.time()
+            res = self.graph.gsql(f"""USE GRAPH Default
+            RUN LOADING JOB {job_name} USING {', '.join(using.values())}, CONCURRENCY={self.concurrency}""")
+            elapsed = time.time() - start
+            
+            job_rows = sum(rows.get(file_name, 0) for file_name in using)
+            for file_name in using:
+                seconds[file_name] = elapsed * rows.get(file_name, 0) / job_rows if job_rows else elapsed / len(using)
+            
+            for file_name, file_path in files.items():
+                loaded_name = os.path.basename(file_path)
+                line = next((line for line in res.splitlines() if loaded_name in line and ".csv |" in line), None)
+                if line is not None:
+                    n_loaded[file_name] = int(line.split("|")[3])
+        
+        return n_loaded
+    
+    def _run_windows(self, kind: str, file_name: str, offset: int) -> int:
+        """
+        Load the rows of a file after `offset` in windows of ``batch_rows`` rows, each window is written
+        next to the file and loaded by its own ``RUN LOADING JOB`` before its offset is recorded
+        """
+        df = pl.read_csv(f"./output/{kind}/{file_name}", separator=";", infer_schema_length=0)
+        size = self.batch_rows or df.shape[0]
+        
+        if offset:
+            logging.info(f"{file_name:<30} resuming from row {offset}")
+        
+        n_loaded = 0
+        while offset < df.shape[0]:
+            window_name = f"{file_name[:-len('.csv')]}_rows_{offset}.csv"
+            df.slice(offset, size).write_csv(f"./output/{kind}/{window_name}", separator=";")
+            
+            n_loaded += self._run_jobs({file_name: f"/data/{kind}/{window_name}"}).get(file_name, 0)
+            os.remove(f"./output/{kind}/{window_name}")
+            
+            offset = min(offset + size, df.shape[0])
+            self._commit_offset(file_name, offset)
+        
+        return n_loaded
+    
+    def _run_files(self, kind: str, files: Dict[str, Dict], seconds: Dict[str, float] = None) -> Dict[str, int]:
+        """
+        Files without a committed offset and smaller than ``batch_rows`` are loaded together,
+        the others are loaded in windows from their committed offset, 
+        the loading time of each file is added to `seconds`
+        """
+        seconds = {} if seconds is None else seconds
+        
+        whole, windowed = {}, {}
+        for file_name, metadatas in files.items():
+            offset = self._committed_offset(file_name)
+            if offset == 0 and (self.batch_rows is None or metadatas.get("count", 0) <= self.batch_rows):
+                whole[file_name] = f"/data/{kind}/{file_name}"
+            else:
+                windowed[file_name] = offset
+        
+        rows = {file_name: metadatas.get("count", 0) for file_name, metadatas in files.items()}
+        n_loaded = self._run_jobs(whole, rows, seconds) if whole else {}
+        for file_name, offset in windowed.items():
+            start = time.time()
+            n_loaded[file_name] = self._run_windows(kind, file_name, offset)
+            seconds[file_name] = time.time() - start
+        
+        return n_loaded
+    
+    def prepare(self, configs: Dict):
+        """
+        Add every missing vertex and edge type of the catalog in a single schema change
+        and create one loading job per vertex / edge type with a filename variable for each of its files
+        """
+        vertex_types, edge_types = self._existing_types()
+        
+        schema, jobs = self._metadata_schema(vertex_types, edge_types), []
+        
+        for label, infos in configs["nodes"].items():
+            if label not in vertex_types:
+                schema.append(self._vertex_schema(label, infos["primary_key"], infos["properties_type"]))
+                
+            jobs.append(self._node_job(
+                f"load_node_{label}", label, infos["primary_key"], infos["properties_type"], infos["files"]
+            ))
+            
+        for edge_type, files in configs["edges"].items():
+            files = {
+                file_name: metadatas for file_name, metadatas in files.items()
+                if metadatas["start"].endswith(":id") and metadatas["end"].endswith(":id")
+            }
+            if not files: continue
+            
+            endpoints, properties_type = [], {}
+            for metadatas in files.values():
+                endpoint = (metadatas["start"].split(":")[0], metadatas["end"].split(":")[0])
+                if endpoint not in endpoints:
+                    endpoints.append(endpoint)
+                properties_type.update(metadatas["properties_type"])
+            
+            if edge_type not in edge_types:
+                schema.append(self._edge_schema(edge_type, endpoints, properties_type))
+                
+            jobs.append(self._edge_job(f"load_edge_{edge_type}", edge_type, endpoints, properties_type, files))
+        
+        self._submit(schema, jobs)
+    
     
     def load_nodes(
         self,
@@ -128,41 +446,17 @@ class TigerGraphLoader(Loader):
         )
         """
         
-        file_path = f"/data/nodes/{file_path}"
-        
-        prop_mapped = ",\n\t\t".join(
-            f"{'PRIMARY_ID ' if k in constraints else ''}{k} { TigerGraphLoader.csv_mapping(property) }" for k, property in properties_type.items()
-        )
-        
-        file_name = file_path.split("/")[-1].split(".")[0]
-        
-        QUERY = f"""
-        USE GRAPH Default
-        CREATE SCHEMA_CHANGE JOB add_node_{file_name} FOR GRAPH Default {{
-            ADD VERTEX {label} (
-                {prop_mapped},
-                metadatas MAP
-            );
-        }}
-        RUN SCHEMA_CHANGE JOB add_node_{file_name}"""
-        
-        res = self.graph.gsql(QUERY)
-        
-        QUERY = f"""
-        USE GRAPH Default
-        CREATE LOADING JOB load_node_{file_name} FOR GRAPH Default {{
-            DEFINE FILENAME file1="{file_path}";
-            LOAD file1 TO VERTEX {label} VALUES ({', '.join(f'$"{k}"' for k in properties_type.keys())}, "{metadatas}") USING header="true", separator=";";
-        }}
-        RUN LOADING JOB load_node_{file_name}"""
-        
-        res = self.graph.gsql(QUERY)
-        n_loaded = int(next(line for line in res.splitlines() if ".csv |" in line).split("|")[3])
-        
-        self.graph.gsql(f"""USE GRAPH Default
-        DROP LOADING JOB load_node_{file_name}""")
+        if file_path not in self._jobs_files:
+            vertex_types, edge_types = self._existing_types()
+            file_name = file_path.split(".")[0]
+            
+            self._submit(
+                self._metadata_schema(vertex_types, edge_types) + 
+                ([self._vertex_schema(label, primary_key, properties_type)] if label not in vertex_types else []),
+                [self._node_job(f"load_node_{file_name}", label, primary_key, properties_type, {file_path: metadatas})]
+            )
         
-        return n_loaded
+        return self._run_files("nodes", {file_path: metadatas}).get(file_path, 0)
     
     def load_edges(
         self,
@@ -215,53 +509,94 @@ class TigerGraphLoader(Loader):
         if start_id != "id" or end_id != "id":
             raise ValueError("With TigerGraph, joins between vertex only is supported for `id` vertex attribute")
         
-        header_path = os.path.abspath(f"./output/edges/{file_path}").replace('\\', '/')
-        if header_path[0] == '/':
-            header_path = header_path[1:]
-
-        trailing_slash = "/" if ":/" not in header_path else ""
-
-        file_path = f"/data/edges/{file_path}"
+        if file_path not in self._jobs_files:
+            vertex_types, edge_types = self._existing_types()
+            file_name = file_path.split(".")[0]
+            
+            self._submit(
+                self._metadata_schema(vertex_types, edge_types) + 
+                ([self._edge_schema(edge_type, [(start_label, end_label)], properties_type)] if edge_type not in edge_types else []),
+                [self._edge_job(
+                    f"load_edge_{file_name}", edge_type, [(start_label, end_label)], properties_type, 
+                    {file_path: {**metadatas, "start": start, "end": end, "properties_type": properties_type}}
+                )]
+            )
         
-        with open(trailing_slash+header_path) as f:
-            csv_reader = csv.reader(f, delimiter=';')
-            header = next(csv_reader)
-            header.remove("start")
-            header.remove("end")
-
-
-        prop_mapped = ",\n\t\t".join(
-            f"{k} { TigerGraphLoader.csv_mapping(property) }" for k, property in properties_type.items() if k not in ("start", "end")
-        )
+        return self._run_files("edges", {file_path: metadatas}).get(file_path, 0)
+    
+    def load_node_group(
+        self,
+        label: str,
+        primary_key: str,
+        files: Dict[str, Dict],
+        properties_type: Dict[str, str],
+        constraints: List[str],
+        indexs: List[str],
+        on_loaded: Callable[..., None] = None
+    ) -> Dict[str, int]:
+        """
+        Load all the files of a label with a single ``RUN LOADING JOB`` (large or partially loaded files by windows), 
+        files missing from the prepared job are first added to a new job
+        """
+        missing = {file_path: metadatas for file_path, metadatas in files.items() if file_path not in self._jobs_files}
+        if missing:
+            vertex_types, edge_types = self._existing_types()
+            file_name = next(iter(missing)).split(".")[0]
+            
+            self._submit(
+                self._metadata_schema(vertex_types, edge_types) + 
+                ([self._vertex_schema(label, primary_key, properties_type)] if label not in vertex_types else []),
+                [self._node_job(f"load_node_{file_name}", label, primary_key, properties_type, missing)]
+            )
         
-        file_name = file_path.split("/")[-1].split(".")[0]
+        seconds = {}
+        n_loaded = self._run_files("nodes", files, seconds)
         
-        QUERY = f"""
-        USE GRAPH Default
-        CREATE SCHEMA_CHANGE JOB add_edge_{file_name} FOR GRAPH Default {{
-            ADD UNDIRECTED EDGE {edge_type} (
-                FROM {start_label}, 
-                TO {end_label},
-                {prop_mapped},
-                metadatas MAP
-            );
-        }}
-        RUN SCHEMA_CHANGE JOB add_edge_{file_name}"""
+        for file_path in files.keys():
+            n_loaded.setdefault(file_path, 0)
+            if on_loaded: on_loaded(file_path, n_loaded[file_path], seconds.get(file_path))
         
-        res = self.graph.gsql(QUERY)
+        return n_loaded
+    
+    def load_edge_group(
+        self,
+        edge_type: str,
+        start: str,
+        end: str,
+        files: Dict[str, Dict],
+        on_loaded: Callable[..., None] = None
+    ) -> Dict[str, int]:
+        """
+        Load all the files of an edge type with a single ``RUN LOADING JOB`` (large or partially loaded files by windows), 
+        files missing from the prepared job are first added to a new job
+        """
+        start_label, start_id = start.split(':')
+        end_label, end_id = end.split(':')
         
-        QUERY = f"""
-        USE GRAPH Default
-        CREATE LOADING JOB load_edge_{file_name} FOR GRAPH Default {{
-            DEFINE FILENAME file1="{file_path}";
-            LOAD file1 TO EDGE {edge_type} VALUES ({', '.join(f'$"{k}"' for k in properties_type.keys())}, "{metadatas}") USING header="true", separator=";";
-        }}
-        RUN LOADING JOB load_edge_{file_name}"""
+        if start_id != "id" or end_id != "id":
+            raise ValueError("With TigerGraph, joins between vertex only is supported for `id` vertex attribute")
         
-        res = self.graph.gsql(QUERY)
-        n_loaded = int(next(line for line in res.splitlines() if ".csv |" in line).split("|")[3])
+        missing = {file_path: metadatas for file_path, metadatas in files.items() if file_path not in self._jobs_files}
+        if missing:
+            vertex_types, edge_types = self._existing_types()
+            file_name = next(iter(missing)).split(".")[0]
+            
+            properties_type = {}
+            for metadatas in missing.values():
+                properties_type.update(metadatas["properties_type"])
+            
+            self._submit(
+                self._metadata_schema(vertex_types, edge_types) + 
+                ([self._edge_schema(edge_type, [(start_label, end_label)], properties_type)] if edge_type not in edge_types else []),
+                [self._edge_job(f"load_edge_{file_name}", edge_type, [(start_label, end_label)], properties_type, missing)]
+            )
         
-        self.graph.gsql(f"""USE GRAPH Default
-        DROP LOADING JOB load_edge_{file_name}""")
+        seconds = {}
+        n_loaded = self._run_files("edges", files, seconds)
+        
+        for file_path in files.keys():
+            n_loaded.setdefault(file_path, 0)
+            if on_loaded: on_loaded(file_path, n_loaded[file_path], seconds.get(file_path))
         
         return n_loaded
+
@@ -4,17 +4,25 @@ import uuid
 import json
 import os
 import time
+import queue
 import logging
 
 from dotwiz import DotWiz
 
-from .pipeline import _init, _load, _parse, _map_property
+from .pipeline import _init, _load, _parse, _run, _map_property, _compact, _supernodes, _validate_edges
 from .context import Context
+from .run_report import RunReport
 
 if TYPE_CHECKING:
     from .callbacks import Callback
     from .filters import Filter
     from .loader import Loader
+    from .profiling import MemoryProfiler
+    from .surrogates import SurrogateIds
+    import polars as pl
+    
+# Size of the chunk files written by `save_nodes` / `save_edges`, estimated from the size of the dataframe
+DEFAULT_CHUNK_BYTES = 32_000_000
     
 class StoreInfo:
     def __init__(self):
@@ -22,38 +30,62 @@ class StoreInfo:
         self._parser_path = os.path.abspath("./output/log_parser.txt")
         self._mapper_path = os.path.abspath("./output/log_mapper.txt")
         self._loader_path = os.path.abspath("./output/log_loader.txt")
+        self._mappings_path = os.path.abspath("./output/configs/mappings")
 
-        if os.path.exists(self._parser_path):
-            with open(self._parser_path) as f:
-                self._already_parsed = f.readlines()
-        else:
-            self._already_parsed = []
-            
-        if os.path.exists(self._mapper_path):
-            with open(self._mapper_path) as f:
-                self._already_mapped = f.readlines()
-        else:
-            self._already_mapped = []
-                
-        if os.path.exists(self._loader_path):
-            with open(self._loader_path) as f:
-                self._already_loaded = f.readlines()
-        else:
-            self._already_loaded = []
+        # The log files of a previous run are read on first use
+        self._already_parsed_: List[str] = None
+        self._already_mapped_: List[str] = None
+        self._already_loaded_: List[str] = None
         
         self.clear()
         
+    def _read_log(path: str) -> List[str]:
+        if os.path.exists(path):
+            with open(path) as f:
+                return f.readlines()
+        return []
+    
+    @property
+    def _already_parsed(self) -> List[str]:
+        if self._already_parsed_ is None:
+            self._already_parsed_ = StoreInfo._read_log(self._parser_path)
+        return self._already_parsed_
+    
+    @property
+    def _already_mapped(self) -> List[str]:
+        if self._already_mapped_ is None:
+            self._already_mapped_ = StoreInfo._read_log(self._mapper_path)
+        return self._already_mapped_
+    
+    @property
+    def _already_loaded(self) -> List[str]:
+        if self._already_loaded_ is None:
+            self._already_loaded_ = StoreInfo._read_log(self._loader_path)
+        return self._already_loaded_
+        
     def clear(self):
         self._stats_store = {
             "nodes_count": 0,
             "edges_count": 0,
             "nodes_count_source": 0,
             "edges_count_source": 0,
+            "rows_in_source": 0,
+            "duplicates_source": 0,
+            "bytes_source": 0,
             "total_time": 0
         }
         
+        self._report = RunReport()
+        
         self._filters: Filter = None
         self._callbacks: List[Callback] = None
+        self._profiler: MemoryProfiler = None
+        self._loading_queue: queue.Queue = None
+        
+        self._chunk_bytes: int = DEFAULT_CHUNK_BYTES
+        self._chunk_bytes_overrides: Dict[str, int] = {}
+        self._sort_edges: bool = False
+        self._surrogates: SurrogateIds = None
         
         self._all_parsing_functions : Dict[str, Tuple[Callable[..., None], Dict]] = {}
         self._ids_to_map = {}
@@ -72,12 +104,32 @@ class StoreInfo:
                 'nodes': {},
                 'edges': {}
             })
-
+        
+        # The mappings of the parsing functions of a previous run, for a `map` stage without `parse`
+        import polars as pl
+        for id_to_map, file in self._read_mappings_index().items():
+            self._ids_to_map[id_to_map] = pl.read_parquet(os.path.join(self._mappings_path, file))
     
-    def add_mapping(self, id_to_map: str, mapping: Any):
+    def _read_mappings_index(self) -> Dict[str, str]:
+        index_path = os.path.join(self._mappings_path, "mappings.json")
+        if os.path.exists(index_path):
+            with open(index_path) as f:
+                return json.load(f)
+        return {}
+    
+    def add_mapping(self, id_to_map: str, mapping: pl.DataFrame):
         self._ids_to_map[id_to_map] = mapping
+        
+        # Mappings are written next to the catalog so that the `map` stage can run apart from `parse`
+        index = self._read_mappings_index()
+        index.setdefault(id_to_map, f"{len(index)}.parquet")
+        
+        os.makedirs(self._mappings_path, exist_ok=True)
+        mapping.write_parquet(os.path.join(self._mappings_path, index[id_to_map]))
+        with open(os.path.join(self._mappings_path, "mappings.json"), "w") as f:
+            json.dump(index, f, indent=4)
     
-    def save_parser_infos(self, func_uuid : str, time : float):
+    def save_parser_infos(self, func_uuid : str, time : float, cpu_time : float = None, memory : Dict = None):
         with open(f"./output/configs/configs.json", "w") as f:
             json.dump(self._configs, f, indent=4)
         
@@ -85,52 +137,133 @@ class StoreInfo:
         logging.info(f"| -- Total nodes : {self._stats_store['nodes_count_source']:>12} -- |")
         logging.info(f"| -- Total edges : {self._stats_store['edges_count_source']:>12} -- |")
         
+        self._report.add_parser(func_uuid, {
+            "wall_time": time,
+            "cpu_time": cpu_time,
+            "rows_in": self._stats_store['rows_in_source'],
+            "nodes_out": self._stats_store['nodes_count_source'],
+            "edges_out": self._stats_store['edges_count_source'],
+            "duplicates_dropped": self._stats_store['duplicates_source'],
+            "bytes_written": self._stats_store['bytes_source'],
+            **(memory or {})
+        })
+        
         self._stats_store['nodes_count'] += self._stats_store['nodes_count_source']
         self._stats_store['edges_count'] += self._stats_store['edges_count_source']
         
         self._stats_store['nodes_count_source'] = 0
         self._stats_store['edges_count_source'] = 0
+        self._stats_store['rows_in_source'] = 0
+        self._stats_store['duplicates_source'] = 0
+        self._stats_store['bytes_source'] = 0
         
         self._stats_store['total_time'] += time
         
+        if self._surrogates:
+            self._surrogates.save()
+        
         with open(self._parser_path, "a") as f:
             f.write(f"{func_uuid}\n")
         
-    def update_nodes(self, label: str, file_name : str, default_infos: Dict, metadatas: Dict, count: int):
+    def update_source_stats(self, rows_in: int, duplicates: int):
+        self._stats_store['rows_in_source'] += rows_in
+        self._stats_store['duplicates_source'] += duplicates
+        
+    def chunk_rows(self, name: str, df: pl.DataFrame) -> int:
+        """
+        Number of rows of each chunk file of the label or edge type `name`, 
+        so that a chunk is about `chunk_bytes` (or its override for `name`) given the estimated width of the rows of `df`
+        """
+        chunk_bytes = self._chunk_bytes_overrides.get(name, self._chunk_bytes)
+        if df.shape[0] == 0:
+            return 1
+        
+        row_bytes = max(df.estimated_size() / df.shape[0], 1.)
+        return max(1, int(chunk_bytes // row_bytes))
+    
+    def update_nodes(self, label: str, file_name : str, default_infos: Dict, metadatas: Dict, count: int, chunk_rows: int = None):
         if label not in self._configs.nodes:
             self._configs.nodes[label] = default_infos
         
+        size = os.path.getsize(f"./output/nodes/{file_name}")
         self._configs.nodes[label].files[file_name] = {
             'metadatas': metadatas,
-            'count': count
+            'count': count,
+            'bytes': size,
+            'chunk_rows': chunk_rows
         }
         self._stats_store['nodes_count_source'] += count
+        self._stats_store['bytes_source'] += size
         
+        if self._loading_queue is not None:
+            self._loading_queue.put((label, file_name))
         
-    def update_edges(self, edge_type: str, file_name : str, default_infos: Dict, metadatas: Dict, count: int):
+        
+    def update_edges(self, edge_type: str, file_name : str, default_infos: Dict, metadatas: Dict, count: int, chunk_rows: int = None):
         if edge_type not in self._configs.edges:
             self._configs.edges[edge_type] = {}
             
+        size = os.path.getsize(f"./output/edges/{file_name}")
         self._configs.edges[edge_type][file_name] = {
             **default_infos,
             'metadatas': metadatas,
-            'count': count
+            'count': count,
+            'bytes': size,
+            'chunk_rows': chunk_rows
         }
         self._stats_store['edges_count_source'] += count
+        self._stats_store['bytes_source'] += size
         
     def set_filters(self, filters: Filter = None):
         self._filters = filters
         
     def set_callbacks(self, callbacks: List[Callback] = None):
         self._callbacks = callbacks
+        
+    def set_profiler(self, profiler: MemoryProfiler = None):
+        self._profiler = profiler
+        
+    def set_chunk_bytes(self, chunk_bytes: int = None, chunk_bytes_overrides: Dict[str, int] = None):
+        self._chunk_bytes = chunk_bytes or DEFAULT_CHUNK_BYTES
+        self._chunk_bytes_overrides = chunk_bytes_overrides or {}
+        
+    def set_sort_edges(self, sort_edges: bool = False):
+        self._sort_edges = sort_edges
+        
+    def set_surrogate_ids(self, directory: str = None):
+        from .surrogates import SurrogateIds
+        self._surrogates = SurrogateIds(directory) if directory else None
+        
+    def uses_surrogate_ids(self, id_: str) -> bool:
+        """
+        If the values of `id_` (of the form `Label`:`property`) are replaced by surrogate ids,
+        i.e. `property` is the primary key of `Label`, unknown until the nodes of `Label` are saved
+        """
+        if not self._surrogates: return False
+        
+        label, prop = id_.split(":")
+        return label in self._configs.nodes and self._configs.nodes[label].primary_key == prop
 
 INFOS_SINGLETON = StoreInfo()
 
-def init(filters: Filter = None, callbacks: List[Callback] = None, load_configs=False):
+def init(
+    filters: Filter = None, 
+    callbacks: List[Callback] = None, 
+    load_configs=False, 
+    profiler: MemoryProfiler = None,
+    chunk_bytes: int = None,
+    chunk_bytes_overrides: Dict[str, int] = None,
+    sort_edges: bool = False,
+    surrogate_ids: str = None
+):
     global INFOS_SINGLETON
     if load_configs:
         INFOS_SINGLETON.load_configs()
-    _init(INFOS_SINGLETON, filters=filters, callbacks=callbacks)
+    _init(
+        INFOS_SINGLETON, filters=filters, callbacks=callbacks, profiler=profiler, 
+        chunk_bytes=chunk_bytes, chunk_bytes_overrides=chunk_bytes_overrides, sort_edges=sort_edges,
+        surrogate_ids=surrogate_ids
+    )
 
 def parse(use_mapper=True):
     """
@@ -153,9 +286,99 @@ def parse(use_mapper=True):
     _parse(INFOS_SINGLETON, use_mapper=use_mapper)
     
     
-def load(loader_obj: Loader, clear_source : Union[List[str], bool] = None):
+def validate_edges(dangling: str = "report") -> Dict[str, Dict[str, int]]:
+    """
+    Use this function after calling `etl.parse()` and before `etl.load()`
+    
+    Check that the `start` and `end` of every edge are parsed nodes (with polars anti-joins on the keys of each label),
+    the number of dangling edges of each edge type is logged and added to the report
+
+    Parameters
+    ----------
+    dangling : one of ``"report"``, ``"drop"`` or ``"blank_nodes"``
+        - if `"report"`: files are left untouched
+        - if `"drop"`: dangling edges are removed from the files, the database doesn't look them up
+        - if `"blank_nodes"`: the missing ends are written once in a node file of their label, 
+        with the metadata `blank_node` (and the `BlankNode` label in Neo4j), loaded before the edges
+        
+    Returns
+    -------
+    For each edge type, its number of `rows`, of `dangling` rows and of rows whose `start` or `end` is missing
+        
+    Examples
+    --------
+
+    >>> etl.parse()
+    >>> etl.validate_edges(dangling="drop")["TARGETS"]["dangling"]
+    """
+    global INFOS_SINGLETON
+    return _validate_edges(INFOS_SINGLETON, dangling=dangling)
+
+
+def compact(target_bytes: int = 64_000_000, sort_edges: bool = None) -> Dict[str, Dict[str, int]]:
+    """
+    Use this function after calling `etl.parse()` and before `etl.load()`
+    
+    Merge the small files written by each `save_nodes` / `save_edges` into files of about `target_bytes`,
+    files of the same label or edge type are merged if they have the same metadatas and columns,
+    duplicated nodes (or edges) are dropped and the catalog is updated
+
+    Parameters
+    ----------
+    target_bytes : int
+        Size of the merged files
+    sort_edges : bool
+        If edge files are sorted by `start` then `end`, by default if `sort_edges` was given to `etl.init()`
+        
+    Returns
+    -------
+    For each label and edge type, its number of files before (`files_in`) and after (`files_out`) 
+    the compaction and the number of `duplicates` dropped
+        
+    Examples
+    --------
+
+    >>> etl.parse()
+    >>> etl.compact(target_bytes=128_000_000)
+    >>> etl.load(loader)
+    """
+    global INFOS_SINGLETON
+    return _compact(INFOS_SINGLETON, target_bytes=target_bytes, sort_edges=sort_edges)
+    
+    
+def supernodes(threshold: int = 10_000) -> Dict[str, Dict]:
+    """
+    Use this function after calling `etl.parse()` and before `etl.load()`
+    
+    Compute the degree of the `start` and `end` nodes of each edge type, the edges of nodes
+    with more than `threshold` edges (supernodes, e.g. the root of an ontology) are moved to dedicated files 
+    that are loaded after the other edges of their group, one group at a time and with smaller batches (see `supernodes_batch_size` of `Neo4JLoader`)
+
+    Parameters
+    ----------
+    threshold : int
+        Minimum degree of a supernode
+        
+    Returns
+    -------
+    For each edge type, the degree distribution of its `start` and `end` nodes (also stored in `degrees` in the catalog)
+        
+    Examples
+    --------
+
+    >>> etl.parse()
+    >>> etl.supernodes(threshold=50_000)["SUBCLASS_OF"]["end"]["max"]
+    """
+    global INFOS_SINGLETON
+    return _supernodes(INFOS_SINGLETON, threshold=threshold)
+
+
+def load(loader_obj: Loader, clear_source : Union[List[str], bool] = None, concurrency: int = 1, snapshot_dir: str = None):
     """
     Use this function after calling `etl.parse()`
+    
+    Each edge type is loaded as soon as the labels of its ends are loaded, 
+    up to `concurrency` labels or edge types are loaded at the same time
 
     Parameters
     ----------
@@ -163,6 +386,12 @@ def load(loader_obj: Loader, clear_source : Union[List[str], bool] = None):
         An instance of a Loader subclass (either Neo4JLoader or TigerGraphLoader)
     use_mapper : bool
         If use_mapper is False, mapping function won't be used
+    concurrency : int
+        Maximum number of labels or edge types loaded in parallel
+    snapshot_dir : str
+        If given, only the nodes and edges inserted or updated since the load that wrote this snapshot are loaded,
+        the ones missing from the parse are deleted, and the snapshot is replaced once the load has finished.
+        Every source must be parsed again before a delta load
         
     Examples
     --------
@@ -172,7 +401,58 @@ def load(loader_obj: Loader, clear_source : Union[List[str], bool] = None):
     >>> etl.load(neo_loader)
     """
     global INFOS_SINGLETON
-    _load(INFOS_SINGLETON, loader_obj=loader_obj, clear_source=clear_source)
+    _load(INFOS_SINGLETON, loader_obj=loader_obj, clear_source=clear_source, concurrency=concurrency, snapshot_dir=snapshot_dir)
+
+def run(loader_obj: Loader, concurrency: int = 1, queue_size: int = 16):
+    """
+    Parse, map and load in a pipeline : each node file is loaded as soon as it is written
+    while the next sources are parsed, edge files are loaded once every source is parsed and mapped.
+    
+    Loaded files are checkpointed like with `etl.load()`, an interrupted run can be resumed by calling `etl.run()` again.
+    
+    Parameters
+    ----------
+    loader_obj : Loader
+        An instance of a Loader subclass
+    concurrency : int
+        Number of files loaded in parallel
+    queue_size : int
+        Maximum number of written node files waiting to be loaded, 
+        the parsing waits for the loader when it is reached
+        
+    Examples
+    --------
+
+    >>> etl.init()
+    >>> etl.run(etl.Neo4JLoader(url="bolt://127.0.0.1:7687"), concurrency=4)
+    """
+    global INFOS_SINGLETON
+    _run(INFOS_SINGLETON, loader_obj=loader_obj, concurrency=concurrency, queue_size=queue_size)
+    
+def report(path: str = "./output/report.json", prometheus_path: str = None) -> RunReport:
+    """
+    Write the performance report of the run (parsing, mapping and loading statistics)
+    in a JSON file and optionally in a Prometheus textfile, the report is also written
+    in `./output/report.json` at the end of `etl.parse()` and `etl.load()`
+
+    Parameters
+    ----------
+    path : str
+        Path of the JSON report
+    prometheus_path : str
+        If given, path of a Prometheus textfile (``.prom``) with the same metrics
+        
+    Examples
+    --------
+
+    >>> etl.parse()
+    >>> etl.load(loader)
+    >>> report = etl.report("./reports/run.json", prometheus_path="/var/lib/node_exporter/etl.prom")
+    >>> etl.RunReport.compare(etl.RunReport.read("./reports/last_run.json"), report)
+    """
+    global INFOS_SINGLETON
+    INFOS_SINGLETON._report.save(path, prometheus_path)
+    return INFOS_SINGLETON._report
 
 def clear():
     """
@@ -272,14 +552,20 @@ class Parser:
         if self._should_skip(self._id): 
             return Context(None, None)
         
+        if INFOS_SINGLETON._profiler:
+            INFOS_SINGLETON._profiler.start(self._id)
+        
         self.start = time.time()
+        self.start_cpu = time.process_time()
         return self.context
     
     def __exit__(self, *args):
         if self._should_skip(self._id): 
             return None
         
-        INFOS_SINGLETON.save_parser_infos(self._id, time.time() - self.start)
+        memory = INFOS_SINGLETON._profiler.stop(check_budget=args[0] is None) if INFOS_SINGLETON._profiler else None
+        
+        INFOS_SINGLETON.save_parser_infos(self._id, time.time() - self.start, time.process_time() - self.start_cpu, memory)
         _map_property(INFOS_SINGLETON)
         
     def __call__(self, f):
@@ -295,9 +581,21 @@ The variable `context` must be used in the function to save nodes or edges using
         def wrapper():
             if self._should_skip(self._id): return
             
-            start = time.time()
-            f(self.context)
-            INFOS_SINGLETON.save_parser_infos(self._id, time.time() - start)
+            if INFOS_SINGLETON._profiler:
+                INFOS_SINGLETON._profiler.start(self._id)
+            
+            start, start_cpu = time.time(), time.process_time()
+            try:
+                f(self.context)
+            except BaseException:
+                # The profiler stops tracing even if the parsing function fails, its exception isn't masked by the budget
+                if INFOS_SINGLETON._profiler:
+                    INFOS_SINGLETON._profiler.stop(check_budget=False)
+                raise
+            memory = INFOS_SINGLETON._profiler.stop() if INFOS_SINGLETON._profiler else None
+            elapsed, elapsed_cpu = time.time() - start, time.process_time() - start_cpu
+            
+            INFOS_SINGLETON.save_parser_infos(self._id, elapsed, elapsed_cpu, memory)
         
         INFOS_SINGLETON._all_parsing_functions[self._id] = (wrapper, self.metadatas)
         return wrapper
\ No newline at end of file
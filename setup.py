@@ -18,6 +18,9 @@ Features:
 Note: This package requires a Neo4j or TigerGraph database running.
 """,
     packages=["graph_etl"],
+    entry_points={
+        "console_scripts": ["graph-etl=graph_etl.cli:main"]
+    },
     install_requires=[
         "tqdm",
         "polars>=0.18.7",
@@ -25,5 +28,9 @@ Note: This package requires a Neo4j or TigerGraph database running.
         "pyTigerGraph",
         "neo4j",
         "dotwiz"
-    ]
+    ],
+    extras_require={
+        "kuzu": ["kuzu"],
+        "duckdb": ["duckdb"]
+    }
 )